@@ -1,3 +1,5 @@
+# ASGI-Einstiegspunkt (z. B. daphne config.asgi:application). Der Live-Kanal
+# /api/live/events/ läuft auch unter WSGI, belegt dort aber je Client einen Thread.
 import os
 from django.core.asgi import get_asgi_application
 
@@ -164,6 +164,42 @@ HOME_ASSISTANT_ACCESS_TOKEN = os.getenv('HOME_ASSISTANT_ACCESS_TOKEN')
 HOME_ASSISTANT_API_URL = os.getenv('HOME_ASSISTANT_API_URL')
 UNIFI_DEVICE_ID = os.getenv("UNIFI_DEVICE_ID")
 
+# 🪪 NFC-Kartenindex: Einträge, die länger als so viele Sekunden nicht von UniFi bestätigt
+# wurden, werden beim Scan neu abgeglichen (regelmäßig: manage.py refresh_nfc_index --interval 300)
+NFC_INDEX_MAX_AGE_SECONDS = int(os.getenv('NFC_INDEX_MAX_AGE_SECONDS', '900'))
+
+# 🔄 Mitglieder-Synchronisation (Outbox + Worker: manage.py run_member_sync_worker)
+# MEMBER_SYNC_BACKEND: 'live' (Joomla/UniFi/WordPress) oder 'stub' (lokal, ohne externe Systeme)
+MEMBER_SYNC_BACKEND = os.getenv('MEMBER_SYNC_BACKEND', 'live')
+MEMBER_SYNC_TARGETS = [
+    target.strip() for target in os.getenv('MEMBER_SYNC_TARGETS', 'joomla,unifi').split(',') if target.strip()
+]
+MEMBER_SYNC_MAX_ATTEMPTS = int(os.getenv('MEMBER_SYNC_MAX_ATTEMPTS', '8'))
+MEMBER_SYNC_BACKOFF_SECONDS = int(os.getenv('MEMBER_SYNC_BACKOFF_SECONDS', '30'))
+
+# 🧹 Aufbewahrung von Verlaufsdaten (manage.py apply_retention), 0 = unbegrenzt
+HISTORY_RETENTION = {
+    'sensor_raw_days': int(os.getenv('RETENTION_SENSOR_RAW_DAYS', '30')),
+    'sensor_hourly_days': int(os.getenv('RETENTION_SENSOR_HOURLY_DAYS', '365')),
+    'sensor_daily_days': int(os.getenv('RETENTION_SENSOR_DAILY_DAYS', '0')),
+    'access_event_days': int(os.getenv('RETENTION_ACCESS_EVENT_DAYS', '365')),
+    'batch_size': int(os.getenv('RETENTION_BATCH_SIZE', '2000')),
+    'archive_dir': os.getenv('RETENTION_ARCHIVE_DIR', ''),
+}
+
+# 📡 Live-Kanal (/api/live/events/): Prüfintervall in Sekunden
+LIVE_PUSH_INTERVAL = float(os.getenv('LIVE_PUSH_INTERVAL', '1.0'))
+
+# 🌱 SPS: Anzahl PlcProgram.Write-Aufrufe pro JSON-RPC-Batch
+PLC_BATCH_SIZE = int(os.getenv('PLC_BATCH_SIZE', '50'))
+
+# 🌱 SPS: Auth-Token nach Anmeldung zusätzlich in der Datenbank ablegen (Warmstart nach Neustart)
+PLC_TOKEN_PERSIST = os.getenv('PLC_TOKEN_PERSIST', 'true').lower() in ('1', 'true', 'yes')
+
+# 🌱 SPS-Befehlswarteschlange (manage.py run_plc_command_worker): Versuche und Basis-Backoff in Sekunden
+PLC_COMMAND_MAX_ATTEMPTS = int(os.getenv('PLC_COMMAND_MAX_ATTEMPTS', '6'))
+PLC_COMMAND_BACKOFF_SECONDS = int(os.getenv('PLC_COMMAND_BACKOFF_SECONDS', '5'))
+
 # 📝 Logging-Konfiguration für Debugging
 LOGGING = {
     'version': 1,
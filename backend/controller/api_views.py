@@ -1,11 +1,13 @@
 # backend/controller/api_views.py
 
+from collections import Counter
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.utils import timezone
 from django.db import transaction
+from django.utils import timezone
 from rooms.models import Room
 from .models import (
     ControlUnit, ControlSchedule, ControlParameter,
@@ -18,7 +20,12 @@ from .serializers import (
     RoomControlOverviewSerializer, SendCommandSerializer,
     PLCConfigSerializer, LEDControlSerializer
 )
-from .plc_interface import get_plc_interface
+from . import schedule_timeline
+from .command_queue import command_writes, enqueue_command
+from .plc_interface import get_plc_interface, plc_pool
+
+TIMELINE_MAX_DAYS = 31
+SCHEDULE_UPDATE_FIELDS = ['end_time', 'target_value', 'secondary_value', 'parameters', 'is_active']
 
 
 class ControlUnitViewSet(viewsets.ModelViewSet):
@@ -40,79 +47,25 @@ class ControlUnitViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def toggle_led(self, request, pk=None):
-        """LED Start/Stopp umschalten"""
+        """LED Start/Stopp umschalten (Zustellung über den Befehls-Worker)"""
         control_unit = self.get_object()
         serializer = LEDControlSerializer(data=request.data)
         
         if serializer.is_valid():
             new_status = serializer.validated_data['status']
+            command = enqueue_command(control_unit, 'set_led', {'status': new_status})
             
-            # Command erstellen
-            command = ControlCommand.objects.create(
-                control_unit=control_unit,
-                command_type='set_led',
-                payload={'status': new_status}
-            )
-            
-            # An SPS senden
-            try:
-                plc = get_plc_interface(control_unit)
-                success = plc.set_led_status(new_status)
-                
-                if success:
-                    # Status aktualisieren oder erstellen
-                    status_obj, created = ControlStatus.objects.get_or_create(
-                        control_unit=control_unit,
-                        defaults={
-                            'led_status': new_status,
-                            'output_q0_status': new_status,
-                            'is_online': True
-                        }
-                    )
-                    
-                    if not created:
-                        status_obj.led_status = new_status
-                        status_obj.output_q0_status = new_status  # Q0 ist mit LED verknüpft
-                        status_obj.is_online = True
-                        status_obj.save()
-                    
-                    command.status = 'confirmed'
-                    command.confirmed_at = timezone.now()
-                    
-                    # Control Unit neu laden für aktuelle Daten
-                    control_unit.refresh_from_db()
-                    
-                    # Vollständige Unit-Daten zurückgeben
-                    unit_data = ControlUnitSerializer(control_unit).data
-                    
-                else:
-                    command.status = 'failed'
-                    command.error_message = 'SPS hat den Befehl nicht akzeptiert'
-                
-                command.save()
-                
-                return Response({
-                    'success': success,
-                    'led_status': new_status,
-                    'command_id': str(command.id),
-                    'unit': unit_data  # Vollständige Unit-Daten inkl. current_status
-                }, status=status.HTTP_200_OK if success else status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-            except Exception as e:
-                command.status = 'failed'
-                command.error_message = str(e)
-                command.save()
-                
-                return Response({
-                    'success': False,
-                    'error': str(e)
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Status erst nach Zustellung: GET /api/controller/commands/<id>/
+            return Response({
+                'command_id': str(command.id),
+                'command_status': command.status
+            }, status=status.HTTP_202_ACCEPTED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
     def save_to_plc(self, request, pk=None):
-        """Speichert die aktuelle Konfiguration in der SPS"""
+        """Speichert die aktuelle Konfiguration in der SPS (Zustellung über den Befehls-Worker)"""
         control_unit = self.get_object()
         
         # Prüfung ob alle notwendigen Daten vorhanden sind
@@ -133,46 +86,26 @@ class ControlUnitViewSet(viewsets.ModelViewSet):
         for param in control_unit.parameters.all():
             config_data['parameters'][param.key] = param.get_typed_value()
         
-        # Command erstellen
-        command = ControlCommand.objects.create(
-            control_unit=control_unit,
-            command_type='save_config',
-            payload=config_data
-        )
+        # Aktive Zeitpläne hinzufügen (werden zusammen mit den Parametern in einem Batch geschrieben)
+        config_data['schedules'] = [
+            {
+                'weekday': schedule.weekday,
+                'start_time': schedule.start_time.strftime('%H:%M'),
+                'end_time': schedule.end_time.strftime('%H:%M'),
+                'target_value': schedule.target_value,
+                'secondary_value': schedule.secondary_value,
+                'is_active': schedule.is_active,
+            }
+            for schedule in control_unit.schedules.filter(is_active=True)
+        ]
         
-        try:
-            plc = get_plc_interface(control_unit)
-            
-            # Zuerst authentifizieren
-            plc.ensure_authenticated()
-            
-            # Konfiguration speichern
-            success = plc.send_command(command)
-            
-            if success:
-                control_unit.last_sync = timezone.now()
-                control_unit.save(update_fields=['last_sync'])
-                
-                return Response({
-                    'success': True,
-                    'message': 'Konfiguration erfolgreich in SPS gespeichert',
-                    'last_sync': control_unit.last_sync
-                })
-            else:
-                return Response({
-                    'success': False,
-                    'error': 'Fehler beim Speichern in der SPS'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except Exception as e:
-            command.status = 'failed'
-            command.error_message = str(e)
-            command.save()
-            
-            return Response({
-                'success': False,
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        command = enqueue_command(control_unit, 'save_config', config_data)
+        
+        return Response({
+            'message': 'Konfiguration zur Übertragung an die SPS eingeplant',
+            'command_id': str(command.id),
+            'command_status': command.status
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def sync_status(self, request, pk=None):
@@ -227,38 +160,22 @@ class ControlUnitViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Command erstellen
-            command = ControlCommand.objects.create(
-                control_unit=control_unit,
-                command_type=command_type,
-                payload={
-                    'unit_config': ControlUnitSerializer(control_unit).data,
-                    'parameters': parameters
-                }
-            )
-            
-            # An SPS senden
-            try:
-                plc = get_plc_interface(control_unit)
-                result = plc.send_command(command)
-                
-                command.status = 'sent' if result else 'failed'
-                command.sent_at = timezone.now()
-                command.save()
-                
+            payload = {
+                'unit_config': ControlUnitSerializer(control_unit).data,
+                'parameters': parameters
+            }
+            if command_writes(command_type, payload) is None:
                 return Response(
-                    ControlCommandSerializer(command).data,
-                    status=status.HTTP_201_CREATED
-                )
-            except Exception as e:
-                command.status = 'failed'
-                command.error_message = str(e)
-                command.save()
-                
-                return Response(
-                    {'error': str(e)},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    {'error': f'Unbekannter Command-Type: {command_type}'},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
+            
+            command = enqueue_command(control_unit, command_type, payload)
+            
+            return Response(
+                ControlCommandSerializer(command).data,
+                status=status.HTTP_202_ACCEPTED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -275,6 +192,38 @@ class ControlUnitViewSet(viewsets.ModelViewSet):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    @action(detail=True, methods=['get'])
+    def setpoint(self, request, pk=None):
+        """Aktueller und nächster Sollwert laut Zeitplan"""
+        control_unit = self.get_object()
+        return Response(schedule_timeline.setpoint(control_unit.pk))
+    
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Tagesprofile der nächsten Tage (?days=, Standard 7) samt Überschneidungen"""
+        control_unit = self.get_object()
+        try:
+            days = int(request.query_params.get('days', 7))
+            if not 1 <= days <= TIMELINE_MAX_DAYS:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': f'days muss zwischen 1 und {TIMELINE_MAX_DAYS} liegen'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        timeline = schedule_timeline.get_timeline(control_unit.pk)
+        return Response({
+            'unit_id': str(control_unit.pk),
+            'days': schedule_timeline.render(control_unit.pk, days=days),
+            'overlaps': timeline.overlaps
+        })
+    
+    @action(detail=False, methods=['get'])
+    def pool_stats(self, request):
+        """Statistik der gemeinsamen SPS-Verbindungen dieses Serverprozesses"""
+        return Response(plc_pool.stats())
+    
     @action(detail=False, methods=['get'])
     def by_room(self, request):
         """Gruppiert Steuerungseinheiten nach Raum"""
@@ -306,7 +255,10 @@ class ControlScheduleViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
-        """Aktualisiert mehrere Zeitpläne gleichzeitig"""
+        """
+        Setzt die Zeitpläne einer Einheit auf die übergebene Liste: nur
+        geänderte Zeilen werden geschrieben, fehlende gelöscht, neue angelegt.
+        """
         control_unit_id = request.data.get('control_unit_id')
         schedules_data = request.data.get('schedules', [])
         
@@ -324,30 +276,63 @@ class ControlScheduleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        with transaction.atomic():
-            # Alte Zeitpläne löschen
-            control_unit.schedules.all().delete()
-            
-            # Neue erstellen
-            created_schedules = []
-            for schedule_data in schedules_data:
-                schedule_data['control_unit'] = control_unit.id
-                serializer = ControlScheduleSerializer(data=schedule_data)
-                
-                if serializer.is_valid():
-                    schedule = serializer.save()
-                    created_schedules.append(schedule)
-                else:
-                    transaction.set_rollback(True)
-                    return Response(
-                        serializer.errors,
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
+        serializer = ControlScheduleSerializer(data=schedules_data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        incoming = serializer.validated_data
+        
+        # Prüfungen im Speicher, bevor geschrieben wird
+        keys = [(item['weekday'], item['start_time']) for item in incoming]
+        duplicates = sorted(key for key, count in Counter(keys).items() if count > 1)
+        if duplicates:
             return Response(
-                ControlScheduleSerializer(created_schedules, many=True).data,
-                status=status.HTTP_201_CREATED
+                {'error': 'Doppelte Startzeit am selben Wochentag',
+                 'duplicates': [{'weekday': weekday, 'start_time': start} for weekday, start in duplicates]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Überschneidungen aktiver Zeitpläne, benannt nach ihrer Position in der Liste
+        overlaps = schedule_timeline.find_overlaps([
+            {**item, 'id': position} for position, item in enumerate(incoming) if item.get('is_active', True)
+        ])
+        if overlaps:
+            return Response(
+                {'error': 'Zeitpläne überschneiden sich', 'overlaps': overlaps},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Abgleich über (Wochentag, Startzeit) – die eindeutige Kombination je Einheit
+        existing = {
+            (schedule.weekday, schedule.start_time): schedule
+            for schedule in control_unit.schedules.all()
+        }
+        to_create, to_update = [], []
+        for key, item in zip(keys, incoming):
+            schedule = existing.pop(key, None)
+            if schedule is None:
+                to_create.append(ControlSchedule(control_unit=control_unit, **item))
+                continue
+            changed = False
+            for field in SCHEDULE_UPDATE_FIELDS:
+                if field in item and getattr(schedule, field) != item[field]:
+                    setattr(schedule, field, item[field])
+                    changed = True
+            if changed:
+                schedule.updated_at = timezone.now()
+                to_update.append(schedule)
+        
+        with transaction.atomic():
+            if existing:
+                ControlSchedule.objects.filter(pk__in=[s.pk for s in existing.values()]).delete()
+            if to_update:
+                ControlSchedule.objects.bulk_update(to_update, SCHEDULE_UPDATE_FIELDS + ['updated_at'])
+            if to_create:
+                ControlSchedule.objects.bulk_create(to_create)
+        
+        return Response(
+            ControlScheduleSerializer(control_unit.schedules.all(), many=True).data,
+            status=status.HTTP_201_CREATED
+        )
 
 
 class ControlParameterViewSet(viewsets.ModelViewSet):
@@ -0,0 +1,241 @@
+# backend/controller/command_queue.py
+"""
+Dauerhafte Befehlswarteschlange für die SPS.
+
+Die API legt Befehle nur als 'pending' an (enqueue_command) und antwortet
+sofort mit der Befehls-ID; der Worker (manage.py run_plc_command_worker)
+stellt sie zu:
+
+- Pro Steuerungseinheit in Erstellungsreihenfolge. Solange ein älterer
+  Befehl auf seinen nächsten Versuch wartet, bleiben neuere liegen.
+- Alle offenen Befehle einer Einheit gehen gemeinsam in einen
+  JSON-RPC-Batch. Wird dieselbe Variable mehrfach geschrieben, gilt nur der
+  letzte Wert; vollständig überholte Befehle werden 'superseded'.
+- Übertragungsfehler führen zu Wiederholungen mit exponentiellem Backoff,
+  Fehler einzelner Variablen direkt zu 'failed'.
+
+Zustände: pending → sent (in Zustellung) → confirmed | failed | superseded.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import ControlCommand, ControlStatus, ControlUnit
+from .plc_interface import MockPLCInterface, build_config_writes, get_plc_interface, plc_variable
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'PLC_COMMAND_MAX_ATTEMPTS', 6)
+BACKOFF_BASE_SECONDS = getattr(settings, 'PLC_COMMAND_BACKOFF_SECONDS', 5)
+BACKOFF_MAX_SECONDS = 5 * 60
+LEASE_SECONDS = 2 * 60  # Danach gilt ein Befehl in Zustellung als verwaist
+
+OUTPUT_VARIABLE = plc_variable('api_output')
+OUTPUT_COMMANDS = ('set_led', 'set_output')
+CONFIG_COMMANDS = ('update_config', 'save_config')
+
+
+def command_writes(command_type, payload):
+    """(Variable, Wert)-Liste eines Befehls oder None, wenn der Typ nicht unterstützt wird"""
+    if command_type in OUTPUT_COMMANDS:
+        status = payload.get('status', (payload.get('parameters') or {}).get('status', False))
+        return [(OUTPUT_VARIABLE, bool(status))]
+    if command_type in CONFIG_COMMANDS:
+        return build_config_writes(payload)
+    return None
+
+
+def enqueue_command(control_unit, command_type, payload):
+    """Legt einen Befehl zur Zustellung an; der Worker überträgt ihn"""
+    return ControlCommand.objects.create(
+        control_unit=control_unit,
+        command_type=command_type,
+        payload=payload,
+        status='pending',
+        next_attempt_at=timezone.now()
+    )
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS))
+
+
+def release_stale(now=None):
+    """Gibt Befehle frei, deren Worker während der Zustellung abgebrochen ist"""
+    now = now or timezone.now()
+    return ControlCommand.objects.filter(
+        status='sent',
+        sent_at__lt=now - timedelta(seconds=LEASE_SECONDS)
+    ).exclude(lease_token='').update(status='pending', lease_token='', next_attempt_at=now)
+
+
+def claim_due(max_units=20, now=None, units=None):
+    """
+    Reserviert alle offenen Befehle der Einheiten, deren ältester offener
+    Befehl fällig ist (optional nur für units). Gibt {Einheit: [Befehle in
+    Reihenfolge]} zurück.
+    """
+    now = now or timezone.now()
+    pending = ControlCommand.objects.filter(status='pending')
+    if units is not None:
+        pending = pending.filter(control_unit__in=units)
+    busy = ControlCommand.objects.filter(status='sent').exclude(lease_token='').values('control_unit_id')
+    head = ControlCommand.objects.filter(
+        control_unit_id=OuterRef('control_unit_id'), status='pending'
+    ).order_by('created_at').values('next_attempt_at')[:1]
+
+    # Wartet der älteste Befehl einer Einheit noch, bleibt die ganze Einheit
+    # liegen (Reihenfolge); gefiltert wird vor dem Begrenzen auf max_units
+    due_units = pending.exclude(control_unit_id__in=busy).order_by().values('control_unit_id').annotate(
+        first_created=Min('created_at'),
+        head_next_attempt=Subquery(head)
+    ).filter(Q(head_next_attempt__isnull=True) | Q(head_next_attempt__lte=now))
+    unit_ids = [row['control_unit_id'] for row in due_units.order_by('first_created')[:max_units]]
+
+    claimed = {}
+    token = uuid.uuid4().hex
+    if unit_ids:
+        # Erneut gegen laufende Zustellungen prüfen: Ein anderer Worker kann die
+        # Einheit seit der Auswahl reserviert haben (Reihenfolge je Einheit)
+        ControlCommand.objects.filter(control_unit_id__in=unit_ids, status='pending').exclude(
+            control_unit_id__in=busy
+        ).update(status='sent', lease_token=token, sent_at=now)
+
+    for command in ControlCommand.objects.filter(lease_token=token, status='sent').select_related(
+        'control_unit'
+    ).order_by('created_at'):
+        claimed.setdefault(command.control_unit, []).append(command)
+    return claimed
+
+
+@dataclass
+class DeliveryPlan:
+    writes: list = field(default_factory=list)
+    owners: dict = field(default_factory=dict)  # Befehls-ID → Indizes in writes
+    superseded: dict = field(default_factory=dict)  # Befehls-ID → ersetzender Befehl
+    unsupported: list = field(default_factory=list)
+
+
+def plan_delivery(commands):
+    """Fasst die Befehle einer Einheit zusammen; spätere Werte derselben Variable gewinnen"""
+    plan = DeliveryPlan()
+    latest = {}
+    per_command = []
+    for command in commands:
+        writes = command_writes(command.command_type, command.payload or {})
+        if writes is None:
+            plan.unsupported.append(command)
+            continue
+        per_command.append((command, writes))
+        for var, value in writes:
+            latest[var] = (command, value)
+
+    emitted = set()
+    for command, writes in per_command:
+        indices = []
+        for var, _ in writes:
+            owner, value = latest[var]
+            if owner is command and var not in emitted:
+                emitted.add(var)
+                indices.append(len(plan.writes))
+                plan.writes.append((var, value))
+        if writes and not indices:
+            plan.superseded[command.pk] = latest[writes[-1][0]][0]
+        else:
+            plan.owners[command.pk] = indices
+    return plan
+
+
+class CommandDispatcher:
+    def __init__(self, max_workers=4, use_mock=False):
+        self.max_workers = max_workers
+        self.use_mock = use_mock
+        self._mocks = {}
+
+    def _interface(self, unit):
+        if self.use_mock:
+            mock = self._mocks.setdefault(unit.pk, MockPLCInterface(unit))
+            mock.control_unit = unit
+            return mock
+        return get_plc_interface(unit)
+
+    def _deliver(self, unit, plan):
+        if not plan.writes:
+            return None, None
+        try:
+            return self._interface(unit).write_many(plan.writes), None
+        except Exception as e:
+            return None, str(e)
+
+    def process_due(self, max_units=20, units=None):
+        """Stellt einen Schub fälliger Befehle zu und liefert die Zählung je Ergebnis"""
+        results = {'confirmed': 0, 'failed': 0, 'retry': 0, 'superseded': 0, 'released': release_stale()}
+        claimed = claim_due(max_units, units=units)
+        if not claimed:
+            return results
+
+        plans = {unit: plan_delivery(commands) for unit, commands in claimed.items()}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(plans))) as executor:
+            outcomes = dict(zip(plans, executor.map(lambda unit: self._deliver(unit, plans[unit]), plans)))
+
+        # Ergebnisse im aufrufenden Thread speichern
+        for unit, commands in claimed.items():
+            write_results, error = outcomes[unit]
+            for outcome in self._apply(unit, commands, plans[unit], write_results, error):
+                results[outcome] += 1
+        return results
+
+    def _apply(self, unit, commands, plan, write_results, error):
+        now = timezone.now()
+        outcomes = []
+        output_status = None
+
+        for command in commands:
+            command.lease_token = ''
+            if command in plan.unsupported:
+                command.status = 'failed'
+                command.error_message = f"Unbekannter Command-Type: {command.command_type}"
+            elif command.pk in plan.superseded:
+                command.status = 'superseded'
+                command.error_message = f"Ersetzt durch Befehl {plan.superseded[command.pk].pk}"
+            elif error is not None:
+                command.retry_count += 1
+                command.error_message = error
+                if command.retry_count >= MAX_ATTEMPTS:
+                    command.status = 'failed'
+                else:
+                    command.status = 'pending'
+                    command.next_attempt_at = now + backoff_delay(command.retry_count)
+                    command.save(update_fields=['status', 'lease_token', 'retry_count', 'error_message',
+                                                'next_attempt_at'])
+                    outcomes.append('retry')
+                    continue
+            else:
+                items = [write_results[index] for index in plan.owners.get(command.pk, [])]
+                failed = [item for item in items if not item['success']]
+                command.plc_response = {'written': len(items) - len(failed), 'failed': len(failed), 'results': items}
+                command.error_message = "; ".join(f"{item['var']}: {item['error']}" for item in failed) or None
+                command.status = 'failed' if failed else 'confirmed'
+                if not failed:
+                    command.confirmed_at = now
+                    if command.command_type in OUTPUT_COMMANDS and items:
+                        output_status = items[0]['value']
+
+            command.save(update_fields=['status', 'lease_token', 'retry_count', 'error_message',
+                                        'plc_response', 'confirmed_at'])
+            outcomes.append(command.status)
+
+        if 'confirmed' in outcomes:
+            ControlUnit.objects.filter(pk=unit.pk).update(status='active', last_sync=now)
+            status_fields = {'is_online': True, 'error_message': None, 'last_update': now}
+            if output_status is not None:
+                status_fields.update(led_status=output_status, output_q0_status=output_status)
+            if not ControlStatus.objects.filter(control_unit=unit).update(**status_fields):
+                ControlStatus.objects.create(control_unit=unit, **status_fields)
+        return outcomes
@@ -0,0 +1,229 @@
+# backend/controller/management/commands/benchmark_plc.py
+
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as day_time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from controller.api_views import ControlUnitViewSet
+from controller.command_queue import CommandDispatcher
+from controller.models import ControlCommand, ControlParameter, ControlSchedule, ControlUnit
+from controller.plc_interface import plc_pool, token_store
+from controller.plc_simulator import start_simulators
+from rooms.models import Room
+
+BENCHMARK_ROOM = "Benchmark SPS"
+
+# Aktion → HTTP-Methode der ControlUnitViewSet-Action
+ACTIONS = {
+    'toggle_led': 'post',
+    'save_to_plc': 'post',
+    'sync_status': 'get',
+    'status': 'get',
+    'setpoint': 'get',
+}
+QUEUED_ACTIONS = ('toggle_led', 'save_to_plc')
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ("Lasttest: startet N SPS-Simulatoren, ruft ControlUnitViewSet-Actions parallel auf "
+            "und misst Latenzen, Round-Trips und Threads.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=5, help="Anzahl simulierter SPS/Steuerungseinheiten")
+        parser.add_argument('--requests', type=int, default=20, help="Aufrufe pro Einheit und Aktion")
+        parser.add_argument('--concurrency', type=int, default=8, help="Gleichzeitige Aufrufe")
+        parser.add_argument('--actions', default='toggle_led,save_to_plc,sync_status',
+                            help=f"Kommagetrennt aus: {', '.join(ACTIONS)}")
+        parser.add_argument('--parameters', type=int, default=10, help="Parameter pro Einheit (für save_to_plc)")
+        parser.add_argument('--latency-ms', type=float, default=10.0, help="Antwortzeit der Simulatoren")
+        parser.add_argument('--jitter-ms', type=float, default=5.0)
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fehlerquote je SPS-Aufruf (0..1)")
+        parser.add_argument('--token-lifetime', type=int, default=30 * 60, help="Token-Gültigkeit in Sekunden")
+        parser.add_argument('--no-deliver', action='store_true',
+                            help="Eingeplante Befehle nicht über den Befehls-Worker zustellen")
+        parser.add_argument('--deliver-timeout', type=float, default=30.0,
+                            help="Maximale Sekunden für die Zustellung der Befehle")
+        parser.add_argument('--keep', action='store_true', help="Benchmark-Einheiten danach nicht löschen")
+
+    def handle(self, *args, **options):
+        actions = [action.strip() for action in options['actions'].split(',') if action.strip()]
+        unknown = [action for action in actions if action not in ACTIONS]
+        if unknown:
+            raise CommandError(f"Unbekannte Aktion(en): {', '.join(unknown)}")
+
+        simulators = start_simulators(
+            options['units'],
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            error_rate=options['error_rate'],
+            token_lifetime=options['token_lifetime']
+        )
+        self.stdout.write(f"🧪 {len(simulators)} SPS-Simulator(en) gestartet "
+                          f"({options['latency_ms']:.0f}±{options['jitter_ms']:.0f} ms, "
+                          f"Fehlerquote {options['error_rate']:.1%})")
+
+        units = self._create_units(simulators, options['parameters'])
+        try:
+            # Echte JSON-RPC-Clients gegen die Simulatoren, auch wenn PLC_USE_MOCK gesetzt ist
+            with override_settings(PLC_USE_MOCK=False):
+                timings, statuses, seconds, peak_threads = self._drive(units, actions, options)
+                delivery = None
+                if not options['no_deliver'] and any(action in QUEUED_ACTIONS for action in actions):
+                    delivery = self._deliver(units, options)
+            self._report(timings, statuses, seconds, peak_threads, delivery, simulators)
+        finally:
+            for unit in units:
+                plc_pool.discard(unit)
+            for simulator in simulators:
+                simulator.stop()
+            if not options['keep']:
+                ControlUnit.objects.filter(pk__in=[unit.pk for unit in units]).delete()
+                if self.room_created:
+                    Room.objects.filter(name=BENCHMARK_ROOM).delete()
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark abgeschlossen"))
+
+    def _create_units(self, simulators, parameter_count):
+        room, self.room_created = Room.objects.get_or_create(name=BENCHMARK_ROOM)
+        units = []
+        for index, simulator in enumerate(simulators):
+            unit = ControlUnit.objects.create(
+                room=room,
+                name=f"Benchmark SPS {index + 1}",
+                unit_type='lighting',
+                status='active',
+                plc_address=simulator.url
+            )
+            ControlParameter.objects.bulk_create([
+                ControlParameter(control_unit=unit, key=f"bench_param_{number}", value=str(number), param_type='int')
+                for number in range(parameter_count)
+            ])
+            ControlSchedule.objects.bulk_create([
+                ControlSchedule(control_unit=unit, weekday=weekday, start_time=day_time(6),
+                                end_time=day_time(18), target_value=100)
+                for weekday in range(7)
+            ])
+            units.append(unit)
+        return units
+
+    def _drive(self, units, actions, options):
+        factory = APIRequestFactory()
+        user = User(username='benchmark')
+        views = {action: ControlUnitViewSet.as_view({ACTIONS[action]: action}) for action in actions}
+
+        jobs = [
+            (action, unit)
+            for _ in range(options['requests'])
+            for unit in units
+            for action in actions
+        ]
+
+        timings = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        lock = threading.Lock()
+
+        def run(job):
+            action, unit = job
+            path = f"/api/controller/units/{unit.pk}/{action}/"
+            if ACTIONS[action] == 'post':
+                data = {'status': random.choice([True, False])} if action == 'toggle_led' else {}
+                request = factory.post(path, data, format='json')
+            else:
+                request = factory.get(path)
+            force_authenticate(request, user=user)
+
+            started = time.perf_counter()
+            try:
+                code = views[action](request, pk=str(unit.pk)).status_code
+            except Exception:
+                code = 'exception'
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings[action].append(elapsed)
+                statuses[action][code] += 1
+
+        # Thread-Spitze während des Laufs erfassen
+        peak = [threading.active_count()]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.01):
+                peak[0] = max(peak[0], threading.active_count())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        self.stdout.write(f"🚀 {len(jobs)} Aufrufe ({', '.join(actions)}) mit {options['concurrency']} parallel...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(run, jobs))
+        seconds = time.perf_counter() - started
+
+        done.set()
+        sampler.join()
+        return timings, statuses, seconds, peak[0]
+
+    def _deliver(self, units, options):
+        dispatcher = CommandDispatcher(max_workers=options['concurrency'])
+        commands = ControlCommand.objects.filter(control_unit__in=units)
+        totals = defaultdict(int)
+
+        started = time.perf_counter()
+        deadline = started + options['deliver_timeout']
+        while time.perf_counter() < deadline:
+            result = dispatcher.process_due(max_units=len(units), units=units)
+            for key, value in result.items():
+                totals[key] += value
+            if not commands.filter(status__in=['pending', 'sent']).exists():
+                break
+            if not any(result[key] for key in ('confirmed', 'failed', 'retry', 'superseded')):
+                time.sleep(0.1)  # Wiederholungen warten auf ihren Backoff
+        totals['seconds'] = time.perf_counter() - started
+        totals['open'] = commands.filter(status__in=['pending', 'sent']).count()
+        return totals
+
+    def _report(self, timings, statuses, seconds, peak_threads, delivery, simulators):
+        total = sum(len(values) for values in timings.values())
+        self.stdout.write(f"\n📊 {total} Aufrufe in {seconds:.2f}s ({total / seconds:.1f}/s), "
+                          f"Thread-Spitze {peak_threads}")
+        self.stdout.write(f"{'Aktion':<14}{'n':>6}{'Ø ms':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  Status")
+        for action, values in timings.items():
+            ms = [value * 1000 for value in values]
+            codes = ", ".join(f"{code}×{count}" for code, count in sorted(statuses[action].items(), key=str))
+            self.stdout.write(
+                f"{action:<14}{len(ms):>6}{sum(ms) / len(ms):>9.1f}{percentile(ms, 50):>9.1f}"
+                f"{percentile(ms, 95):>9.1f}{percentile(ms, 99):>9.1f}{max(ms):>9.1f}  {codes}"
+            )
+
+        if delivery is not None:
+            self.stdout.write(
+                f"\n📬 Zustellung: {delivery['confirmed']} bestätigt, {delivery['superseded']} ersetzt, "
+                f"{delivery['retry']} Wiederholungen, {delivery['failed']} fehlgeschlagen, "
+                f"{delivery['open']} offen ({delivery['seconds']:.2f}s)"
+            )
+
+        sims = [simulator.stats() for simulator in simulators]
+        summed = {key: sum(stat[key] for stat in sims) for key in sims[0] if key != 'max_concurrent'}
+        self.stdout.write(
+            f"\n🔌 SPS: {summed['requests']} Round-Trips ({summed['requests'] / max(total, 1):.2f} je Aufruf), "
+            f"{summed['calls']} Aufrufe in {summed['batches']} Batches, {summed['logins']} Logins, "
+            f"{summed['unauthorized']} abgewiesen, {summed['errors']} Fehler, "
+            f"max. {max(stat['max_concurrent'] for stat in sims)} gleichzeitig je SPS"
+        )
+        store = token_store.stats()
+        self.stdout.write(f"🔑 Token-Erneuerungen im Prozess: {store['refreshes']}, "
+                          f"Clients im Pool: {plc_pool.stats()['clients']}")
@@ -0,0 +1,64 @@
+# backend/controller/management/commands/poll_control_status.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from controller.status_poller import StatusPoller, pollable_units
+
+
+class Command(BaseCommand):
+    help = "Fragt den SPS-Status aller aktiven Steuerungseinheiten parallel ab und speichert ihn."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Nur einen Durchlauf ausführen und beenden")
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help="Sekunden zwischen zwei Durchläufen")
+        parser.add_argument('--workers', type=int, default=8,
+                            help="Maximal gleichzeitig abgefragte Einheiten")
+        parser.add_argument('--max-backoff', type=int, default=900,
+                            help="Längste Wartezeit in Sekunden nach wiederholten Fehlern")
+        parser.add_argument('--unit', action='append', dest='units',
+                            help="Nur diese Einheit abfragen (UUID, mehrfach möglich)")
+        parser.add_argument('--all', action='store_true',
+                            help="Auch nicht aktive Einheiten mit SPS-Adresse abfragen")
+        parser.add_argument('--mock', action='store_true',
+                            help="MockPLCInterface verwenden (ohne SPS)")
+
+    def handle(self, *args, **options):
+        use_mock = options['mock'] or getattr(settings, 'PLC_USE_MOCK', False)
+        poller = StatusPoller(
+            max_workers=options['workers'],
+            base_backoff=max(int(options['interval']), 1),
+            max_backoff=options['max_backoff'],
+            use_mock=use_mock
+        )
+        self.stdout.write(
+            f"📡 Status-Poller gestartet ({options['workers']} parallel"
+            + (", Mock" if use_mock else "") + ")"
+        )
+
+        try:
+            while True:
+                close_old_connections()
+                units = list(pollable_units(options['all'], options['units']))
+                result = poller.poll(units)
+
+                if result['polled']:
+                    self.stdout.write(
+                        f"✅ {result['online']} online, {result['failed']} fehlgeschlagen, "
+                        f"{result['skipped']} zurückgestellt ({result['seconds']}s)"
+                    )
+                elif not units:
+                    self.stdout.write("⚠️ Keine Steuerungseinheiten zum Abfragen.")
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("🛑 Status-Poller beendet"))
@@ -0,0 +1,55 @@
+# backend/controller/management/commands/run_plc_command_worker.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from controller.command_queue import CommandDispatcher
+
+
+class Command(BaseCommand):
+    help = "Stellt wartende SPS-Befehle zu (pro Einheit geordnet, zusammengefasst, mit Wiederholung)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Nur einen Durchlauf ausführen und beenden")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Sekunden zwischen zwei Durchläufen ohne Arbeit")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Maximal gleichzeitig belieferte Einheiten")
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help="Maximale Anzahl Einheiten pro Durchlauf")
+        parser.add_argument('--mock', action='store_true',
+                            help="MockPLCInterface verwenden (ohne SPS)")
+
+    def handle(self, *args, **options):
+        use_mock = options['mock'] or getattr(settings, 'PLC_USE_MOCK', False)
+        dispatcher = CommandDispatcher(max_workers=options['workers'], use_mock=use_mock)
+        self.stdout.write(
+            f"📬 SPS-Befehls-Worker gestartet ({options['workers']} parallel"
+            + (", Mock" if use_mock else "") + ")"
+        )
+
+        try:
+            while True:
+                close_old_connections()
+                result = dispatcher.process_due(options['batch_size'])
+                handled = sum(result[key] for key in ('confirmed', 'failed', 'retry', 'superseded'))
+
+                if handled or result['released']:
+                    self.stdout.write(
+                        f"✅ {result['confirmed']} bestätigt, {result['superseded']} ersetzt, "
+                        f"{result['retry']} erneut geplant, {result['failed']} fehlgeschlagen"
+                        + (f", {result['released']} freigegeben" if result['released'] else "")
+                    )
+
+                if options['once']:
+                    break
+                if not handled:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("🛑 SPS-Befehls-Worker beendet"))
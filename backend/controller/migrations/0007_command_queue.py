@@ -0,0 +1,36 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controller', '0006_plcconfiguration_controlcommand_plc_response_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='controlcommand',
+            name='lease_token',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='controlcommand',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Nächster Zustellversuch', null=True),
+        ),
+        migrations.AlterField(
+            model_name='controlcommand',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ausstehend'), ('sent', 'Gesendet'), ('confirmed', 'Bestätigt'), ('failed', 'Fehlgeschlagen'), ('superseded', 'Ersetzt')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='controlcommand',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='controller__status_d8e55f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='controlcommand',
+            index=models.Index(fields=['control_unit', 'status', 'created_at'], name='controller__control_b2a054_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controller', '0007_command_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='controlschedule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
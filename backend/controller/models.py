@@ -97,6 +97,7 @@ class ControlSchedule(models.Model):
     parameters = models.JSONField(default=dict, blank=True, null=True)
     
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Teil der Zeitachsen-Version (schedule_timeline)
     
     class Meta:
         ordering = ['weekday', 'start_time']
@@ -191,6 +192,7 @@ class ControlCommand(models.Model):
         ('sent', 'Gesendet'),
         ('confirmed', 'Bestätigt'),
         ('failed', 'Fehlgeschlagen'),
+        ('superseded', 'Ersetzt'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -207,11 +209,19 @@ class ControlCommand(models.Model):
     error_message = models.TextField(blank=True, null=True)
     retry_count = models.IntegerField(default=0)
     
+    # Zustellung durch den Worker (controller/command_queue.py)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text="Nächster Zustellversuch")
+    lease_token = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    
     # NEU: Response tracking
     plc_response = models.JSONField(null=True, blank=True, help_text="SPS Antwort")
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['control_unit', 'status', 'created_at']),
+        ]
         verbose_name = 'Befehl'
         verbose_name_plural = 'Befehle'
     
@@ -2,8 +2,10 @@
 
 import json
 import logging
+import random
 import requests
 import threading
+import time
 from typing import Dict, Any, Optional, Union
 from datetime import datetime, timedelta
 from django.conf import settings
@@ -16,42 +18,256 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# Datenbaustein und Variablennamen für Konfigurationswerte in der SPS
+PLC_CONTROL_DB = '"DB_Control"'
+PLC_VARIABLE_ALIASES = {
+    'target_temperature': 'target_temp',
+    'humidity_setpoint': 'humidity_sp',
+}
+# Zeitpläne als Array im Datenbaustein: schedule[i].weekday/start/end/target/secondary/active
+PLC_SCHEDULE_ARRAY = 'schedule'
+PLC_UNAUTHORIZED = -32604
 
-class PLCJSONRPCInterface:
-    """JSON-RPC Interface zur Kommunikation mit Siemens S7-1200 G2 Web API"""
+
+def plc_variable(key: str) -> str:
+    """Parameter-Schlüssel → vollqualifizierte SPS-Variable"""
+    if key.startswith('"'):
+        return key
+    return f"{PLC_CONTROL_DB}.{PLC_VARIABLE_ALIASES.get(key, key)}"
+
+
+def _minutes(value) -> int:
+    """Uhrzeit (time oder 'HH:MM[:SS]') → Minuten seit Mitternacht"""
+    if isinstance(value, str):
+        hours, minutes = value.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    return value.hour * 60 + value.minute
+
+
+def build_config_writes(config_data: Dict[str, Any]) -> list:
+    """
+    Wandelt eine Konfiguration (Parameter, Zeitpläne) in eine Liste von
+    (Variable, Wert) für PlcProgram.Write um.
+    """
+    writes = []
+    
+    # Direkt übergebene Einzelwerte (bisheriges Format von update_config)
+    for key in PLC_VARIABLE_ALIASES:
+        if key in config_data:
+            writes.append((plc_variable(key), config_data[key]))
+    
+    for key, value in (config_data.get('parameters') or {}).items():
+        writes.append((plc_variable(key), value))
+    
+    schedules = config_data.get('schedules')
+    if schedules is not None:
+        prefix = f"{PLC_CONTROL_DB}.{PLC_SCHEDULE_ARRAY}"
+        for index, schedule in enumerate(schedules):
+            writes.extend([
+                (f"{prefix}[{index}].weekday", schedule['weekday']),
+                (f"{prefix}[{index}].start", _minutes(schedule['start_time'])),
+                (f"{prefix}[{index}].end", _minutes(schedule['end_time'])),
+                (f"{prefix}[{index}].target", schedule['target_value']),
+                (f"{prefix}[{index}].secondary", schedule.get('secondary_value') or 0.0),
+                (f"{prefix}[{index}].active", schedule.get('is_active', True)),
+            ])
+        writes.append((f"{PLC_CONTROL_DB}.schedule_count", len(schedules)))
+    
+    return writes
+
+
+def parse_runtime_timeout(runtime_timeout_raw) -> int:
+    """runtime_timeout kann String, Int oder ISO 8601 Duration sein (Ergebnis in Minuten)"""
+    # ISO 8601 Duration Format behandeln (z.B. "PT30M" = 30 Minuten)
+    if isinstance(runtime_timeout_raw, str) and runtime_timeout_raw.startswith("PT"):
+        match = re.match(r'PT(\d+)([HM])', runtime_timeout_raw)
+        if match:
+            value = int(match.group(1))
+            unit = match.group(2)
+            if unit == 'H':
+                return value * 60  # Stunden zu Minuten
+            return value
+        logger.warning(f"Konnte ISO 8601 duration nicht parsen: {runtime_timeout_raw}, verwende Standard 30")
+        return 30
+    
+    # Normale String/Int Konvertierung
+    try:
+        return int(runtime_timeout_raw)
+    except (ValueError, TypeError):
+        logger.warning(f"Konnte runtime_timeout nicht parsen: {runtime_timeout_raw}, verwende Standard 30")
+        return 30
+
+
+class PLCTokenStore:
+    """
+    Auth-Tokens der SPS im Prozessspeicher, je Einheit und Zugangsdaten.
+
+    Erneuert wird unter einer Sperre pro Einheit (refresh): wer auf die
+    Sperre gewartet hat, findet den frischen Token vor und meldet sich nicht
+    erneut an. So gibt es eine Anmeldung pro Ablauffenster, gleich wie viele
+    Anfragen oder Client-Instanzen gleichzeitig laufen. Die Datenbank
+    (ControlUnit.plc_auth_token) dient nur als Warmstart nach einem Neustart
+    und wird nur bei einer Anmeldung geschrieben (PLC_TOKEN_PERSIST).
+    """
+    
+    # Token kurz vor Ablauf schon als ungültig behandeln
+    EXPIRY_MARGIN = timedelta(seconds=30)
+    
+    def __init__(self, persist=True):
+        self.persist = persist
+        self.refreshes = 0
+        self._tokens = {}  # Schlüssel → (Token, Ablauf)
+        self._locks = {}
+        self._warmed = set()
+        self._guard = threading.Lock()
+    
+    @staticmethod
+    def key(control_unit, base_url, username):
+        return (control_unit.pk if control_unit else None, base_url, username)
     
-    # Class-level storage für Keep-Alive Threads
-    _keepalive_threads = {}
+    def _unit_lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _valid(self, entry):
+        return bool(entry and entry[1] and entry[1] - self.EXPIRY_MARGIN > timezone.now())
+    
+    def _warm_start(self, key, control_unit):
+        """Token aus der bereits geladenen Einheit übernehmen (ohne Abfrage)"""
+        with self._guard:
+            if key in self._warmed:
+                return
+            self._warmed.add(key)
+            if control_unit.plc_auth_token and control_unit.plc_token_expires:
+                self._tokens.setdefault(key, (control_unit.plc_auth_token, control_unit.plc_token_expires))
+    
+    def get(self, key, control_unit=None):
+        """Gültiger Token oder None"""
+        if self.persist and control_unit is not None and key not in self._warmed:
+            self._warm_start(key, control_unit)
+        entry = self._tokens.get(key)
+        return entry[0] if self._valid(entry) else None
+    
+    def expires(self, key):
+        entry = self._tokens.get(key)
+        return entry[1] if entry else None
+    
+    def refresh(self, key, login, control_unit=None, stale=None):
+        """
+        Gibt einen gültigen Token zurück und meldet sich dafür nur an, wenn
+        nötig: login() → (Token, Ablauf) läuft unter der Sperre der Einheit
+        und nur, wenn kein gültiger Token vorliegt oder dieser der als
+        abgelehnt gemeldete (stale) ist.
+        """
+        with self._unit_lock(key):
+            current = self.get(key, control_unit)
+            if current and current != stale:
+                return current
+            token, expires = login()
+            with self._guard:
+                self._tokens[key] = (token, expires)
+            self.refreshes += 1
+        
+        if self.persist and control_unit is not None:
+            try:
+                type(control_unit).objects.filter(pk=control_unit.pk).update(
+                    plc_auth_token=token, plc_token_expires=expires
+                )
+            except Exception as e:
+                logger.warning(f"Token für Warmstart nicht gespeichert: {e}")
+        return token
+    
+    def invalidate(self, key, token=None):
+        """Verwirft den Token – nur, wenn er noch der übergebene ist"""
+        with self._guard:
+            entry = self._tokens.get(key)
+            if entry and (token is None or entry[0] == token):
+                del self._tokens[key]
+    
+    def is_authenticated(self, control_unit):
+        """Gültiger Token für die Einheit im Speicher oder (Warmstart) in der Datenbank"""
+        with self._guard:
+            entries = [entry for key, entry in self._tokens.items() if key[0] == control_unit.pk]
+        if any(self._valid(entry) for entry in entries):
+            return True
+        return self.persist and self._valid((control_unit.plc_auth_token, control_unit.plc_token_expires))
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            valid = sum(1 for entry in self._tokens.values() if self._valid(entry))
+        return {'tokens': valid, 'refreshes': self.refreshes, 'persist': self.persist}
+
+
+token_store = PLCTokenStore(persist=getattr(settings, 'PLC_TOKEN_PERSIST', True))
+
+
+class PLCJSONRPCInterface:
+    """
+    JSON-RPC Interface zur Kommunikation mit Siemens S7-1200 G2 Web API.
+
+    Instanzen werden über plc_pool (get_plc_interface) pro Steuerungseinheit
+    einmal angelegt und von allen Anfragen gemeinsam genutzt: Session und
+    Token bleiben im Speicher, Anfragen an dieselbe SPS laufen nacheinander.
+    """
     
     def __init__(self, control_unit=None):
         self.control_unit = control_unit
         self.session = requests.Session()
         self.session.verify = False  # SSL-Verifikation deaktivieren
         self.request_id = 1
-        self._keepalive_stop = threading.Event()
+        self._lock = threading.RLock()
+        
+        self.last_used = time.monotonic()
+        
+        # Statistik für plc_pool.stats()
+        self.requests_total = 0
+        self.errors_total = 0
+        self.logins_total = 0
+        self.reconnects_total = 0
+        self.latency_total = 0.0
+        self.last_latency = None
         
         # Konfiguration
+        self.base_url, self.username, self.password = self.connection_config(control_unit)
+        self.token_key = token_store.key(control_unit, self.base_url, self.username)
+    
+    @property
+    def token(self):
+        """Gültiger Token aus token_store (None, wenn abgelaufen)"""
+        return token_store.get(self.token_key, self.control_unit)
+    
+    @property
+    def token_expires(self):
+        return token_store.expires(self.token_key)
+    
+    @staticmethod
+    def connection_config(control_unit=None):
+        """(URL, Benutzer, Passwort); ändern sie sich, ersetzt der Pool den Client"""
         if control_unit and control_unit.plc_address:
-            self.base_url = control_unit.get_api_url()
-            self.username = control_unit.plc_username or 'sash'
-            self.password = control_unit.plc_password or 'Janus72728'
-        else:
-            # Fallback auf globale Konfiguration
-            from .models import PLCConfiguration
-            config = PLCConfiguration.get_config()
-            self.base_url = f"https://{config.default_plc_address}/api/jsonrpc"
-            self.username = config.default_username
-            self.password = config.default_password
-    
-    def __del__(self):
-        """Cleanup: Stop Keep-Alive Thread"""
-        self.stop_keepalive()
+            return (
+                control_unit.get_api_url(),
+                control_unit.plc_username or 'sash',
+                control_unit.plc_password or 'Janus72728'
+            )
+        # Fallback auf globale Konfiguration
+        from .models import PLCConfiguration
+        config = PLCConfiguration.get_config()
+        return (
+            f"https://{config.default_plc_address}/api/jsonrpc",
+            config.default_username,
+            config.default_password
+        )
+    
+    @property
+    def config_key(self):
+        return (self.base_url, self.username, self.password)
     
     def _get_next_id(self) -> int:
         """Gibt die nächste Request-ID zurück"""
-        current_id = self.request_id
-        self.request_id += 1
-        return current_id
+        with self._lock:
+            current_id = self.request_id
+            self.request_id += 1
+            return current_id
     
     def _make_request(self, method: str, params: Dict[str, Any] = None, use_auth: bool = True) -> Dict[str, Any]:
         """Führt einen JSON-RPC Request aus"""
@@ -69,182 +285,152 @@ class PLCJSONRPCInterface:
         }
         
         # Auth-Token hinzufügen wenn verfügbar
-        if use_auth and self.control_unit and self.control_unit.plc_auth_token:
-            headers["X-Auth-Token"] = self.control_unit.plc_auth_token
+        token = self.token if use_auth else None
+        if token:
+            headers["X-Auth-Token"] = token
         
-        try:
-            logger.debug(f"Request an {self.base_url}: {json.dumps(payload, indent=2)}")
-            
-            response = self.session.post(
-                self.base_url,
-                json=payload,
-                headers=headers,
-                timeout=10
-            )
-            
-            logger.debug(f"Response Status: {response.status_code}")
-            
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if "error" in result:
-                logger.error(f"JSON-RPC Error: {result['error']}")
-                # Bei Authentication-Fehler Token löschen
-                if result['error'].get('code') == -32604:  # Unauthorized
-                    self._clear_token()
-                raise Exception(f"PLC Error: {result['error'].get('message', 'Unknown error')}")
-            
-            return result.get("result", {})
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed: {e}")
-            raise Exception(f"Kommunikationsfehler mit SPS: {str(e)}")
+        with self._lock:
+            started = time.monotonic()
+            self.requests_total += 1
+            try:
+                logger.debug(f"Request an {self.base_url}: {json.dumps(payload, indent=2)}")
+                
+                response = self.session.post(
+                    self.base_url,
+                    json=payload,
+                    headers=headers,
+                    timeout=10
+                )
+                
+                logger.debug(f"Response Status: {response.status_code}")
+                
+                response.raise_for_status()
+                
+                result = response.json()
+                
+            except requests.exceptions.RequestException as e:
+                self.errors_total += 1
+                if isinstance(e, requests.exceptions.ConnectionError):
+                    # Verbindung verworfen: beim nächsten Aufruf neu aufbauen
+                    self.session.close()
+                    self.reconnects_total += 1
+                logger.error(f"Request failed: {e}")
+                raise Exception(f"Kommunikationsfehler mit SPS: {str(e)}")
+            finally:
+                self.last_latency = time.monotonic() - started
+                self.latency_total += self.last_latency
+                self.last_used = time.monotonic()
+        
+        if "error" in result:
+            self.errors_total += 1
+            logger.error(f"JSON-RPC Error: {result['error']}")
+            # Bei Authentication-Fehler Token löschen
+            if result['error'].get('code') == PLC_UNAUTHORIZED:
+                self._clear_token(token)
+            raise Exception(f"PLC Error: {result['error'].get('message', 'Unknown error')}")
+        
+        return result.get("result", {})
     
-    def _clear_token(self):
-        """Löscht den gespeicherten Token"""
-        if self.control_unit:
-            self.control_unit.plc_auth_token = None
-            self.control_unit.plc_token_expires = None
-            self.control_unit.save(update_fields=['plc_auth_token', 'plc_token_expires'])
-            self.stop_keepalive()
+    def _clear_token(self, token):
+        """Verwirft den abgelehnten Token (nur im Speicher; ein neuerer bleibt erhalten)"""
+        if token:
+            token_store.invalidate(self.token_key, token)
     
-    def authenticate(self) -> str:
-        """Authentifiziert bei der SPS und gibt den Token zurück"""
-        # Stoppe alten Keep-Alive falls vorhanden
-        self.stop_keepalive()
-        
+    def _login(self):
+        """Api.Login ausführen, gibt (Token, Ablauf) zurück"""
         params = {
             "user": self.username,
             "password": self.password
         }
         
-        try:
-            logger.info(f"Authentifiziere bei {self.base_url} mit Benutzer: {self.username}")
-            result = self._make_request("Api.Login", params, use_auth=False)
-            
-            logger.debug(f"Auth Response: {result}")
-            
-            if "token" in result:
-                token = result["token"]
-                
-                # runtime_timeout kann String, Int oder ISO 8601 Duration sein
-                runtime_timeout_raw = result.get("runtime_timeout", "PT30M")
+        with self._lock:
+            try:
+                logger.info(f"Authentifiziere bei {self.base_url} mit Benutzer: {self.username}")
+                result = self._make_request("Api.Login", params, use_auth=False)
                 
-                # ISO 8601 Duration Format behandeln (z.B. "PT30M" = 30 Minuten)
-                if isinstance(runtime_timeout_raw, str) and runtime_timeout_raw.startswith("PT"):
-                    match = re.match(r'PT(\d+)([HM])', runtime_timeout_raw)
-                    if match:
-                        value = int(match.group(1))
-                        unit = match.group(2)
-                        if unit == 'H':
-                            runtime_timeout = value * 60  # Stunden zu Minuten
-                        else:  # 'M'
-                            runtime_timeout = value
-                        logger.debug(f"Parsed ISO 8601 duration {runtime_timeout_raw} als {runtime_timeout} Minuten")
-                    else:
-                        logger.warning(f"Konnte ISO 8601 duration nicht parsen: {runtime_timeout_raw}, verwende Standard 30")
-                        runtime_timeout = 30
-                else:
-                    # Normale String/Int Konvertierung
-                    try:
-                        runtime_timeout = int(runtime_timeout_raw)
-                    except (ValueError, TypeError):
-                        logger.warning(f"Konnte runtime_timeout nicht parsen: {runtime_timeout_raw}, verwende Standard 30")
-                        runtime_timeout = 30
+                logger.debug(f"Auth Response: {result}")
                 
-                # Token in Control Unit speichern
-                if self.control_unit:
-                    self.control_unit.plc_auth_token = token
+                if "token" in result:
+                    runtime_timeout = parse_runtime_timeout(result.get("runtime_timeout", "PT30M"))
+                    if self.logins_total:
+                        self.reconnects_total += 1
+                    self.logins_total += 1
+                    
                     # Token-Ablauf ist runtime_timeout, aber Session läuft nach 2 Min Inaktivität ab!
-                    self.control_unit.plc_token_expires = timezone.now() + timedelta(minutes=runtime_timeout)
-                    self.control_unit.save(update_fields=['plc_auth_token', 'plc_token_expires'])
-                
-                logger.info(f"Erfolgreich authentifiziert. Token gültig für {runtime_timeout} Minuten")
-                
-                # Starte Keep-Alive Thread (Ping alle 90 Sekunden)
-                self.start_keepalive()
-                
-                return token
-            else:
-                raise Exception("Keine Token-Antwort von SPS")
-                
-        except Exception as e:
-            logger.error(f"Authentifizierung fehlgeschlagen: {e}")
-            raise
+                    # Das verhindert der gemeinsame Keep-Alive (plc_pool).
+                    logger.info(f"Erfolgreich authentifiziert. Token gültig für {runtime_timeout} Minuten")
+                    return result["token"], timezone.now() + timedelta(minutes=runtime_timeout)
+                else:
+                    raise Exception("Keine Token-Antwort von SPS")
+                    
+            except Exception as e:
+                logger.error(f"Authentifizierung fehlgeschlagen: {e}")
+                raise
+    
+    def authenticate(self, stale=None) -> str:
+        """
+        Gibt einen gültigen Token zurück; angemeldet wird nur, wenn keiner
+        vorliegt oder die SPS den Token stale abgelehnt hat.
+        """
+        return token_store.refresh(self.token_key, self._login, self.control_unit, stale=stale)
     
     def start_keepalive(self):
-        """Startet den Keep-Alive Thread für die Session"""
-        if not self.control_unit or not self.control_unit.plc_auth_token:
-            return
-        
-        # Stoppe existierenden Thread falls vorhanden
-        self.stop_keepalive()
-        
-        # Erstelle neuen Thread
-        self._keepalive_stop.clear()
-        thread = threading.Thread(target=self._keepalive_worker, daemon=True)
-        thread.start()
-        
-        # Speichere Thread-Referenz
-        if self.control_unit:
-            PLCJSONRPCInterface._keepalive_threads[self.control_unit.id] = (thread, self._keepalive_stop)
-        
-        logger.info("Keep-Alive Thread gestartet")
+        """Keep-Alive übernimmt der gemeinsame Scheduler des Pools"""
+        plc_pool.keepalive.ensure_running()
     
     def stop_keepalive(self):
-        """Stoppt den Keep-Alive Thread"""
-        if self.control_unit and self.control_unit.id in PLCJSONRPCInterface._keepalive_threads:
-            thread, stop_event = PLCJSONRPCInterface._keepalive_threads[self.control_unit.id]
-            stop_event.set()
-            thread.join(timeout=2)
-            del PLCJSONRPCInterface._keepalive_threads[self.control_unit.id]
-            logger.info("Keep-Alive Thread gestoppt")
-        else:
-            self._keepalive_stop.set()
-    
-    def _keepalive_worker(self):
-        """Worker-Thread der regelmäßig Pings sendet"""
-        logger.info("Keep-Alive Worker gestartet")
-        
-        while not self._keepalive_stop.wait(90):  # Alle 90 Sekunden
+        """Kein eigener Thread mehr vorhanden"""
+        pass
+    
+    def ping(self):
+        """Hält die Session der SPS aktiv; bei Fehler einmal neu anmelden"""
+        # Ohne Client-Sperre: authenticate() nimmt erst die Sperre der Einheit
+        token = self.token
+        if not token:
+            return False
+        try:
+            self._make_request("Api.Ping")
+            return True
+        except Exception as e:
+            logger.error(f"Keep-Alive Ping fehlgeschlagen: {e}")
             try:
-                # Prüfe ob Token noch gültig
-                if not self.control_unit or not self.control_unit.plc_auth_token:
-                    logger.info("Kein Token vorhanden, beende Keep-Alive")
-                    break
-                
-                # Sende Ping
-                logger.debug("Sende Keep-Alive Ping")
-                self._make_request("Api.Ping")
-                logger.debug("Keep-Alive Ping erfolgreich")
-                
-            except Exception as e:
-                logger.error(f"Keep-Alive Ping fehlgeschlagen: {e}")
-                # Bei Fehler neu authentifizieren
-                try:
-                    self.authenticate()
-                except:
-                    logger.error("Re-Authentifizierung fehlgeschlagen, beende Keep-Alive")
-                    break
-        
-        logger.info("Keep-Alive Worker beendet")
+                self.authenticate(stale=token)
+                return True
+            except Exception:
+                logger.error("Re-Authentifizierung fehlgeschlagen")
+                return False
     
     def ensure_authenticated(self):
         """Stellt sicher, dass ein gültiger Token vorhanden ist"""
         if not self.control_unit:
             return
         
-        # Prüfen ob Token vorhanden und gültig
-        if (not self.control_unit.plc_auth_token or 
-            not self.control_unit.plc_token_expires or
-            self.control_unit.plc_token_expires <= timezone.now()):
+        # Token im Speicher prüfen; angemeldet wird einmal pro Ablauffenster
+        if not self.token:
             logger.info("Token abgelaufen oder nicht vorhanden. Neue Authentifizierung...")
             self.authenticate()
+        self.start_keepalive()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'base_url': self.base_url,
+            'authenticated': bool(self.token),
+            'token_expires': self.token_expires,
+            'requests': self.requests_total,
+            'errors': self.errors_total,
+            'logins': self.logins_total,
+            'reconnects': self.reconnects_total,
+            'avg_latency_ms': round(self.latency_total / self.requests_total * 1000, 1) if self.requests_total else None,
+            'last_latency_ms': round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+        }
+    
+    def close(self):
+        self.session.close()
     
     def write_output(self, var_name: str, value: Union[bool, int, float]) -> bool:
         """Schreibt einen Wert auf einen Ausgang"""
         self.ensure_authenticated()
+        token = self.token
         
         params = {
             "var": var_name,
@@ -265,7 +451,7 @@ class PLCJSONRPCInterface:
             # Bei Auth-Fehler neu versuchen
             if "unauthorized" in str(e).lower():
                 logger.info("Authentifizierung abgelaufen, versuche erneut...")
-                self.authenticate()
+                self.authenticate(stale=token)
                 # Zweiter Versuch
                 try:
                     result = self._make_request("PlcProgram.Write", params)
@@ -291,6 +477,85 @@ class PLCJSONRPCInterface:
             logger.error(f"Fehler beim Lesen von {address}: {e}")
             return None
     
+    def _make_batch_request(self, calls: list) -> list:
+        """
+        Sendet mehrere JSON-RPC-Aufrufe als ein Batch-Array. Gibt je Aufruf
+        (in Eingabereihenfolge) {'result': ...} oder {'error': {...}} zurück.
+        """
+        payload = []
+        for method, params in calls:
+            item = {"jsonrpc": "2.0", "id": self._get_next_id(), "method": method}
+            if params:
+                item["params"] = params
+            payload.append(item)
+        
+        headers = {"Content-Type": "application/json"}
+        token = self.token
+        if token:
+            headers["X-Auth-Token"] = token
+        
+        with self._lock:
+            started = time.monotonic()
+            self.requests_total += 1
+            try:
+                response = self.session.post(self.base_url, json=payload, headers=headers, timeout=10)
+                response.raise_for_status()
+                answers = response.json()
+            except requests.exceptions.RequestException as e:
+                self.errors_total += 1
+                if isinstance(e, requests.exceptions.ConnectionError):
+                    self.session.close()
+                    self.reconnects_total += 1
+                logger.error(f"Batch-Request failed: {e}")
+                raise Exception(f"Kommunikationsfehler mit SPS: {str(e)}")
+            finally:
+                self.last_latency = time.monotonic() - started
+                self.latency_total += self.last_latency
+                self.last_used = time.monotonic()
+        
+        # Ein einzelnes Fehlerobjekt statt eines Arrays betrifft den ganzen Batch
+        if isinstance(answers, dict):
+            return [answers] * len(payload)
+        by_id = {answer.get("id"): answer for answer in answers if isinstance(answer, dict)}
+        missing = {"error": {"code": None, "message": "Keine Antwort für diesen Aufruf"}}
+        return [by_id.get(item["id"], missing) for item in payload]
+    
+    def write_many(self, writes: list, batch_size: int = None) -> list:
+        """
+        Schreibt viele Variablen mit PlcProgram.Write in JSON-RPC-Batches
+        (PLC_BATCH_SIZE Aufrufe pro Anfrage). Gibt je Schreibvorgang
+        {'var', 'value', 'success', 'error'} zurück.
+        """
+        batch_size = batch_size or getattr(settings, 'PLC_BATCH_SIZE', 50)
+        self.ensure_authenticated()
+        
+        results = []
+        for offset in range(0, len(writes), batch_size):
+            chunk = writes[offset:offset + batch_size]
+            calls = [("PlcProgram.Write", {"var": var, "value": value}) for var, value in chunk]
+            logger.info(f"Schreibe {len(chunk)} Variablen in einem Batch")
+            token = self.token or self.authenticate()
+            answers = self._make_batch_request(calls)
+            
+            # Token abgelaufen: einmal neu anmelden und den Batch wiederholen
+            if any((answer.get("error") or {}).get("code") == PLC_UNAUTHORIZED for answer in answers):
+                logger.info("Authentifizierung abgelaufen, wiederhole Batch...")
+                self._clear_token(token)
+                self.authenticate(stale=token)
+                answers = self._make_batch_request(calls)
+            
+            for (var, value), answer in zip(chunk, answers):
+                error = answer.get("error")
+                if error:
+                    self.errors_total += 1
+                results.append({
+                    'var': var,
+                    'value': value,
+                    'success': not error,
+                    'error': f"{error.get('code')}: {error.get('message')}" if error else None,
+                })
+        return results
+    
     def set_led_status(self, status: bool) -> bool:
         """Setzt den LED Start/Stopp Status"""
         return self.write_output('"DB_Control".api_output', status)
@@ -311,6 +576,14 @@ class PLCJSONRPCInterface:
                 return result
         return None
     
+    def read_status(self) -> Dict[str, Any]:
+        """Liest den aktuellen Zustand für den Status-Poller (Exception, wenn die SPS nicht antwortet)"""
+        self.ensure_authenticated()
+        output = self.get_output_q0_status()
+        if output is None:
+            raise Exception("Keine Antwort von SPS")
+        return {'led_status': bool(output), 'output_q0_status': bool(output)}
+    
     def send_command(self, command) -> bool:
         """Sendet einen Befehl an die SPS"""
         try:
@@ -323,9 +596,9 @@ class PLCJSONRPCInterface:
                 success = self.set_led_status(payload.get('status', False))
             elif command_type == 'set_output':
                 success = self.set_output_q0(payload.get('status', False))
-            elif command_type == 'update_config':
-                # Konfiguration an SPS senden
-                success = self._send_config_update(control_unit, payload)
+            elif command_type in ('update_config', 'save_config'):
+                # Konfiguration in einem Batch an SPS senden, Einzelergebnisse am Befehl
+                success = self._send_config_update(control_unit, payload, command)
             else:
                 logger.warning(f"Unbekannter Command-Type: {command_type}")
                 success = False
@@ -348,21 +621,31 @@ class PLCJSONRPCInterface:
             command.save()
             return False
     
-    def _send_config_update(self, control_unit, config_data) -> bool:
-        """Sendet eine Konfigurationsaktualisierung an die SPS"""
-        try:
-            # Beispiel: Schreibe verschiedene Parameter
-            if 'target_temperature' in config_data:
-                self.write_output('"DB_Control".target_temp', config_data['target_temperature'])
-            
-            if 'humidity_setpoint' in config_data:
-                self.write_output('"DB_Control".humidity_sp', config_data['humidity_setpoint'])
-            
+    def _send_config_update(self, control_unit, config_data, command=None) -> bool:
+        """Sendet eine Konfigurationsaktualisierung (Parameter, Zeitpläne) an die SPS"""
+        writes = build_config_writes(config_data)
+        if not writes:
             return True
-            
+        
+        try:
+            results = self.write_many(writes)
         except Exception as e:
             logger.error(f"Config-Update fehlgeschlagen: {e}")
+            if command is not None:
+                command.error_message = str(e)
             return False
+        
+        failed = [result for result in results if not result['success']]
+        if command is not None:
+            command.plc_response = {
+                'written': len(results) - len(failed),
+                'failed': len(failed),
+                'results': results,
+            }
+            command.error_message = "; ".join(f"{item['var']}: {item['error']}" for item in failed) or None
+        if failed:
+            logger.error(f"Config-Update: {len(failed)} von {len(results)} Variablen fehlgeschlagen")
+        return not failed
     
     def _sync_status(self, control_unit):
         """Synchronisiert den Status mit der SPS"""
@@ -390,14 +673,134 @@ class PLCJSONRPCInterface:
                 control_unit.current_status.save()
 
 
+class KeepaliveScheduler:
+    """
+    Ein gemeinsamer Thread für alle SPS-Verbindungen des Prozesses: pingt
+    jeden Client, der länger als interval Sekunden keine Anfrage gesendet
+    hat (die SPS beendet Sessions nach 2 Minuten Inaktivität).
+    """
+    
+    def __init__(self, pool, interval=90, tick=10):
+        self.pool = pool
+        self.interval = interval
+        self.tick = tick
+        self.pings_total = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True, name="plc-keepalive")
+                self._thread.start()
+                logger.info("Keep-Alive Scheduler gestartet")
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+    
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+    
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            for client in self.pool.clients():
+                if not client.token or time.monotonic() - client.last_used < self.interval:
+                    continue
+                logger.debug(f"Sende Keep-Alive Ping an {client.base_url}")
+                client.ping()
+                self.pings_total += 1
+        logger.info("Keep-Alive Scheduler beendet")
+
+
+class PLCClientPool:
+    """
+    Ein langlebiger PLCJSONRPCInterface-Client je Steuerungseinheit.
+    Ändern sich Adresse oder Zugangsdaten der Einheit, wird der Client ersetzt.
+    """
+    
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.replaced = 0
+        self.keepalive = KeepaliveScheduler(
+            self,
+            interval=getattr(settings, 'PLC_KEEPALIVE_SECONDS', 90)
+        )
+    
+    def get(self, control_unit=None) -> PLCJSONRPCInterface:
+        key = control_unit.pk if control_unit else 'default'
+        candidate = None
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                if client.config_key == PLCJSONRPCInterface.connection_config(control_unit):
+                    self.hits += 1
+                    if control_unit is not None:
+                        client.control_unit = control_unit
+                    return client
+                candidate = client
+                self.replaced += 1
+            else:
+                self.misses += 1
+            
+            new_client = PLCJSONRPCInterface(control_unit)
+            if candidate is not None:
+                # Gespeicherter Token gehört zu den alten Zugangsdaten
+                token_store.invalidate(candidate.token_key)
+                token_store.invalidate(new_client.token_key)
+                candidate.close()
+            self._clients[key] = new_client
+            return new_client
+    
+    def clients(self):
+        with self._lock:
+            return list(self._clients.values())
+    
+    def discard(self, control_unit):
+        with self._lock:
+            client = self._clients.pop(control_unit.pk, None)
+        if client:
+            client.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = dict(self._clients)
+        return {
+            'clients': len(clients),
+            'hits': self.hits,
+            'misses': self.misses,
+            'replaced': self.replaced,
+            'keepalive_running': self.keepalive.running,
+            'keepalive_pings': self.keepalive.pings_total,
+            'token_store': token_store.stats(),
+            'units': {str(key): client.stats() for key, client in clients.items()},
+        }
+    
+    def close(self):
+        self.keepalive.stop()
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+plc_pool = PLCClientPool()
+
+
 # Cleanup-Funktion für Server-Shutdown
 def cleanup_keepalive_threads():
-    """Stoppt alle Keep-Alive Threads beim Server-Shutdown"""
-    logger.info(f"Stoppe {len(PLCJSONRPCInterface._keepalive_threads)} Keep-Alive Threads")
-    for unit_id, (thread, stop_event) in list(PLCJSONRPCInterface._keepalive_threads.items()):
-        stop_event.set()
-        thread.join(timeout=2)
-    PLCJSONRPCInterface._keepalive_threads.clear()
+    """Stoppt den Keep-Alive Scheduler und schließt alle SPS-Verbindungen"""
+    logger.info(f"Stoppe Keep-Alive und {len(plc_pool.clients())} SPS-Verbindungen")
+    plc_pool.close()
 
 
 # Mock Interface bleibt unverändert
@@ -466,6 +869,26 @@ class MockPLCInterface:
         """Mock: Q0-Status lesen"""
         return self._mock_states['output_q0']
     
+    def read_status(self) -> Dict[str, Any]:
+        """Mock: Zustand mit leicht schwankenden Messwerten"""
+        self._mock_states['temperature'] += random.uniform(-0.2, 0.2)
+        self._mock_states['humidity'] = min(max(self._mock_states['humidity'] + random.uniform(-0.5, 0.5), 30), 90)
+        return {
+            'led_status': self._mock_states['led_status'],
+            'output_q0_status': self._mock_states['output_q0'],
+            'current_value': round(self._mock_states['temperature'], 1),
+            'secondary_value': round(self._mock_states['humidity'], 1),
+            'measurements': {
+                'temperature': round(self._mock_states['temperature'], 1),
+                'humidity': round(self._mock_states['humidity'], 1),
+            },
+        }
+    
+    def write_many(self, writes: list, batch_size: int = None) -> list:
+        """Mock: Batch-Schreiben"""
+        logger.info(f"Mock: {len(writes)} Variablen geschrieben")
+        return [{'var': var, 'value': value, 'success': True, 'error': None} for var, value in writes]
+    
     def send_command(self, command) -> bool:
         """Mock: Befehl senden"""
         logger.info(f"Mock: Befehl {command.command_type} empfangen")
@@ -483,4 +906,5 @@ def get_plc_interface(control_unit=None) -> Union[PLCJSONRPCInterface, MockPLCIn
     if use_mock:
         return MockPLCInterface(control_unit)
     else:
-        return PLCJSONRPCInterface(control_unit)
\ No newline at end of file
+        # Gemeinsamer Client pro Steuerungseinheit (Session, Token, Keep-Alive)
+        return plc_pool.get(control_unit)
\ No newline at end of file
@@ -0,0 +1,235 @@
+# backend/controller/plc_simulator.py
+"""
+Lokaler Simulator der S7-1200 Web API (JSON-RPC) zum Testen und Messen
+von PLCJSONRPCInterface ohne echte SPS.
+
+    python -m controller.plc_simulator --port 8780 --count 4 --latency-ms 20 --error-rate 0.01
+
+Unterstützt die Methoden, die plc_interface verwendet: Api.Login, Api.Ping,
+PlcProgram.Write und PlcProgram.Read, einzeln oder als Batch-Array.
+Einstellbar sind Antwortzeit (latency/jitter pro HTTP-Anfrage), eine
+Fehlerquote je Aufruf, die Gültigkeit eines Tokens (token_lifetime) und
+das Sitzungsende nach Inaktivität (idle_timeout, bei der SPS 2 Minuten).
+Mit --count N laufen N Simulatoren auf aufeinanderfolgenden Ports.
+"""
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PATH = "/api/jsonrpc"
+
+# Fehlercodes wie von der SPS (UNAUTHORIZED entspricht PLC_UNAUTHORIZED)
+UNAUTHORIZED = -32604
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+ADDRESS_NOT_FOUND = 2104
+
+# PlcProgram.Read mit numerischer ID (siehe get_output_q0_status)
+READ_IDS = {209: '"DB_Control".api_output'}
+
+
+class PLCSimulator(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0,
+                 token_lifetime=30 * 60, idle_timeout=120, username=None, password=None):
+        super().__init__(address, PLCSimulatorHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_lifetime = token_lifetime
+        self.idle_timeout = idle_timeout
+        self.username = username
+        self.password = password
+        self.variables = {'"DB_Control".api_output': False}
+        self.sessions = {}  # Token → (Ablauf, letzte Aktivität)
+        self.counters = {
+            'requests': 0, 'calls': 0, 'batches': 0, 'logins': 0, 'pings': 0,
+            'writes': 0, 'reads': 0, 'errors': 0, 'unauthorized': 0,
+        }
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Startet den Server in einem Hintergrund-Thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, 'max_concurrent': self.max_active, 'sessions': len(self.sessions)}
+
+    def _session_valid(self, token, now):
+        session = self.sessions.get(token)
+        if session is None:
+            return False
+        expires, last_seen = session
+        if now >= expires or (self.idle_timeout and now - last_seen > self.idle_timeout):
+            del self.sessions[token]
+            return False
+        self.sessions[token] = (expires, now)
+        return True
+
+    def call(self, method, params, token):
+        """Führt einen Aufruf aus und gibt (result, error) zurück"""
+        now = time.monotonic()
+        params = params or {}
+        with self.lock:
+            self.counters['calls'] += 1
+
+            if method == "Api.Login":
+                if not params.get("user") or (
+                    self.username and (params.get("user"), params.get("password")) != (self.username, self.password)
+                ):
+                    self.counters['errors'] += 1
+                    return None, {"code": UNAUTHORIZED, "message": "Login failed"}
+                new_token = secrets.token_hex(12)
+                self.sessions[new_token] = (now + self.token_lifetime, now)
+                self.counters['logins'] += 1
+                minutes = max(int(self.token_lifetime // 60), 1)
+                return {"token": new_token, "runtime_timeout": f"PT{minutes}M"}, None
+
+            if not self._session_valid(token, now):
+                self.counters['unauthorized'] += 1
+                return None, {"code": UNAUTHORIZED, "message": "Unauthorized"}
+
+            if self.error_rate and random.random() < self.error_rate:
+                self.counters['errors'] += 1
+                return None, {"code": INTERNAL_ERROR, "message": "Simulated error"}
+
+            if method == "Api.Ping":
+                self.counters['pings'] += 1
+                return secrets.token_hex(4), None
+
+            if method == "PlcProgram.Write":
+                self.counters['writes'] += 1
+                self.variables[params.get("var")] = params.get("value")
+                return True, None
+
+            if method == "PlcProgram.Read":
+                self.counters['reads'] += 1
+                var = READ_IDS.get(params["id"]) if "id" in params else params.get("var")
+                if var not in self.variables:
+                    self.counters['errors'] += 1
+                    return None, {"code": ADDRESS_NOT_FOUND, "message": "Address does not exist"}
+                return self.variables[var], None
+
+            self.counters['errors'] += 1
+            return None, {"code": METHOD_NOT_FOUND, "message": "Method not found"}
+
+
+class PLCSimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.path != API_PATH:
+            return self._send_json(404, {"error": "not found"})
+
+        with server.lock:
+            server.counters['requests'] += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if server.latency or server.jitter:
+                time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0))
+
+            try:
+                body = json.loads(raw or b"null")
+            except ValueError:
+                return self._send_json(200, {"jsonrpc": "2.0", "id": None,
+                                             "error": {"code": -32700, "message": "Parse error"}})
+
+            calls = body if isinstance(body, list) else [body]
+            if isinstance(body, list):
+                with server.lock:
+                    server.counters['batches'] += 1
+
+            token = self.headers.get("X-Auth-Token")
+            answers = []
+            for call in calls:
+                result, error = server.call(call.get("method"), call.get("params"), token)
+                answer = {"jsonrpc": "2.0", "id": call.get("id")}
+                if error:
+                    answer["error"] = error
+                else:
+                    answer["result"] = result
+                answers.append(answer)
+
+            self._send_json(200, answers if isinstance(body, list) else answers[0])
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+def start_simulators(count, host="127.0.0.1", port=0, **options):
+    """Startet count Simulatoren (port=0: freie Ports) und gibt sie zurück"""
+    simulators = []
+    for index in range(count):
+        simulator = PLCSimulator((host, port + index if port else 0), **options)
+        simulator.start()
+        simulators.append(simulator)
+    return simulators
+
+
+def main():
+    parser = argparse.ArgumentParser(description="S7-1200 Web API Simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--count", type=int, default=1, help="Anzahl Simulatoren (aufeinanderfolgende Ports)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlschlagender Aufrufe (0..1)")
+    parser.add_argument("--token-lifetime", type=int, default=30 * 60, help="Gültigkeit eines Tokens in Sekunden")
+    parser.add_argument("--idle-timeout", type=int, default=120, help="Sitzungsende nach Inaktivität (0 = aus)")
+    parser.add_argument("--user", default=None, help="Nur diesen Benutzer akzeptieren")
+    parser.add_argument("--password", default=None)
+    args = parser.parse_args()
+
+    simulators = start_simulators(
+        args.count, args.host, args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, error_rate=args.error_rate,
+        token_lifetime=args.token_lifetime, idle_timeout=args.idle_timeout,
+        username=args.user, password=args.password
+    )
+    for simulator in simulators:
+        print(f"🧪 SPS-Simulator läuft auf {simulator.url} (plc_address für die Steuerungseinheit)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for simulator in simulators:
+            simulator.stop()
+        print("\n🛑 SPS-Simulator beendet.")
+
+
+if __name__ == "__main__":
+    main()
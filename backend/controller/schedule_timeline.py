@@ -0,0 +1,248 @@
+# backend/controller/schedule_timeline.py
+"""
+Vorkompilierte Wochen-Zeitachse der Zeitpläne (ControlSchedule) je Einheit.
+
+Alle aktiven Zeitpläne einer Einheit werden einmal in eine sortierte Liste
+überschneidungsfreier Abschnitte in Sekunden ab Montag 00:00 übersetzt und
+im Cache abgelegt. Aktueller und nächster Sollwert ergeben sich dann über
+eine binäre Suche statt über einen Durchlauf aller Zeitpläne.
+
+- Endet ein Zeitplan vor oder zu seiner Startzeit, läuft er über
+  Mitternacht in den Folgetag (z.B. 18:00–06:00); Sonntag läuft in Montag.
+- Überschneiden sich Zeitpläne, gilt der zuletzt begonnene. Die
+  Überschneidungen werden mitgeliefert (find_overlaps).
+- Der Cache-Schlüssel enthält die Version der Zeitpläne aus der
+  Datenbank (Anzahl und jüngstes updated_at). Jede Änderung ergibt damit
+  in allen Prozessen einen neuen Schlüssel, auch wenn jeder seinen
+  eigenen Cache (LocMemCache) hat; Massenänderungen setzen updated_at
+  selbst, da bulk_update es nicht pflegt.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import ControlSchedule
+
+DAY_SECONDS = 24 * 60 * 60
+WEEK_SECONDS = 7 * DAY_SECONDS
+CACHE_SECONDS = 60 * 60
+CACHE_KEY = "controller:timeline:{}:{}:{}"
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: int  # Sekunden ab Montag 00:00
+    end: int
+    schedule_id: int
+    target_value: float
+    secondary_value: float = None
+    parameters: dict = field(default=None, compare=False)
+
+    def as_dict(self):
+        return {
+            'schedule_id': self.schedule_id,
+            'target_value': self.target_value,
+            'secondary_value': self.secondary_value,
+            'parameters': self.parameters or {},
+        }
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def week_seconds(moment):
+    """Position eines Zeitpunkts in der Woche (lokale Zeit)"""
+    local = timezone.localtime(moment)
+    return local.weekday() * DAY_SECONDS + _seconds(local)
+
+
+def describe(seconds):
+    """Wochensekunden als {'weekday', 'time'} für Ausgaben"""
+    seconds %= WEEK_SECONDS
+    weekday, rest = divmod(seconds, DAY_SECONDS)
+    return {'weekday': weekday, 'time': f"{rest // 3600:02d}:{rest % 3600 // 60:02d}"}
+
+
+def _value(schedule, name):
+    return schedule[name] if isinstance(schedule, dict) else getattr(schedule, name)
+
+
+def schedule_intervals(schedule):
+    """
+    Wochenintervalle (start, ende, begonnen) eines Zeitplans; zwei
+    Intervalle, wenn er über das Wochenende hinaus läuft. Akzeptiert
+    Modellinstanzen und Dicts mit weekday, start_time, end_time.
+    """
+    start = _value(schedule, 'weekday') * DAY_SECONDS + _seconds(_value(schedule, 'start_time'))
+    duration = (_seconds(_value(schedule, 'end_time')) - _seconds(_value(schedule, 'start_time'))) % DAY_SECONDS
+    end = start + (duration or DAY_SECONDS)
+    if end <= WEEK_SECONDS:
+        return [(start, end, start)]
+    return [(start, WEEK_SECONDS, start), (0, end - WEEK_SECONDS, start)]
+
+
+def find_overlaps(schedules):
+    """
+    Überschneidungen zwischen Zeitplänen als Liste von Dicts mit den
+    beiden Zeitplänen (Index in schedules bzw. 'id', falls vorhanden) und
+    dem gemeinsamen Zeitraum.
+    """
+    intervals = sorted(
+        (start, end, index)
+        for index, schedule in enumerate(schedules)
+        for start, end, _ in schedule_intervals(schedule)
+    )
+    overlaps = []
+    for position, (start, end, index) in enumerate(intervals):
+        for other_start, other_end, other in intervals[position + 1:]:
+            if other_start >= end:
+                break
+            if other != index:
+                overlaps.append((index, other, other_start, min(end, other_end)))
+
+    def key(index):
+        schedule = schedules[index]
+        return schedule.get('id', index) if isinstance(schedule, dict) else schedule.pk
+
+    return [
+        {'schedules': [key(a), key(b)], 'start': describe(start), 'end': describe(end)}
+        for a, b, start, end in overlaps
+    ]
+
+
+class Timeline:
+    """Überschneidungsfreie, sortierte Abschnitte einer Woche"""
+
+    def __init__(self, segments, overlaps=()):
+        self.segments = list(segments)
+        self.overlaps = list(overlaps)
+        self.starts = [segment.start for segment in self.segments]
+
+    @classmethod
+    def compile(cls, schedules):
+        schedules = list(schedules)
+        pieces = [
+            (start, end, begun, schedule)
+            for schedule in schedules
+            for start, end, begun in schedule_intervals(schedule)
+        ]
+        bounds = sorted({0, WEEK_SECONDS} | {p[0] for p in pieces} | {p[1] for p in pieces})
+
+        segments = []
+        for low, high in zip(bounds, bounds[1:]):
+            active = [(begun, schedule) for start, end, begun, schedule in pieces if start <= low < end]
+            if not active:
+                continue
+            # Der zuletzt begonnene Zeitplan gilt
+            _, schedule = min(active, key=lambda item: ((low - item[0]) % WEEK_SECONDS, -item[1].pk))
+            previous = segments[-1] if segments else None
+            if previous and previous.end == low and previous.schedule_id == schedule.pk:
+                segments[-1] = Segment(previous.start, high, schedule.pk, previous.target_value,
+                                       previous.secondary_value, previous.parameters)
+            else:
+                segments.append(Segment(low, high, schedule.pk, schedule.target_value,
+                                        schedule.secondary_value, schedule.parameters))
+        return cls(segments, find_overlaps(schedules))
+
+    def at(self, seconds):
+        """Abschnitt, der zu den Wochensekunden gilt, oder None"""
+        index = bisect_right(self.starts, seconds % WEEK_SECONDS) - 1
+        if index >= 0 and self.segments[index].end > seconds % WEEK_SECONDS:
+            return self.segments[index]
+        return None
+
+    def next_change(self, seconds):
+        """(Sekunden bis zum nächsten Wechsel, danach gültiger Abschnitt) oder None"""
+        if not self.segments:
+            return None
+        seconds %= WEEK_SECONDS
+        current = self.at(seconds)
+        if current:
+            boundary = current.end
+        else:
+            index = bisect_right(self.starts, seconds)
+            boundary = self.starts[index] if index < len(self.starts) else self.starts[0] + WEEK_SECONDS
+
+        following = self.at(boundary)
+        if current and following and following.schedule_id == current.schedule_id:
+            # Wochenübergang desselben Zeitplans ist kein Wechsel
+            if len(self.segments) == 1:
+                return None
+            boundary, following = following.end, self.at(following.end)
+            boundary += WEEK_SECONDS if boundary <= seconds else 0
+        return boundary - seconds, following
+
+    def day(self, weekday):
+        """Abschnitte eines Wochentags, auf den Tag zugeschnitten (Sekunden ab 00:00)"""
+        low, high = weekday * DAY_SECONDS, (weekday + 1) * DAY_SECONDS
+        index = max(bisect_right(self.starts, low) - 1, 0)
+        result = []
+        for segment in self.segments[index:]:
+            if segment.start >= high:
+                break
+            if segment.end > low:
+                result.append((max(segment.start, low) - low, min(segment.end, high) - low, segment))
+        return result
+
+
+def get_timeline(control_unit_id):
+    """Kompilierte Zeitachse einer Einheit (aus dem Cache der aktuellen Zeitplan-Version)"""
+    schedules = ControlSchedule.objects.filter(control_unit_id=control_unit_id)
+    version = schedules.aggregate(count=Count('id'), changed=Max('updated_at'))
+    changed = version['changed'].timestamp() if version['changed'] else 0
+    key = CACHE_KEY.format(control_unit_id, version['count'], changed)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = Timeline.compile(schedules.filter(is_active=True))
+        cache.set(key, timeline, CACHE_SECONDS)
+    return timeline
+
+
+def setpoint(control_unit_id, at=None):
+    """Aktueller und nächster Sollwert einer Einheit"""
+    # Lokale Wandzeit, damit der nächste Wechsel auch über eine Zeitumstellung stimmt
+    at = timezone.localtime(at or timezone.now()).replace(microsecond=0)
+    timeline = get_timeline(control_unit_id)
+    seconds = week_seconds(at)
+    current = timeline.at(seconds)
+    change = timeline.next_change(seconds)
+
+    result = {'at': at, 'current': current.as_dict() if current else None, 'next': None}
+    if change:
+        offset, following = change
+        result['next'] = {
+            'at': at + timedelta(seconds=offset),
+            'setpoint': following.as_dict() if following else None,
+        }
+    return result
+
+
+def _local(day, seconds):
+    return timezone.make_aware(datetime.combine(day, time.min) + timedelta(seconds=seconds))
+
+
+def render(control_unit_id, start=None, days=7):
+    """
+    Tagesprofile ab dem Tag von start (lokale Zeit): je Tag die gültigen
+    Abschnitte mit konkreten Zeitpunkten. Über Mitternacht laufende
+    Zeitpläne erscheinen an beiden Tagen.
+    """
+    timeline = get_timeline(control_unit_id)
+    first = timezone.localdate(start or timezone.now())
+    profiles = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        profiles.append({
+            'date': day,
+            'weekday': day.weekday(),
+            'segments': [
+                {'start': _local(day, low), 'end': _local(day, high), **segment.as_dict()}
+                for low, high, segment in timeline.day(day.weekday())
+            ],
+        })
+    return profiles
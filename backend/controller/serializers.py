@@ -72,13 +72,9 @@ class ControlUnitSerializer(serializers.ModelSerializer):
         return bool(obj.plc_address and obj.plc_username)
     
     def get_is_authenticated(self, obj):
-        """Prüft ob ein gültiger Token vorhanden ist"""
-        from django.utils import timezone
-        return bool(
-            obj.plc_auth_token and 
-            obj.plc_token_expires and 
-            obj.plc_token_expires > timezone.now()
-        )
+        """Prüft ob ein gültiger Token vorhanden ist (im Speicher, sonst Warmstart-Token)"""
+        from .plc_interface import token_store
+        return token_store.is_authenticated(obj)
 
 
 class ControlUnitDetailSerializer(ControlUnitSerializer):
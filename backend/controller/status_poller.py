@@ -0,0 +1,139 @@
+# backend/controller/status_poller.py
+"""
+Hintergrundabfrage des SPS-Status aller Steuerungseinheiten.
+
+Die Einheiten werden parallel (begrenzt durch max_workers) über die
+gemeinsamen Clients aus plc_pool abgefragt; die Threads machen nur SPS-I/O.
+Geschrieben wird danach gesammelt im aufrufenden Thread: ein bulk_update
+bzw. bulk_create für ControlStatus und ein bulk_update für
+ControlUnit.last_sync. Nach einem Fehler wird eine Einheit erst nach
+exponentiell wachsender Wartezeit erneut abgefragt.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.utils import timezone
+
+from .models import ControlStatus, ControlUnit
+from .plc_interface import MockPLCInterface, get_plc_interface
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELDS = [
+    'is_online', 'led_status', 'output_q0_status', 'current_value',
+    'secondary_value', 'measurements', 'error_message', 'last_update',
+]
+
+
+@dataclass
+class UnitBackoff:
+    failures: int = 0
+    next_due: float = 0.0
+
+
+class StatusPoller:
+    def __init__(self, max_workers=8, base_backoff=30, max_backoff=900, use_mock=False):
+        self.max_workers = max_workers
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.use_mock = use_mock
+        self.backoff = {}
+        self._mocks = {}
+
+    def _interface(self, unit):
+        if self.use_mock:
+            # Mock-Zustand pro Einheit über die Durchläufe behalten
+            mock = self._mocks.setdefault(unit.pk, MockPLCInterface(unit))
+            mock.control_unit = unit
+            return mock
+        return get_plc_interface(unit)
+
+    def _read(self, unit):
+        started = time.monotonic()
+        try:
+            return unit, self._interface(unit).read_status(), None, time.monotonic() - started
+        except Exception as e:
+            return unit, None, str(e), time.monotonic() - started
+
+    def due_units(self, units, now=None):
+        now = now if now is not None else time.monotonic()
+        return [unit for unit in units if self.backoff.get(unit.pk, UnitBackoff()).next_due <= now]
+
+    def poll(self, units):
+        """
+        Fragt alle fälligen Einheiten ab und schreibt die Ergebnisse.
+        Gibt {'polled', 'online', 'failed', 'skipped', 'seconds'} zurück.
+        """
+        units = list(units)
+        due = self.due_units(units)
+        started = time.monotonic()
+        if not due:
+            return {'polled': 0, 'online': 0, 'failed': 0, 'skipped': len(units), 'seconds': 0.0}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(due))) as executor:
+            results = list(executor.map(self._read, due))
+
+        self._apply(results)
+        online = sum(1 for _, data, _, _ in results if data is not None)
+        return {
+            'polled': len(due),
+            'online': online,
+            'failed': len(due) - online,
+            'skipped': len(units) - len(due),
+            'seconds': round(time.monotonic() - started, 2),
+        }
+
+    def _apply(self, results):
+        now = timezone.now()
+        clock = time.monotonic()
+        existing = {
+            status.control_unit_id: status
+            for status in ControlStatus.objects.filter(control_unit__in=[unit for unit, *_ in results])
+        }
+        to_update, to_create, synced = [], [], []
+
+        for unit, data, error, _ in results:
+            state = self.backoff.setdefault(unit.pk, UnitBackoff())
+            if data is None:
+                state.failures += 1
+                delay = min(self.base_backoff * 2 ** (state.failures - 1), self.max_backoff)
+                state.next_due = clock + delay
+                logger.warning(f"Status von {unit.name} nicht lesbar ({error}), nächster Versuch in {delay}s")
+            else:
+                state.failures = 0
+                state.next_due = 0.0
+
+            status = existing.get(unit.pk)
+            if status is None:
+                status = ControlStatus(control_unit=unit)
+                to_create.append(status)
+            else:
+                to_update.append(status)
+
+            status.is_online = data is not None
+            status.error_message = error
+            status.last_update = now  # auto_now greift bei bulk_update nicht
+            for field, value in (data or {}).items():
+                setattr(status, field, value)
+
+            if data is not None:
+                unit.last_sync = now
+                synced.append(unit)
+
+        if to_update:
+            ControlStatus.objects.bulk_update(to_update, STATUS_FIELDS)
+        if to_create:
+            ControlStatus.objects.bulk_create(to_create)
+        if synced:
+            ControlUnit.objects.bulk_update(synced, ['last_sync'])
+
+
+def pollable_units(include_inactive=False, unit_ids=None):
+    units = ControlUnit.objects.select_related('room')
+    if unit_ids:
+        return units.filter(pk__in=unit_ids)
+    if include_inactive:
+        return units.exclude(plc_address__isnull=True).exclude(plc_address='')
+    return units.filter(status='active')
@@ -1,55 +1,31 @@
 # backend/ha/management/commands/import_sensors.py
 
-import os
-import requests
-import urllib3
 from django.core.management.base import BaseCommand
 
-# Warnung zu selbstsignierten UniFi-Zertifikaten unterdrücken
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Umgebungsvariablen laden
-PROTECT_URL = os.getenv("PROTECT_URL")
-USERNAME    = os.getenv("PROTECT_USER")
-PASSWORD    = os.getenv("PROTECT_PASS")
+from unifi_protect.protect_client import ProtectAuthError, ProtectClient
 
 class Command(BaseCommand):
     help = "Zeigt alle UniFi Protect Sensoren im Terminal an."
 
     def handle(self, *args, **options):
+        # Zugangsdaten aus PROTECT_URL / PROTECT_USER / PROTECT_PASS
+        client = ProtectClient()
         print("🔐 Anmeldung bei UniFi Protect...")
 
-        # Schritt 1: Login
-        login_resp = requests.post(
-            f"{PROTECT_URL}/api/auth/login",
-            headers={"Content-Type": "application/json"},
-            json={"username": USERNAME, "password": PASSWORD},
-            verify=False
-        )
+        try:
+            client.login()
+            print("✅ Login erfolgreich.")
 
-        if login_resp.status_code != 200:
+            print("📡 Lade Sensor-Daten...")
+            sensors = client.get_sensors()
+        except ProtectAuthError:
             print("❌ Login fehlgeschlagen!")
             return
-
-        cookies = login_resp.cookies
-        print("✅ Login erfolgreich.")
-
-        # Schritt 2: Bootstrap-Daten abrufen
-        print("📡 Lade Sensor-Daten...")
-
-        resp = requests.get(
-            f"{PROTECT_URL}/proxy/protect/api/bootstrap",
-            headers={"Accept": "application/json"},
-            cookies=cookies,
-            verify=False
-        )
-
-        if resp.status_code != 200:
+        except Exception:
             print("❌ Fehler beim Abruf der Bootstrap-Daten!")
             return
-
-        data = resp.json()
-        sensors = data.get("sensors", [])
+        finally:
+            client.close()
 
         if not sensors:
             print("⚠️ Keine Sensoren gefunden.")
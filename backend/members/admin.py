@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import Member
+from .models import Member, MemberSyncOutbox
 
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
     list_display = ("first_name", "last_name", "email", "created_at")
     search_fields = ("first_name", "last_name", "email")
     list_filter = ("created_at",)
+
+@admin.register(MemberSyncOutbox)
+class MemberSyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ("member", "target", "status", "attempts", "next_attempt_at", "reason")
+    list_filter = ("target", "status")
+    search_fields = ("member__first_name", "member__last_name", "last_error")
@@ -21,12 +21,17 @@ from django.db.models import Q
 from . import models
 from .models import Member
 from .serializers import MemberSerializer
+from .joomla_fields import custom_field_values, write_custom_fields
+from .sync_outbox import enqueue_member_sync
+from unifi_api_debug import nfc_index
 import requests
 from dotenv import load_dotenv
 from django.conf import settings
 
 load_dotenv()
 
+UNIFI_REQUEST_TIMEOUT = 10  # Sekunden
+
 def team_member_required(view_func):
     """
     Dekorator für Funktionen, die Teamleiter- oder Admin-Rechte erfordern.
@@ -159,6 +164,12 @@ class MemberViewSet(viewsets.ModelViewSet):
             print(f"❌ Fehler beim Aktualisieren eines Mitglieds: {str(e)}")
             # Exception weiterleiten, um Standardverhalten beizubehalten
             raise
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            member = serializer.save()
+            # Externe Systeme werden vom Sync-Worker nachgezogen
+            enqueue_member_sync(member, reason='member_update')
         
     def list(self, request, *args, **kwargs):
         # Für normale Liste mit Pagination
@@ -374,49 +385,8 @@ def sync_joomla_user(member):
             WHERE id = %s
         """, [name, email, user_id])
 
-        # Altersbedingte Werte bestimmen
-        age = None
-        if hasattr(member, 'age'):
-            age = member.age
-        else:
-            # Versuche, Alter aus birthdate zu berechnen, falls vorhanden
-            if hasattr(member, 'birthdate') and member.birthdate:
-                today = date.today()
-                age = (today.year - member.birthdate.year - 
-                   ((today.month, today.day) < (member.birthdate.month, member.birthdate.day)))
-
-        # THC Limits basierend auf Alter
-        thc_limit = 0 if age and age >= 21 else 10
-        monthly_limit = 50 if age and age >= 21 else 30
-
-        # 🧩 Felder aktualisieren oder neu einfügen
-        fields = [
-            (13, member.kontostand if hasattr(member, 'kontostand') else 0),
-            (14, member.working_hours_per_month if hasattr(member, 'working_hours_per_month') else 0),
-            (16, 25),  # Tageslimit - Standard 25g
-            (17, monthly_limit),  # Monatslimit - altersabhängig
-            (18, thc_limit),  # THC-Grenze - altersabhängig
-            (19, member.physical_limitations if hasattr(member, 'physical_limitations') else ""),
-            (20, member.mental_limitations if hasattr(member, 'mental_limitations') else ""),
-        ]
-
-        for field_id, value in fields:
-            cursor.execute("""
-                SELECT field_id FROM g0w36_fields_values
-                WHERE field_id = %s AND item_id = %s
-            """, [field_id, user_id])
-            exists = cursor.fetchone()
-
-            if exists:
-                cursor.execute("""
-                    UPDATE g0w36_fields_values SET value = %s
-                    WHERE field_id = %s AND item_id = %s
-                """, [str(value), field_id, user_id])
-            else:
-                cursor.execute("""
-                    INSERT INTO g0w36_fields_values (field_id, item_id, value)
-                    VALUES (%s, %s, %s)
-                """, [field_id, user_id, str(value)])
+        # 🧩 Felder in einem Schritt ersetzen
+        write_custom_fields(cursor, {user_id: custom_field_values(member)})
 
         # Stellen Sie sicher, dass die Joomla-ID im Notizfeld gespeichert ist
         notes = member.notes or ""
@@ -687,7 +657,7 @@ def update_unifi_user(member, unifi_id=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             print(f"✅ UniFi-Benutzer aktualisiert: {member.first_name} {member.last_name} mit ID {unifi_id}")
             return True
@@ -732,7 +702,7 @@ def reactivate_unifi_user(member, unifi_id=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             print(f"✅ UniFi-Benutzer mit ID {unifi_id} wurde reaktiviert.")
             return True
@@ -778,7 +748,7 @@ def delete_unifi_user(member, unifi_id=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             # WICHTIGE ÄNDERUNG: Die UniFi-ID nicht mehr aus den Notizen entfernen!
             # Stattdessen einen Deaktivierungsvermerk hinzufügen
@@ -802,6 +772,9 @@ def delete_unifi_user(member, unifi_id=None):
                 member.notes = notes + deactivation_note
                 member.save(update_fields=["notes"])
             
+            # Karten des deaktivierten Benutzers dürfen nicht mehr aufgelöst werden
+            nfc_index.forget_unifi_user(unifi_id)
+
             print(f"🔒 UniFi-Benutzer mit ID {unifi_id} wurde deaktiviert und ID in Notizen beibehalten.")
             return True
     except Exception as e:
@@ -1375,7 +1348,7 @@ def assign_nfc_card_api(request, member_id):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         
         if response.status_code in (200, 204):
             result = response.json() if response.content else {}
@@ -1388,6 +1361,9 @@ def assign_nfc_card_api(request, member_id):
                 nfc_info = f"\nNFC-Karte zugewiesen: {card_id} (Token: {token[:16]}...)"
                 member.notes = notes + nfc_info
                 member.save(update_fields=['notes'])
+
+                # Lokalen Kartenindex aktualisieren (ersetzt eine frühere Zuordnung des Tokens)
+                nfc_index.remember_card(token, unifi_id, member)
                 
                 return Response({
                     "success": True,
@@ -1471,11 +1447,8 @@ def update_member_balance_api(request, member_id):
         member.notes = (member.notes or "") + transaction_note
         member.save(update_fields=['notes'])
     
-    # Joomla-Kontostand synchronisieren
-    try:
-        sync_joomla_user(member)
-    except Exception as e:
-        print(f"⚠️ Joomla-Sync fehlgeschlagen: {str(e)}")
+    # Joomla-Kontostand über die Outbox synchronisieren
+    enqueue_member_sync(member, ['joomla'], reason='balance')
     
     return Response({
         "success": True,
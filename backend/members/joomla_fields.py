@@ -0,0 +1,66 @@
+# members/joomla_fields.py
+"""
+Joomla Custom Fields (g0w36_fields_values) der Mitglieder.
+
+Ohne passlib-Abhängigkeit, damit api_views.py und joomla_service.py
+dieselbe Feldzuordnung und denselben Schreibweg verwenden.
+"""
+
+
+def joomla_username(member):
+    return f"user_{str(member.uuid).split('-')[0]}"
+
+
+CUSTOM_FIELD_IDS = [13, 14, 16, 17, 18, 19, 20]
+
+
+def custom_field_values(member):
+    """
+    Liefert die Joomla Custom Fields eines Mitglieds als (field_id, value)-Paare.
+    """
+    # THC Limits basierend auf Alter
+    age = member.age
+    thc_limit = 0 if age and age >= 21 else 10
+    monthly_limit = 50 if age and age >= 21 else 30
+
+    return [
+        (13, member.kontostand),
+        (14, member.working_hours_per_month),
+        (16, 25),  # Tageslimit - Standard 25g
+        (17, monthly_limit),  # Monatslimit - altersabhängig
+        (18, thc_limit),  # THC-Grenze - altersabhängig
+        (19, member.physical_limitations or ""),
+        (20, member.mental_limitations or ""),
+    ]
+
+
+def write_custom_fields(cursor, values_by_user):
+    """
+    Schreibt die Custom Fields mehrerer Joomla-Benutzer mit zwei Statements:
+    vorhandene Werte löschen, dann ein mehrzeiliges INSERT. g0w36_fields_values
+    hat keinen eindeutigen Schlüssel auf (field_id, item_id), daher kein
+    ON DUPLICATE KEY UPDATE. Muss innerhalb einer Transaktion laufen.
+    """
+    if not values_by_user:
+        return
+
+    user_ids = list(values_by_user)
+    cursor.execute(
+        "DELETE FROM g0w36_fields_values WHERE field_id IN ({}) AND item_id IN ({})".format(
+            ", ".join(["%s"] * len(CUSTOM_FIELD_IDS)),
+            ", ".join(["%s"] * len(user_ids))
+        ),
+        CUSTOM_FIELD_IDS + user_ids
+    )
+
+    rows = [
+        (field_id, user_id, str(value))
+        for user_id, fields in values_by_user.items()
+        for field_id, value in fields
+    ]
+    cursor.execute(
+        "INSERT INTO g0w36_fields_values (field_id, item_id, value) VALUES {}".format(
+            ", ".join(["(%s, %s, %s)"] * len(rows))
+        ),
+        [param for row in rows for param in row]
+    )
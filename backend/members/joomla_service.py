@@ -1,11 +1,13 @@
 # /joomla_service.py
 import os
+import re
 from django.db import connections, transaction
 from django.utils import timezone
 import secrets
 import string
 from passlib.hash import bcrypt  # 🔐 Joomla-kompatibler Hash
 from dotenv import load_dotenv
+from .joomla_fields import custom_field_values, joomla_username, write_custom_fields
 
 # Umgebungsvariablen laden
 load_dotenv()
@@ -123,6 +125,20 @@ def create_joomla_user(member):
         }
 
 
+def _note_joomla_id(member, user_id):
+    """Merkt die Joomla-ID im Notizfeld; True, wenn sich die Notizen geändert haben"""
+    notes = member.notes or ""
+    if "Joomla-ID:" in notes:
+        return False
+    member.notes = f"{notes}\nJoomla-ID: {user_id}"
+    return True
+
+
+def _joomla_id_from_notes(member):
+    match = re.search(r'Joomla-ID:\s*(\d+)', member.notes or "")
+    return int(match.group(1)) if match else None
+
+
 def sync_joomla_user(member):
     """
     Aktualisiert einen bestehenden Benutzer in Joomla basierend auf den Member-Daten,
@@ -138,7 +154,7 @@ def sync_joomla_user(member):
     if not uid:
         raise ValueError("UUID fehlt")
         
-    username = f"user_{str(uid).split('-')[0]}"
+    username = joomla_username(member)
     name = f"Mitglied {member.first_name}"
     email = member.email or f"{username}@verein.local"
     
@@ -156,10 +172,8 @@ def sync_joomla_user(member):
 
         if not row:
             # Versuche, Joomla-ID aus Notizen zu extrahieren
-            import re
-            match = re.search(r'Joomla-ID:\s*(\d+)', member.notes or "")
-            if match:
-                user_id = int(match.group(1))
+            user_id = _joomla_id_from_notes(member)
+            if user_id:
                 cursor.execute("SELECT id FROM g0w36_users WHERE id = %s", [user_id])
                 row = cursor.fetchone()
                 
@@ -175,61 +189,128 @@ def sync_joomla_user(member):
             WHERE id = %s
         """, [name, email, user_id])
 
-        # Altersbedingte Werte bestimmen
-        age = None
-        if hasattr(member, 'age'):
-            age = member.age
-        else:
-            # Versuche, Alter aus birthdate zu berechnen, falls vorhanden
-            import datetime
-            if hasattr(member, 'birthdate') and member.birthdate:
-                today = datetime.date.today()
-                age = (today.year - member.birthdate.year - 
-                   ((today.month, today.day) < (member.birthdate.month, member.birthdate.day)))
-
-        # THC Limits basierend auf Alter
-        thc_limit = 0 if age and age >= 21 else 10
-        monthly_limit = 50 if age and age >= 21 else 30
-
-        # 🧩 Felder aktualisieren oder neu einfügen
-        fields = [
-            (13, member.kontostand if hasattr(member, 'kontostand') else 0),
-            (14, member.working_hours_per_month if hasattr(member, 'working_hours_per_month') else 0),
-            (16, 25),  # Tageslimit - Standard 25g
-            (17, monthly_limit),  # Monatslimit - altersabhängig
-            (18, thc_limit),  # THC-Grenze - altersabhängig
-            (19, member.physical_limitations if hasattr(member, 'physical_limitations') else ""),
-            (20, member.mental_limitations if hasattr(member, 'mental_limitations') else ""),
-        ]
-
-        for field_id, value in fields:
-            cursor.execute("""
-                SELECT field_id FROM g0w36_fields_values
-                WHERE field_id = %s AND item_id = %s
-            """, [field_id, user_id])
-            exists = cursor.fetchone()
-
-            if exists:
-                cursor.execute("""
-                    UPDATE g0w36_fields_values SET value = %s
-                    WHERE field_id = %s AND item_id = %s
-                """, [str(value), field_id, user_id])
-            else:
-                cursor.execute("""
-                    INSERT INTO g0w36_fields_values (field_id, item_id, value)
-                    VALUES (%s, %s, %s)
-                """, [field_id, user_id, str(value)])
+        # 🧩 Felder in einem Schritt ersetzen
+        write_custom_fields(cursor, {user_id: custom_field_values(member)})
 
         # Stellen Sie sicher, dass die Joomla-ID im Notizfeld gespeichert ist
-        notes = member.notes or ""
-        if "Joomla-ID:" not in notes:
-            member.notes = f"{notes}\nJoomla-ID: {user_id}"
+        if _note_joomla_id(member, user_id):
             member.save(update_fields=["notes"])
 
         print(f"✅ Joomla-Benutzer aktualisiert: {username} mit ID {user_id}")
         return user_id
 
 
+def sync_joomla_users(members, chunk_size=200):
+    """
+    Synchronisiert viele Mitglieder über eine Joomla-Verbindung. Pro Block
+    werden Benutzer mit einer Abfrage gesucht, die Stammdaten per executemany
+    aktualisiert und die Custom Fields aller Mitglieder gemeinsam geschrieben.
+
+    Args:
+        members: Iterable von Member-Objekten (z.B. queryset.iterator())
+        chunk_size: Anzahl Mitglieder pro Transaktion
+
+    Yields:
+        dict: Ergebnis je Mitglied mit member_id, status ('synced', 'missing',
+              'error'), joomla_id und ggf. error
+    """
+    try:
+        joomla_db = connections['joomla']
+    except KeyError:
+        raise ConnectionError("Keine Verbindung zur Joomla-Datenbank konfiguriert")
+
+    chunk = []
+    for member in members:
+        chunk.append(member)
+        if len(chunk) >= chunk_size:
+            yield from _sync_joomla_chunk(joomla_db, chunk)
+            chunk = []
+    if chunk:
+        yield from _sync_joomla_chunk(joomla_db, chunk)
+
+
+def _sync_joomla_chunk(joomla_db, members):
+    from .models import Member
+
+    invalid = []
+    candidates = []
+    for member in members:
+        if not member.uuid:
+            invalid.append({'member_id': member.id, 'status': 'error', 'joomla_id': None, 'error': "UUID fehlt"})
+        else:
+            candidates.append(member)
+
+    try:
+        with transaction.atomic(using='joomla'):
+            cursor = joomla_db.cursor()
+
+            # Benutzer anhand der Usernames finden, Rest über die Joomla-ID in den Notizen
+            usernames = [joomla_username(member) for member in candidates]
+            ids_by_username = {}
+            if usernames:
+                cursor.execute(
+                    "SELECT username, id FROM g0w36_users WHERE username IN ({})".format(
+                        ", ".join(["%s"] * len(usernames))
+                    ),
+                    usernames
+                )
+                ids_by_username = dict(cursor.fetchall())
+
+            noted_ids = {
+                member.id: _joomla_id_from_notes(member)
+                for member in candidates
+                if joomla_username(member) not in ids_by_username
+            }
+            existing_ids = set()
+            lookup_ids = [user_id for user_id in noted_ids.values() if user_id]
+            if lookup_ids:
+                cursor.execute(
+                    "SELECT id FROM g0w36_users WHERE id IN ({})".format(", ".join(["%s"] * len(lookup_ids))),
+                    lookup_ids
+                )
+                existing_ids = {row[0] for row in cursor.fetchall()}
+
+            results = list(invalid)
+            user_rows = []
+            values_by_user = {}
+            notes_changed = []
+            for member in candidates:
+                username = joomla_username(member)
+                user_id = ids_by_username.get(username)
+                if user_id is None and noted_ids.get(member.id) in existing_ids:
+                    user_id = noted_ids[member.id]
+                if user_id is None:
+                    results.append({'member_id': member.id, 'status': 'missing', 'joomla_id': None})
+                    continue
+
+                user_rows.append((
+                    f"Mitglied {member.first_name}",
+                    member.email or f"{username}@verein.local",
+                    user_id
+                ))
+                values_by_user[user_id] = custom_field_values(member)
+                if _note_joomla_id(member, user_id):
+                    notes_changed.append(member)
+                results.append({'member_id': member.id, 'status': 'synced', 'joomla_id': user_id})
+
+            if user_rows:
+                cursor.executemany("""
+                    UPDATE g0w36_users SET name = %s, email = %s
+                    WHERE id = %s
+                """, user_rows)
+            write_custom_fields(cursor, values_by_user)
+    except Exception as e:
+        print(f"❌ Joomla-Sync für {len(candidates)} Mitglieder fehlgeschlagen: {str(e)}")
+        return invalid + [
+            {'member_id': member.id, 'status': 'error', 'joomla_id': None, 'error': str(e)}
+            for member in candidates
+        ]
+
+    if notes_changed:
+        Member.objects.bulk_update(notes_changed, ['notes'])
+    return results
+
+
 def regenerate_joomla_password(member):
     """
     Generiert ein neues sicheres Passwort für einen Joomla-Benutzer.
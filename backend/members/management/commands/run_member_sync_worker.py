@@ -0,0 +1,47 @@
+# backend/members/management/commands/run_member_sync_worker.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from members.sync_outbox import get_backend, process_due
+
+
+class Command(BaseCommand):
+    help = "Arbeitet die Mitglieder-Outbox ab (Joomla, UniFi Access, WordPress)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Nur einen Durchlauf ausführen und beenden")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Wartezeit in Sekunden, wenn nichts fällig ist")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--backend', choices=['live', 'stub'],
+                            help="Überschreibt MEMBER_SYNC_BACKEND")
+
+    def handle(self, *args, **options):
+        backend = get_backend(options['backend'])
+        self.stdout.write(f"🔄 Mitglieder-Sync-Worker gestartet (Backend: {backend.name})")
+
+        try:
+            while True:
+                close_old_connections()
+                results = process_due(backend, batch_size=options['batch_size'])
+                handled = sum(results[key] for key in ('done', 'skipped', 'retry', 'failed'))
+
+                if handled or results['released']:
+                    self.stdout.write(
+                        f"✅ {results['done']} übertragen, {results['skipped']} übersprungen, "
+                        f"{results['retry']} erneut geplant, {results['failed']} fehlgeschlagen"
+                        + (f", {results['released']} verwaiste freigegeben" if results['released'] else "")
+                    )
+
+                if options['once']:
+                    break
+                if handled < options['batch_size']:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("🛑 Mitglieder-Sync-Worker beendet"))
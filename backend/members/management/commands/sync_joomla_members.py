@@ -0,0 +1,43 @@
+# backend/members/management/commands/sync_joomla_members.py
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from members.joomla_service import sync_joomla_users
+from members.models import Member
+
+
+class Command(BaseCommand):
+    help = "Synchronisiert alle (oder ausgewählte) Mitglieder blockweise mit Joomla."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help="Mitglieder pro Joomla-Transaktion")
+        parser.add_argument('--member-id', type=int, action='append', dest='member_ids',
+                            help="Nur diese Mitglieder synchronisieren (mehrfach möglich)")
+        parser.add_argument('--verbose-results', action='store_true',
+                            help="Ergebnis für jedes Mitglied ausgeben")
+
+    def handle(self, *args, **options):
+        members = Member.objects.order_by('id')
+        if options['member_ids']:
+            members = members.filter(id__in=options['member_ids'])
+
+        chunk_size = options['chunk_size']
+        self.stdout.write(f"🔄 Joomla-Sync für {members.count()} Mitglieder (Blockgröße {chunk_size})...")
+
+        counts = Counter()
+        for result in sync_joomla_users(members.iterator(chunk_size=chunk_size), chunk_size=chunk_size):
+            counts[result['status']] += 1
+            if result['status'] == 'error':
+                self.stdout.write(f"❌ Mitglied {result['member_id']}: {result['error']}")
+            elif result['status'] == 'missing':
+                self.stdout.write(f"⚠️ Mitglied {result['member_id']}: kein Joomla-Benutzer")
+            elif options['verbose_results']:
+                self.stdout.write(f"✅ Mitglied {result['member_id']} → Joomla-ID {result['joomla_id']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {counts['synced']} synchronisiert, {counts['missing']} ohne Joomla-Benutzer, "
+            f"{counts['error']} Fehler"
+        ))
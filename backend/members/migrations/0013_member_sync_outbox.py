@@ -0,0 +1,39 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_remove_member_unifi_user_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('joomla', 'Joomla'), ('unifi', 'UniFi Access'), ('wordpress', 'WordPress')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Ausstehend'), ('processing', 'In Bearbeitung'), ('done', 'Erledigt'), ('skipped', 'Übersprungen'), ('superseded', 'Ersetzt'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('lease_token', models.CharField(blank=True, db_index=True, max_length=32)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_outbox', to='members.member')),
+            ],
+            options={
+                'verbose_name': 'Synchronisations-Auftrag',
+                'verbose_name_plural': 'Synchronisations-Aufträge',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='member_sync_due_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('member', 'target'), name='member_sync_single_pending')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 # members/models.py
 from django.db import models
+from django.utils import timezone
 import uuid
 from datetime import date
 
@@ -77,4 +78,58 @@ class Member(models.Model):
             
         if self.age < 21:
             return "18+"
-        return "21+"
\ No newline at end of file
+        return "21+"
+
+
+class MemberSyncOutbox(models.Model):
+    """
+    Ausstehende Synchronisation eines Mitglieds mit einem externen System
+    (Joomla, UniFi Access, WordPress). Einträge werden im Request nur
+    angelegt und vom Worker (manage.py run_member_sync_worker) abgearbeitet.
+    Pro Mitglied und Ziel gibt es höchstens einen offenen Eintrag – der
+    Worker überträgt immer den aktuellen Stand des Mitglieds.
+    """
+    TARGET_CHOICES = [
+        ('joomla', 'Joomla'),
+        ('unifi', 'UniFi Access'),
+        ('wordpress', 'WordPress'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Ausstehend'),
+        ('processing', 'In Bearbeitung'),
+        ('done', 'Erledigt'),
+        ('skipped', 'Übersprungen'),
+        ('superseded', 'Ersetzt'),
+        ('failed', 'Fehlgeschlagen'),
+    ]
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='sync_outbox')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reason = models.CharField(max_length=100, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    lease_token = models.CharField(max_length=32, blank=True, db_index=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = "Synchronisations-Auftrag"
+        verbose_name_plural = "Synchronisations-Aufträge"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['member', 'target'],
+                condition=models.Q(status='pending'),
+                name='member_sync_single_pending'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='member_sync_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_display()} – {self.member} ({self.get_status_display()})"
@@ -0,0 +1,209 @@
+# members/sync_outbox.py
+"""
+Outbox für die Synchronisation von Mitgliedern mit Joomla, UniFi Access und
+WordPress.
+
+Requests legen nur einen MemberSyncOutbox-Eintrag an (enqueue_member_sync),
+der Worker (manage.py run_member_sync_worker) überträgt den aktuellen Stand
+des Mitglieds mit Wiederholungen und exponentiellem Backoff. Mit
+MEMBER_SYNC_BACKEND = 'stub' laufen alle Ziele lokal ohne externe Systeme.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import MemberSyncOutbox
+
+MAX_ATTEMPTS = getattr(settings, 'MEMBER_SYNC_MAX_ATTEMPTS', 8)
+BACKOFF_BASE_SECONDS = getattr(settings, 'MEMBER_SYNC_BACKOFF_SECONDS', 30)
+BACKOFF_MAX_SECONDS = 60 * 60
+LEASE_SECONDS = 10 * 60  # Danach gilt ein Eintrag in Bearbeitung als verwaist
+
+
+class SyncSkipped(Exception):
+    """Ziel ist für dieses Mitglied nicht eingerichtet (z.B. keine UniFi-ID)"""
+
+
+def default_targets():
+    return list(getattr(settings, 'MEMBER_SYNC_TARGETS', ['joomla', 'unifi']))
+
+
+def enqueue_member_sync(member, targets=None, reason=''):
+    """
+    Merkt die Synchronisation eines Mitglieds vor. Ein bereits offener
+    Eintrag für dasselbe Ziel wird wiederverwendet und sofort fällig.
+    Sollte innerhalb der Transaktion der eigentlichen Änderung aufgerufen werden.
+    """
+    now = timezone.now()
+    entries = []
+    for target in targets or default_targets():
+        entry, created = MemberSyncOutbox.objects.get_or_create(
+            member=member,
+            target=target,
+            status='pending',
+            defaults={'reason': reason, 'next_attempt_at': now}
+        )
+        if not created:
+            MemberSyncOutbox.objects.filter(pk=entry.pk, status='pending').update(
+                reason=reason or entry.reason,
+                attempts=0,
+                next_attempt_at=now,
+                updated_at=now
+            )
+        entries.append(entry)
+    return entries
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS))
+
+
+class LiveSyncBackend:
+    """Überträgt Mitglieder an die echten Systeme"""
+
+    name = 'live'
+
+    def sync(self, target, member):
+        handler = getattr(self, f'sync_{target}', None)
+        if handler is None:
+            raise SyncSkipped(f"Unbekanntes Ziel: {target}")
+        return handler(member)
+
+    def sync_joomla(self, member):
+        from .joomla_service import sync_joomla_user
+        return sync_joomla_user(member)
+
+    def sync_unifi(self, member):
+        from .api_views import extract_unifi_id, update_unifi_user
+        unifi_id = extract_unifi_id(member)
+        if not unifi_id:
+            raise SyncSkipped("Keine UniFi-ID hinterlegt")
+        if not update_unifi_user(member, unifi_id=unifi_id):
+            raise RuntimeError(f"UniFi-Aktualisierung für {unifi_id} fehlgeschlagen")
+        return unifi_id
+
+    def sync_wordpress(self, member):
+        from .wordpress_service import sync_wordpress_user
+        user_id = sync_wordpress_user(member)
+        if not user_id:
+            raise SyncSkipped("Kein WordPress-Benutzer vorhanden")
+        return user_id
+
+
+class StubSyncBackend:
+    """
+    Lokales Backend für Entwicklung und Tests: protokolliert die übertragenen
+    Stände statt externe Systeme anzusprechen. `failures` gibt pro Ziel an,
+    wie oft der Aufruf noch fehlschlagen soll.
+    """
+
+    name = 'stub'
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def sync(self, target, member):
+        if self.failures.get(target, 0) > 0:
+            self.failures[target] -= 1
+            raise ConnectionError(f"Stub: {target} nicht erreichbar")
+
+        self.calls.append((target, member.id, {
+            'first_name': member.first_name,
+            'last_name': member.last_name,
+            'email': member.email,
+            'kontostand': str(member.kontostand),
+        }))
+        print(f"🧪 [stub] {target}-Sync für Mitglied {member.id}")
+        return member.id
+
+
+def get_backend(name=None):
+    name = name or getattr(settings, 'MEMBER_SYNC_BACKEND', 'live')
+    if name == 'stub':
+        return StubSyncBackend()
+    return LiveSyncBackend()
+
+
+def _set_state(entry_id, **fields):
+    """
+    Setzt den Status eines Eintrags. Kommt ein Eintrag zurück auf 'pending',
+    während schon ein neuerer offen ist, überträgt der neuere den aktuellen
+    Stand – der ältere wird dann als ersetzt markiert.
+    """
+    fields.setdefault('updated_at', timezone.now())
+    try:
+        with transaction.atomic():
+            MemberSyncOutbox.objects.filter(pk=entry_id).update(**fields)
+    except IntegrityError:
+        MemberSyncOutbox.objects.filter(pk=entry_id).update(
+            status='superseded',
+            lease_token='',
+            completed_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+
+
+def release_stale(now=None):
+    """Gibt Einträge frei, deren Worker abgebrochen ist"""
+    now = now or timezone.now()
+    stale_ids = list(MemberSyncOutbox.objects.filter(
+        status='processing',
+        updated_at__lt=now - timedelta(seconds=LEASE_SECONDS)
+    ).values_list('id', flat=True))
+    for entry_id in stale_ids:
+        _set_state(entry_id, status='pending', lease_token='', next_attempt_at=now)
+    return len(stale_ids)
+
+
+def claim_due(batch_size=50, now=None):
+    """Reserviert fällige Einträge für diesen Worker"""
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+    due_ids = list(MemberSyncOutbox.objects.filter(
+        status='pending',
+        next_attempt_at__lte=now
+    ).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+    if not due_ids:
+        return []
+
+    MemberSyncOutbox.objects.filter(id__in=due_ids, status='pending').update(
+        status='processing', lease_token=token, updated_at=now
+    )
+    return list(MemberSyncOutbox.objects.filter(
+        lease_token=token, status='processing'
+    ).select_related('member').order_by('next_attempt_at'))
+
+
+def process_entry(entry, backend):
+    """Überträgt einen Eintrag und gibt den neuen Status zurück"""
+    now = timezone.now()
+    try:
+        backend.sync(entry.target, entry.member)
+    except SyncSkipped as e:
+        _set_state(entry.id, status='skipped', lease_token='', last_error=str(e), completed_at=now)
+        return 'skipped'
+    except Exception as e:
+        attempts = entry.attempts + 1
+        if attempts >= MAX_ATTEMPTS:
+            _set_state(entry.id, status='failed', lease_token='', attempts=attempts,
+                       last_error=str(e), completed_at=now)
+            return 'failed'
+        _set_state(entry.id, status='pending', lease_token='', attempts=attempts,
+                   last_error=str(e), next_attempt_at=now + backoff_delay(attempts))
+        return 'retry'
+
+    _set_state(entry.id, status='done', lease_token='', last_error='', completed_at=now)
+    return 'done'
+
+
+def process_due(backend=None, batch_size=50):
+    """Arbeitet einen Schub fälliger Einträge ab und liefert die Zählung je Ergebnis"""
+    backend = backend or get_backend()
+    results = {'done': 0, 'skipped': 0, 'retry': 0, 'failed': 0, 'released': release_stale()}
+    for entry in claim_due(batch_size):
+        results[process_entry(entry, backend)] += 1
+    return results
@@ -11,6 +11,7 @@ load_dotenv()
 # Konfiguration aus Umgebungsvariablen oder settings.py auslesen
 UNIFI_ACCESS_HOST = os.getenv("UNIFI_ACCESS_HOST") or getattr(settings, "UNIFI_ACCESS_HOST", "")
 UNIFI_ACCESS_TOKEN = os.getenv("UNIFI_ACCESS_TOKEN") or getattr(settings, "UNIFI_ACCESS_TOKEN", "")
+UNIFI_REQUEST_TIMEOUT = 10  # Sekunden
 
 def create_unifi_user(member):
     """
@@ -103,7 +104,7 @@ def update_unifi_user(member, unifi_id=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             print(f"✅ UniFi-Benutzer aktualisiert: {member.first_name} {member.last_name} mit ID {unifi_id}")
             return True
@@ -155,7 +156,7 @@ def delete_unifi_user(member, unifi_id=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             print(f"🗑 UniFi-Benutzer mit ID {unifi_id} wurde deaktiviert.")
             return True
@@ -213,7 +214,7 @@ def update_user_avatar(member, unifi_id=None, avatar_url=None):
     }
     
     try:
-        response = requests.put(url, json=data, headers=headers, verify=False)
+        response = requests.put(url, json=data, headers=headers, verify=False, timeout=UNIFI_REQUEST_TIMEOUT)
         if response.status_code in (200, 204):
             print(f"🖼️ Avatar für UniFi-Benutzer mit ID {unifi_id} wurde aktualisiert.")
             return True
@@ -108,3 +108,54 @@ def delete_wordpress_user(member):
 
         print(f"🗑 WordPress-Benutzer {username} gelöscht.")
         return True
+
+
+def sync_wordpress_user(member):
+    """
+    Überträgt Name, E-Mail und Limits eines Mitglieds an einen bestehenden
+    WordPress-Benutzer. Gibt die WordPress-ID zurück oder None, falls kein
+    Benutzer existiert.
+    """
+    uid = member.uuid
+    if not uid:
+        raise ValueError("UUID fehlt")
+
+    username = f"user_{str(uid).split('-')[0]}"
+    email = member.email or f"{username}@verein.local"
+    full_name = f"Mitglied {member.first_name}"
+
+    age = member.age
+    thc_limit = 0 if age and age >= 21 else 10
+    monthly_limit = 50 if age and age >= 21 else 30
+
+    try:
+        wp_db = connections['wordpress']
+    except KeyError:
+        raise ConnectionError("Keine Verbindung zur WordPress-Datenbank konfiguriert")
+
+    with transaction.atomic(using='wordpress'):
+        cursor = wp_db.cursor()
+        cursor.execute("SELECT ID FROM wp_users WHERE user_login = %s", [username])
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        user_id = row[0]
+        cursor.execute("""
+            UPDATE wp_users SET user_email = %s, display_name = %s
+            WHERE ID = %s
+        """, [email, full_name, user_id])
+
+        for meta_key, meta_value in (('thc_limit', thc_limit), ('monthly_limit', monthly_limit)):
+            cursor.execute("""
+                UPDATE wp_usermeta SET meta_value = %s
+                WHERE user_id = %s AND meta_key = %s
+            """, [meta_value, user_id, meta_key])
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                    INSERT INTO wp_usermeta (user_id, meta_key, meta_value)
+                    VALUES (%s, %s, %s)
+                """, [user_id, meta_key, meta_value])
+
+        print(f"🔁 WP-User {username} (ID {user_id}) aktualisiert")
+        return user_id
@@ -1,6 +1,8 @@
 # backend/rooms/api_urls.py
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .api_views import RoomViewSet, RoomItemTypeViewSet, RoomItemViewSet, SensorViewSet
+from .live import live_events
 
 router = DefaultRouter()
 router.register(r'rooms', RoomViewSet)
@@ -8,4 +10,7 @@ router.register(r'room-item-types', RoomItemTypeViewSet)
 router.register(r'room-items', RoomItemViewSet)
 router.register(r'sensors', SensorViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    # 📡 Live-Kanal (SSE) für Sensoren, Steuerungsstatus und Zugriffsereignisse
+    path('live/events/', live_events, name='live-events'),
+] + router.urls
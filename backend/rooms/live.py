@@ -0,0 +1,221 @@
+# backend/rooms/live.py
+"""
+Live-Kanal (Server-Sent Events) für das Dashboard.
+
+Statt dass jeder geöffnete Tab Sensoren, Steuerungsstatus und
+Zugriffsereignisse alle paar Sekunden abfragt, prüft pro Serverprozess
+ein einzelner Hintergrund-Thread die Änderungsspalten (last_seen,
+last_update, AccessEvent.id) und verteilt neue Werte an alle
+verbundenen Clients. Der Thread läuft nur, solange Clients verbunden
+sind; Schreibzugriffe aus anderen Prozessen (Listener, Management-
+Commands) werden damit ebenfalls erfasst.
+
+Clients abonnieren /api/live/events/?room=<id>. Sensoren werden über
+rooms.Sensor.data_source (= Name des Protect-Sensors) einem Raum
+zugeordnet (nicht zugeordnete nur an Clients ohne Raumfilter);
+Zugriffsereignisse haben keinen Raum und gehen an alle.
+
+Der Stream ist ein normaler (synchroner) Generator und läuft damit unter
+WSGI (runserver, gunicorn mit Threads) wie unter ASGI. Unter WSGI belegt
+jeder verbundene Client einen Worker-Thread, bis er die Verbindung
+schließt (spätestens nach HEARTBEAT_SECONDS erkannt).
+"""
+import itertools
+import json
+import threading
+import time
+from queue import Empty, Full, Queue
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from controller.models import ControlStatus
+from unifi_access.models import AccessEvent
+from unifi_protect.models import ProtectSensor
+from .models import Sensor
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 200
+ALL_ROOMS = '*'  # Ereignisse ohne Raumbezug (Zugriffsereignisse)
+
+
+def sensor_rooms():
+    """Protect-Sensorname → Raum-ID laut Raumplanung"""
+    return dict(
+        Sensor.objects.exclude(data_source__isnull=True).exclude(data_source='')
+        .values_list('data_source', 'room_item__room_id')
+    )
+
+
+def current_cursor():
+    return {
+        'sensor': ProtectSensor.objects.aggregate(value=Max('last_seen'))['value'],
+        'status': ControlStatus.objects.aggregate(value=Max('last_update'))['value'],
+        'access': AccessEvent.objects.aggregate(value=Max('id'))['value'] or 0,
+    }
+
+
+def collect_changes(cursor):
+    """
+    Liefert alle seit dem Cursor geschriebenen Änderungen als Liste von
+    (event, room_id, data) und schiebt den Cursor weiter.
+    """
+    changes = []
+
+    sensors = ProtectSensor.objects.order_by('last_seen')
+    if cursor['sensor']:
+        sensors = sensors.filter(last_seen__gt=cursor['sensor'])
+    sensors = list(sensors.values('name', 'sensor_type', 'temperature', 'humidity', 'last_seen'))
+    if sensors:
+        rooms = sensor_rooms()
+        for sensor in sensors:
+            changes.append(('sensor', rooms.get(sensor['name']), sensor))
+        cursor['sensor'] = sensors[-1]['last_seen']
+
+    statuses = ControlStatus.objects.select_related('control_unit').order_by('last_update')
+    if cursor['status']:
+        statuses = statuses.filter(last_update__gt=cursor['status'])
+    statuses = list(statuses)
+    for status in statuses:
+        changes.append(('control_status', status.control_unit.room_id, {
+            'control_unit': str(status.control_unit_id),
+            'control_unit_name': status.control_unit.name,
+            'current_value': status.current_value,
+            'secondary_value': status.secondary_value,
+            'led_status': status.led_status,
+            'output_q0_status': status.output_q0_status,
+            'is_online': status.is_online,
+            'error_message': status.error_message,
+            'measurements': status.measurements,
+            'last_update': status.last_update,
+        }))
+    if statuses:
+        cursor['status'] = statuses[-1].last_update
+
+    events = list(
+        AccessEvent.objects.filter(id__gt=cursor['access']).order_by('id')
+        .values('id', 'actor', 'door', 'event_type', 'timestamp', 'authentication')
+    )
+    for event in events:
+        changes.append(('access_event', ALL_ROOMS, event))
+    if events:
+        cursor['access'] = events[-1]['id']
+
+    return changes
+
+
+class LiveHub:
+    """Verteilt Änderungen an alle verbundenen Clients eines Prozesses"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.thread = None
+        self.ids = itertools.count(1)
+
+    def subscribe(self, room_id=None):
+        queue = Queue(maxsize=QUEUE_SIZE)
+        with self.lock:
+            self.subscribers[queue] = room_id
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._watch, daemon=True, name="live-hub")
+                self.thread.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers.pop(queue, None)
+
+    def publish(self, event, room_id, data):
+        message = (next(self.ids), event, json.dumps(data, cls=DjangoJSONEncoder))
+        with self.lock:
+            targets = list(self.subscribers.items())
+        for queue, subscribed_room in targets:
+            # Ohne Raumfilter alles; sonst passende und raumübergreifende Ereignisse
+            if subscribed_room is None or room_id == ALL_ROOMS or str(room_id) == subscribed_room:
+                self._offer(queue, message)
+
+    @staticmethod
+    def _offer(queue, message):
+        # Langsame Clients verlieren die ältesten Nachrichten statt den Thread aufzuhalten
+        while True:
+            try:
+                queue.put_nowait(message)
+                return
+            except Full:
+                try:
+                    queue.get_nowait()
+                except Empty:
+                    pass
+
+    def _watch(self):
+        interval = getattr(settings, 'LIVE_PUSH_INTERVAL', 1.0)
+        cursor = None
+        try:
+            while True:
+                with self.lock:
+                    if not self.subscribers:
+                        self.thread = None
+                        return
+                try:
+                    if cursor is None:
+                        cursor = current_cursor()
+                    else:
+                        for event, room_id, data in collect_changes(cursor):
+                            self.publish(event, room_id, data)
+                except Exception as e:
+                    print(f"❌ Fehler im Live-Kanal: {e}")
+                finally:
+                    close_old_connections()
+                time.sleep(interval)
+        finally:
+            close_old_connections()
+
+
+hub = LiveHub()
+
+
+def _is_authenticated(request):
+    # EventSource kann keine Header setzen: Token alternativ als ?token=
+    token = request.GET.get('token')
+    if token:
+        return Token.objects.filter(key=token, user__is_active=True).exists()
+    drf_request = Request(request, authenticators=[TokenAuthentication(), SessionAuthentication()])
+    return drf_request.user.is_authenticated
+
+
+def _stream(queue):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message_id, event, data = queue.get(timeout=HEARTBEAT_SECONDS)
+            except Empty:
+                yield ": ping\n\n"  # Erkennt auch getrennte Clients (Schreibfehler)
+                continue
+            yield f"id: {message_id}\nevent: {event}\ndata: {data}\n\n"
+    finally:
+        hub.unsubscribe(queue)
+
+
+def live_events(request):
+    """
+    SSE-Stream mit den Ereignissen sensor, control_status und access_event.
+    Optional ?room=<id>, um nur Änderungen eines Raums zu erhalten.
+    """
+    if not _is_authenticated(request):
+        return JsonResponse({"detail": "Nicht authentifiziert."}, status=401)
+    # Der Stream selbst fragt die Datenbank nicht ab: Verbindung nicht offen halten
+    connection.close()
+
+    queue = hub.subscribe(request.GET.get('room') or None)
+    response = StreamingHttpResponse(_stream(queue), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Kein Puffern hinter nginx
+    return response
@@ -1,6 +1,6 @@
 from datetime import timedelta
 from collections import defaultdict
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q, Sum
 from django.utils import timezone
 from rest_framework import pagination, status, viewsets, serializers
@@ -15,8 +15,9 @@ from .models import (
     MotherPlantBatch, PackagingBatch, PackagingUnit, ProcessingBatch, ProductDistribution,
     SeedPurchaseImage, MotherPlantBatchImage, CuttingBatchImage, BloomingCuttingBatchImage, 
     FloweringPlantBatchImage, HarvestBatchImage, DryingBatchImage, ProcessingBatchImage, 
-    LabTestingBatchImage, SeedPurchase, PackagingBatchImage
+    LabTestingBatchImage, SeedPurchase, PackagingBatchImage, StrainCard, StrainCardBucket
 )
+from . import bulk_creation_service, consumption_service, strain_card_service
 from .serializers import (
     BloomingCuttingBatchSerializer, BloomingCuttingPlantSerializer, CuttingBatchSerializer,
     CuttingSerializer, DryingBatchSerializer, FloweringPlantBatchSerializer,
@@ -154,23 +155,20 @@ class SeedPurchaseViewSet(viewsets.ModelViewSet):
         if room_id:
             batch_kwargs['room_id'] = room_id
             
-        batch = MotherPlantBatch.objects.create(**batch_kwargs)
-        
-        # Erstelle für jede Mutterpflanze einen eigenen Eintrag im Batch mit eindeutiger Chargenummer
-        for _ in range(quantity):
-            # Die batch_number wird automatisch in der save-Methode generiert
-            MotherPlant.objects.create(
-                batch=batch,
-                notes=notes
-            )
+        with transaction.atomic():
+            batch = MotherPlantBatch.objects.create(**batch_kwargs)
             
-        # Aktualisiere die verfügbaren Samen
-        seed.remaining_quantity -= quantity
-        seed.save()
+            # Alle Mutterpflanzen mit vorab reservierten Chargennummern in einem Schritt anlegen
+            plants = bulk_creation_service.create_plants(MotherPlant, batch, quantity, notes=notes)
+                
+            # Aktualisiere die verfügbaren Samen
+            seed.remaining_quantity -= quantity
+            seed.save()
         
         return Response({
             "message": f"{quantity} Mutterpflanzen wurden erstellt",
-            "batch": MotherPlantBatchSerializer(batch).data
+            "batch": MotherPlantBatchSerializer(batch).data,
+            "plants": bulk_creation_service.describe_rows(plants)
         })
         
     @action(detail=True, methods=['post'])
@@ -200,23 +198,20 @@ class SeedPurchaseViewSet(viewsets.ModelViewSet):
         if room_id:
             batch_kwargs['room_id'] = room_id
             
-        batch = FloweringPlantBatch.objects.create(**batch_kwargs)
-        
-        # Erstelle für jede Blühpflanze einen eigenen Eintrag im Batch mit eindeutiger Chargenummer
-        for _ in range(quantity):
-            # Die batch_number wird automatisch in der save-Methode generiert
-            FloweringPlant.objects.create(
-                batch=batch,
-                notes=notes
-            )
+        with transaction.atomic():
+            batch = FloweringPlantBatch.objects.create(**batch_kwargs)
             
-        # Aktualisiere die verfügbaren Samen
-        seed.remaining_quantity -= quantity
-        seed.save()
+            # Alle Blühpflanzen mit vorab reservierten Chargennummern in einem Schritt anlegen
+            plants = bulk_creation_service.create_plants(FloweringPlant, batch, quantity, notes=notes)
+                
+            # Aktualisiere die verfügbaren Samen
+            seed.remaining_quantity -= quantity
+            seed.save()
         
         return Response({
             "message": f"{quantity} Blühpflanzen wurden erstellt",
-            "batch": FloweringPlantBatchSerializer(batch).data
+            "batch": FloweringPlantBatchSerializer(batch).data,
+            "plants": bulk_creation_service.describe_rows(plants)
         })
     
     @action(detail=True, methods=['post'])
@@ -546,19 +541,16 @@ class MotherPlantBatchViewSet(viewsets.ModelViewSet):
         if room_id:
             batch_kwargs['room_id'] = room_id
             
-        batch = CuttingBatch.objects.create(**batch_kwargs)
-        
-        # Erstelle für jeden Steckling einen eigenen Eintrag im Batch mit eindeutiger Chargenummer
-        for _ in range(quantity):
-            # Die batch_number wird automatisch in der save-Methode generiert
-            Cutting.objects.create(
-                batch=batch,
-                notes=notes
-            )
+        with transaction.atomic():
+            batch = CuttingBatch.objects.create(**batch_kwargs)
+            
+            # Alle Stecklinge mit vorab reservierten Chargennummern in einem Schritt anlegen
+            cuttings = bulk_creation_service.create_plants(Cutting, batch, quantity, notes=notes)
         
         return Response({
             "message": f"{quantity} Stecklinge wurden erstellt",
-            "batch": CuttingBatchSerializer(batch).data
+            "batch": CuttingBatchSerializer(batch).data,
+            "cuttings": bulk_creation_service.describe_rows(cuttings)
         })
 
 class FloweringPlantBatchViewSet(viewsets.ModelViewSet):
@@ -1099,33 +1091,33 @@ class CuttingBatchViewSet(viewsets.ModelViewSet):
             batch_kwargs['room_id'] = room_id
             
         try:
-            batch = BloomingCuttingBatch.objects.create(**batch_kwargs)
-            
-            # Erstelle für jede Blühpflanze einen eigenen Eintrag im Batch mit eindeutiger Chargenummer
-            for _ in range(quantity):
-                # Die batch_number wird automatisch in der save-Methode generiert
-                BloomingCuttingPlant.objects.create(
-                    batch=batch,
-                    notes=notes
+            with transaction.atomic():
+                batch = BloomingCuttingBatch.objects.create(**batch_kwargs)
+                
+                # Alle Blühpflanzen mit vorab reservierten Chargennummern in einem Schritt anlegen
+                plants = bulk_creation_service.create_plants(
+                    BloomingCuttingPlant, batch, quantity, notes=notes
+                )
+                
+                # Markiere die verwendeten Stecklinge als vernichtet und konvertiert
+                used_cutting_ids = list(cuttings_to_use.values_list('id', flat=True)[:quantity])
+                conversion_time = timezone.now()
+                
+                Cutting.objects.filter(id__in=used_cutting_ids).update(
+                    is_destroyed=True,
+                    destroy_reason=f"Zu Blühpflanze konvertiert (Charge: {batch.batch_number})",
+                    destroyed_at=conversion_time,
+                    destroyed_by_id=member_id,
+                    converted_to=batch.id,  # Speichern der Ziel-Batch-ID
+                    converted_at=conversion_time,
+                    converted_by_id=member_id,
+                    updated_at=conversion_time
                 )
-            
-            # Markiere die verwendeten Stecklinge als vernichtet und konvertiert
-            cuttings_to_mark = cuttings_to_use[:quantity]
-            conversion_time = timezone.now()
-            
-            for cutting in cuttings_to_mark:
-                cutting.is_destroyed = True
-                cutting.destroy_reason = f"Zu Blühpflanze konvertiert (Charge: {batch.batch_number})"
-                cutting.destroyed_at = conversion_time
-                cutting.destroyed_by_id = member_id
-                cutting.converted_to = batch.id  # Speichern der Ziel-Batch-ID
-                cutting.converted_at = conversion_time
-                cutting.converted_by_id = member_id
-                cutting.save()
                 
             return Response({
                 "message": f"{quantity} Blühpflanzen wurden aus Stecklingen erstellt",
-                "batch": BloomingCuttingBatchSerializer(batch).data
+                "batch": BloomingCuttingBatchSerializer(batch).data,
+                "plants": bulk_creation_service.describe_rows(plants)
             })
         
         except Exception as e:
@@ -1175,18 +1167,18 @@ class MotherPlantViewSet(viewsets.ModelViewSet):
         else:
             batch_kwargs['notes'] = plant_notes
             
-        cutting_batch = CuttingBatch.objects.create(**batch_kwargs)
-        
-        # Erstelle für jeden Steckling einen eigenen Eintrag mit eindeutiger Nummer
-        for _ in range(quantity):
-            Cutting.objects.create(
-                batch=cutting_batch,
-                notes=batch_kwargs['notes']
+        with transaction.atomic():
+            cutting_batch = CuttingBatch.objects.create(**batch_kwargs)
+            
+            # Alle Stecklinge mit vorab reservierten Chargennummern in einem Schritt anlegen
+            cuttings = bulk_creation_service.create_plants(
+                Cutting, cutting_batch, quantity, notes=batch_kwargs['notes']
             )
         
         return Response({
             "message": f"{quantity} Stecklinge wurden von Mutterpflanze {plant.batch_number} erstellt",
-            "batch": CuttingBatchSerializer(cutting_batch).data
+            "batch": CuttingBatchSerializer(cutting_batch).data,
+            "cuttings": bulk_creation_service.describe_rows(cuttings)
         })
 
 class BloomingCuttingBatchViewSet(viewsets.ModelViewSet):
@@ -2389,10 +2381,12 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def convert_to_packaging(self, request, pk=None):
         """
         🆕 ERWEITERT: Konvertiert eine freigegebene Laborkontrolle zu mehreren Verpackungen MIT PREISUNTERSTÜTZUNG.
         Unterstützt sowohl Einzelverpackungen als auch mehrere Verpackungslinien.
+        Alle Verpackungen und Einheiten werden in einer Transaktion angelegt.
         """
         lab_batch = self.get_object()
         
@@ -2460,11 +2454,13 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                         try:
                             line_price_per_gram = float(line_price_per_gram)
                             if line_price_per_gram < 0:
+                                transaction.set_rollback(True)
                                 return Response(
                                     {"error": f"Der Preis pro Gramm in Zeile {idx+1} kann nicht negativ sein"},
                                     status=status.HTTP_400_BAD_REQUEST
                                 )
                         except (ValueError, TypeError):
+                            transaction.set_rollback(True)
                             return Response(
                                 {"error": f"Ungültiger Preis pro Gramm in Zeile {idx+1}"},
                                 status=status.HTTP_400_BAD_REQUEST
@@ -2475,12 +2471,14 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                     
                     # Validierung für diese Verpackungslinie
                     if unit_count <= 0:
+                        transaction.set_rollback(True)
                         return Response(
                             {"error": f"Die Anzahl der Einheiten in Zeile {idx+1} muss größer als 0 sein"},
                             status=status.HTTP_400_BAD_REQUEST
                         )
                         
                     if unit_weight < 5.0:
+                        transaction.set_rollback(True)
                         return Response(
                             {"error": f"Das Gewicht pro Einheit in Zeile {idx+1} muss mindestens 5g betragen"},
                             status=status.HTTP_400_BAD_REQUEST
@@ -2489,6 +2487,7 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                     # Prüfen, ob Gesamtgewicht korrekt berechnet wurde
                     calculated_weight = unit_count * unit_weight
                     if abs(calculated_weight - total_line_weight) > 0.1:
+                        transaction.set_rollback(True)
                         return Response(
                             {"error": f"Inkonsistentes Gesamtgewicht in Zeile {idx+1}: {total_line_weight}g ≠ {unit_count} × {unit_weight}g"},
                             status=status.HTTP_400_BAD_REQUEST
@@ -2516,6 +2515,7 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                     total_weight_used += total_line_weight
                     
                 except (ValueError, TypeError) as e:
+                    transaction.set_rollback(True)
                     return Response(
                         {"error": f"Fehler in Zeile {idx+1}: {str(e)}"},
                         status=status.HTTP_400_BAD_REQUEST
@@ -2524,9 +2524,8 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
             # Prüfen, ob das verarbeitete Gesamtgewicht gültig ist
             available_weight = lab_batch.remaining_weight
             if total_weight_used > available_weight:
-                # Löschen der bereits erstellten Verpackungen, um Dateninkonsistenzen zu vermeiden
-                for packaging in created_packagings:
-                    packaging.delete()
+                # Bereits erstellte Verpackungen verwerfen, um Dateninkonsistenzen zu vermeiden
+                transaction.set_rollback(True)
                     
                 return Response(
                     {"error": f"Gesamtgewicht aller Verpackungslinien ({total_weight_used}g) überschreitet das verfügbare Gewicht ({available_weight}g)"},
@@ -2565,7 +2564,8 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                 "message": f"{len(created_packagings)} Verpackungsbatches mit insgesamt {total_weight_used}g wurden erstellt",
                 "packaging_count": len(created_packagings),
                 "total_weight": total_weight_used,
-                "packagings": [PackagingBatchSerializer(pkg).data for pkg in created_packagings]
+                "packagings": [PackagingBatchSerializer(pkg).data for pkg in created_packagings],
+                "units": self._describe_packaging_units(created_packagings)
             }
             
             # 🆕 PREISINFORMATIONEN HINZUFÜGEN:
@@ -2667,7 +2667,8 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
             # 🆕 ERWEITERTE ERFOLGSMELDUNG FÜR EINZELVERPACKUNG:
             response_data = {
                 "message": f"Verpackung mit {total_weight}g wurde erfolgreich erstellt",
-                "packaging": PackagingBatchSerializer(packaging).data
+                "packaging": PackagingBatchSerializer(packaging).data,
+                "units": self._describe_packaging_units([packaging])
             }
             
             # 🆕 PREISINFORMATIONEN HINZUFÜGEN:
@@ -2682,6 +2683,24 @@ class LabTestingBatchViewSet(viewsets.ModelViewSet):
                 })
             
             return Response(response_data)
+    
+    def _describe_packaging_units(self, packagings):
+        """Chargennummern der angelegten Einheiten je Verpackungs-Batch"""
+        units_by_batch = defaultdict(list)
+        units = PackagingUnit.objects.filter(
+            batch__in=packagings
+        ).only('id', 'batch_number', 'batch_id').order_by('batch_number')
+        for unit in units:
+            units_by_batch[unit.batch_id].append(unit)
+        
+        return [
+            {
+                'packaging_batch_id': str(packaging.id),
+                'packaging_batch_number': packaging.batch_number,
+                'units': bulk_creation_service.describe_rows(units_by_batch[packaging.id])
+            }
+            for packaging in packagings
+        ]
 
 class PackagingBatchViewSet(viewsets.ModelViewSet):
     queryset = PackagingBatch.objects.all().order_by('-created_at')
@@ -2884,59 +2903,49 @@ class PackagingBatchViewSet(viewsets.ModelViewSet):
 
 class StrainCardViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    🚀 VOLLSTÄNDIG KORRIGIERTE StrainCard API - Intelligente Sorten-Gruppierung
+    🚀 StrainCard API - paginiert über den materialisierten Sortenkarten-Index
+    (StrainCard / StrainCardBucket, siehe strain_card_service)
     """
     permission_classes = [IsAuthenticated]
     pagination_class = StrainCardPagination
     
     def get_queryset(self):
         """
-        Da source_strain eine Property ist, müssen wir die Aggregation in Python machen
+        Verfügbare Units mit allen Unit-Filtern (für Seiteninhalt und Einzel-Abfragen)
         """
-        # Basis-Query: Nur verfügbare Units mit allen nötigen Relations
-        base_queryset = PackagingUnit.objects.filter(
-            is_destroyed=False
-        ).exclude(
-            distributions__isnull=False
-        ).select_related(
-            'batch',
-            'batch__lab_testing_batch',
-            'batch__lab_testing_batch__processing_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase__strain',
-        )
+        base_queryset = strain_card_service.available_units()
         
         # Empfänger-basierte THC-Filterung
-        recipient_id = self.request.query_params.get('recipient_id')
-        if recipient_id:
-            try:
-                from members.models import Member
-                recipient = Member.objects.get(id=recipient_id)
-                if hasattr(recipient, 'age_class') and recipient.age_class == "18+":
-                    base_queryset = base_queryset.filter(
-                        Q(batch__lab_testing_batch__thc_content__lte=10.0) | 
-                        Q(batch__lab_testing_batch__thc_content__isnull=True)
-                    )
-            except Member.DoesNotExist:
-                pass
+        if self._is_u21_recipient():
+            base_queryset = base_queryset.filter(
+                Q(lineage_thc_content__lte=10.0) | 
+                Q(lineage_thc_content__isnull=True)
+            )
         
         # Backend-Filter anwenden (alles außer strain_name)
         base_queryset = self._apply_backend_filters(base_queryset)
         
         return base_queryset
     
+    def _is_u21_recipient(self):
+        recipient_id = self.request.query_params.get('recipient_id')
+        if not recipient_id:
+            return False
+        
+        from members.models import Member
+        try:
+            recipient = Member.objects.get(id=recipient_id)
+        except Member.DoesNotExist:
+            return False
+        return hasattr(recipient, 'age_class') and recipient.age_class == "18+"
+    
     def _apply_backend_filters(self, queryset):
         """Backend-Filter die in SQL funktionieren"""
         
         # Produkttyp-Filter
         product_type = self.request.query_params.get('product_type')
         if product_type:
-            queryset = queryset.filter(
-                batch__lab_testing_batch__processing_batch__product_type=product_type
-            )
+            queryset = queryset.filter(lineage_product_type=product_type)
         
         # Gewichts-Filter
         weight = self.request.query_params.get('weight')
@@ -2951,18 +2960,14 @@ class StrainCardViewSet(viewsets.ReadOnlyModelViewSet):
         min_thc = self.request.query_params.get('min_thc')
         if min_thc:
             try:
-                queryset = queryset.filter(
-                    batch__lab_testing_batch__thc_content__gte=float(min_thc)
-                )
+                queryset = queryset.filter(lineage_thc_content__gte=float(min_thc))
             except (ValueError, TypeError):
                 pass
                 
         max_thc = self.request.query_params.get('max_thc')
         if max_thc:
             try:
-                queryset = queryset.filter(
-                    batch__lab_testing_batch__thc_content__lte=float(max_thc)
-                )
+                queryset = queryset.filter(lineage_thc_content__lte=float(max_thc))
             except (ValueError, TypeError):
                 pass
         
@@ -2976,342 +2981,101 @@ class StrainCardViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
-    def _extract_strain_name(self, unit):
-        """
-        Extrahiert Strain-Namen wie in PackagingUnitViewSet.distinct_strains()
-        """
-        name = None
-        try:
-            name = unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch.flowering_batch.seed_purchase.strain.name
-        except Exception:
-            pass
-        if not name:
+    def _get_bucket_queryset(self):
+        """Dieselben Filter wie _apply_backend_filters, aber auf Bucket-Ebene des Index"""
+        buckets = StrainCardBucket.objects.all()
+        
+        if self._is_u21_recipient():
+            buckets = buckets.filter(
+                Q(thc_content__lte=10.0) | Q(thc_content__isnull=True)
+            )
+        
+        weight = self.request.query_params.get('weight')
+        if weight:
             try:
-                name = unit.batch.flowering_batch.seed_purchase.strain.name
-            except Exception:
+                buckets = buckets.filter(weight=float(weight))
+            except (ValueError, TypeError):
                 pass
-        if not name:
+        
+        min_thc = self.request.query_params.get('min_thc')
+        if min_thc:
             try:
-                name = unit.batch.seed_purchase.strain.name
-            except Exception:
+                buckets = buckets.filter(thc_content__gte=float(min_thc))
+            except (ValueError, TypeError):
                 pass
-        if not name:
-            name = getattr(unit.batch, "source_strain", None) or getattr(unit, "source_strain", None)
-        if not name:
-            name = getattr(unit, "strain_name", None)
         
-        return name if name and name != "Unbekannt" else "Unbekannte Sorte"
-    
-    def _get_cannabis_batch_id(self, unit):
-        """🔧 NEU: Ermittelt die echte Cannabis-Charge-ID"""
-        try:
-            # Versuche über harvest_batch (die echte Cannabis-Charge)
-            if (unit.batch and 
-                unit.batch.lab_testing_batch and 
-                unit.batch.lab_testing_batch.processing_batch and
-                unit.batch.lab_testing_batch.processing_batch.drying_batch and
-                unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch):
-                harvest_batch = unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch
-                return f"harvest_{harvest_batch.id}"
-        except Exception:
-            pass
-        
-        # Fallback: processing_batch
-        try:
-            if (unit.batch and 
-                unit.batch.lab_testing_batch and 
-                unit.batch.lab_testing_batch.processing_batch):
-                processing_batch = unit.batch.lab_testing_batch.processing_batch
-                return f"processing_{processing_batch.id}"
-        except Exception:
-            pass
-        
-        # Notfall-Fallback
-        return f"packaging_{unit.batch.id}" if unit.batch else None
-    
-    def _group_units_to_strain_cards(self, units):
-        """
-        🎯 ERWEITERTE LOGIK: THC-Bereich bei mehreren Cannabis-Chargen + PREISE
-        """
-        strain_filter = self.request.query_params.get('strain_name', '').strip()
-        
-        # Gruppierung nach Sorte
-        strain_groups = defaultdict(lambda: {
-            'units': [],
-            'available_weights': set(),
-            'weight_counts': defaultdict(int),
-            'thc_values_by_batch': defaultdict(list),
-            'cannabis_batches': set(),
-            # 🆕 NEUE PREIS-STRUKTUREN
-            'price_ranges': defaultdict(list),  # Preise pro Gewicht
-            'min_price': float('inf'),
-            'max_price': 0
-        })
+        max_thc = self.request.query_params.get('max_thc')
+        if max_thc:
+            try:
+                buckets = buckets.filter(thc_content__lte=float(max_thc))
+            except (ValueError, TypeError):
+                pass
         
-        for unit in units:
-            strain_name = self._extract_strain_name(unit)
-            
-            if strain_filter and strain_name != strain_filter:
-                continue
-            
-            weight = float(unit.weight) if unit.weight else 0
-            
-            strain_data = strain_groups[strain_name]
-            strain_data['units'].append(unit)
-            strain_data['available_weights'].add(weight)
-            strain_data['weight_counts'][weight] += 1
-            
-            # 🆕 PREISE SAMMELN
-            if unit.unit_price:
-                price = float(unit.unit_price)
-                strain_data['price_ranges'][weight].append(price)
-                strain_data['min_price'] = min(strain_data['min_price'], price)
-                strain_data['max_price'] = max(strain_data['max_price'], price)
-            
-            # Cannabis-Charge-ID ermitteln
-            cannabis_batch_id = self._get_cannabis_batch_id(unit)
-            if cannabis_batch_id:
-                strain_data['cannabis_batches'].add(cannabis_batch_id)
-                
-                # THC-Werte pro Cannabis-Charge sammeln
-                if (unit.batch and 
-                    unit.batch.lab_testing_batch and 
-                    unit.batch.lab_testing_batch.thc_content):
-                    thc_value = float(unit.batch.lab_testing_batch.thc_content)
-                    strain_data['thc_values_by_batch'][cannabis_batch_id].append(thc_value)
-        
-        # Konvertiere zu StrainCard-Format
-        strain_cards = []
-        for strain_name, data in strain_groups.items():
-            if not data['units']:
-                continue
-            
-            first_unit = data['units'][0]
-            
-            # Produkttyp ermitteln
-            product_type = 'unknown'
-            product_type_display = 'Unbekannt'
-            if (first_unit.batch and 
-                first_unit.batch.lab_testing_batch and 
-                first_unit.batch.lab_testing_batch.processing_batch):
-                processing_batch = first_unit.batch.lab_testing_batch.processing_batch
-                product_type = processing_batch.product_type
-                product_type_display = processing_batch.get_product_type_display()
-            
-            # THC-BEREICH BERECHNEN (bestehender Code)
-            thc_display = "k.A."
-            if data['thc_values_by_batch']:
-                all_thc_values = set()
-                for cannabis_batch_id, thc_list in data['thc_values_by_batch'].items():
-                    if thc_list:
-                        avg_thc_for_batch = sum(thc_list) / len(thc_list)
-                        all_thc_values.add(round(avg_thc_for_batch, 1))
-                
-                if len(all_thc_values) == 1:
-                    thc_display = f"{list(all_thc_values)[0]}"
-                elif len(all_thc_values) > 1:
-                    min_thc = min(all_thc_values)
-                    max_thc = max(all_thc_values)
-                    thc_display = f"{min_thc} - {max_thc}"
-            
-            # 🆕 PREIS-INFORMATIONEN BERECHNEN
-            price_info = {
-                'has_prices': data['min_price'] != float('inf'),
-                'min_price': data['min_price'] if data['min_price'] != float('inf') else None,
-                'max_price': data['max_price'] if data['max_price'] > 0 else None,
-                'price_by_weight': {}
-            }
-            
-            # Preis pro Gewicht berechnen
-            for weight, prices in data['price_ranges'].items():
-                if prices:
-                    min_price_for_weight = min(prices)
-                    max_price_for_weight = max(prices)
-                    if min_price_for_weight == max_price_for_weight:
-                        price_info['price_by_weight'][weight] = {
-                            'price': min_price_for_weight,
-                            'display': f"{min_price_for_weight:.2f} €"
-                        }
-                    else:
-                        price_info['price_by_weight'][weight] = {
-                            'min': min_price_for_weight,
-                            'max': max_price_for_weight,
-                            'display': f"{min_price_for_weight:.2f} - {max_price_for_weight:.2f} €"
-                        }
-            
-            # Preis pro Gramm berechnen (vom ersten Unit mit Preis)
-            price_per_gram = None
-            for unit in data['units']:
-                if unit.unit_price and unit.weight:
-                    price_per_gram = float(unit.unit_price) / float(unit.weight)
-                    break
-            
-            # Gewichts-Optionen mit Preisen
-            size_options = []
-            for weight in sorted(data['available_weights']):
-                count = data['weight_counts'][weight]
-                price_display = ""
-                if weight in price_info['price_by_weight']:
-                    price_display = f" • {price_info['price_by_weight'][weight]['display']}"
-                size_options.append(f"{weight}g ({count}x){price_display}")
-            
-            # Available units mit Preisen
-            available_units = []
-            for unit in data['units']:
-                unit_data = {
-                    'id': str(unit.id),
-                    'batch_number': unit.batch_number,
-                    'weight': float(unit.weight) if unit.weight else 0,
-                    'packaging_batch_id': unit.batch.id if unit.batch else None,
-                    'cannabis_batch_id': self._get_cannabis_batch_id(unit),
-                    # 🆕 PREIS HINZUFÜGEN
-                    'unit_price': float(unit.unit_price) if unit.unit_price else None,
-                    'price_display': f"{float(unit.unit_price):.2f} €" if unit.unit_price else None
-                }
-                available_units.append(unit_data)
-            
-            cannabis_batch_count = len(data['cannabis_batches'])
-            
-            # StrainCard mit Preisinformationen
-            strain_card = {
-                'id': f"strain_{strain_name.replace(' ', '_')}",
-                'strain_name': strain_name,
-                'product_type': product_type,
-                'product_type_display': product_type_display,
-                'total_unit_count': len(data['units']),
-                'avg_thc_content': thc_display,
-                'size_options': size_options,
-                'available_weights': sorted(data['available_weights']),
-                'batch_count': cannabis_batch_count,
-                'cannabis_batches': list(data['cannabis_batches']),
-                'available_units': available_units,
-                # 🆕 PREIS-INFORMATIONEN
-                'price_info': price_info,
-                'price_per_gram': f"{price_per_gram:.2f}" if price_per_gram else None,
-                'price_display': price_info['price_by_weight'][sorted(data['available_weights'])[0]]['display'] if price_info['has_prices'] and data['available_weights'] else None,
-                'first_unit': {
-                    'id': str(first_unit.id),
-                    'batch_number': first_unit.batch_number,
-                    'weight': float(first_unit.weight) if first_unit.weight else 0,
-                    'unit_price': float(first_unit.unit_price) if first_unit.unit_price else None
-                }
-            }
-            
-            strain_cards.append(strain_card)
+        # Die Batch-Nummern-Suche betrifft einzelne Units und läuft als Subquery
+        if self.request.query_params.get('search'):
+            buckets = buckets.filter(
+                packaging_batch_id__in=self.get_queryset().values('batch_id')
+            )
         
-        strain_cards.sort(key=lambda x: x['strain_name'])
-        return strain_cards
+        return buckets
     
-    def list(self, request, *args, **kwargs):
-        """Custom List Response mit manueller Pagination"""
-        # Hole alle Units (mit Filtern)
-        units_queryset = self.get_queryset()
+    def _get_card_queryset(self):
+        cards = StrainCard.objects.all()
         
-        print(f"🔍 StrainCard: {units_queryset.count()} verfügbare Units gefunden")
-        
-        # Konvertiere zu StrainCards (in Python, da source_strain Property ist)
-        all_strain_cards = self._group_units_to_strain_cards(units_queryset)
-        
-        print(f"🌿 StrainCard: {len(all_strain_cards)} Strain-Karten erstellt")
-        
-        # 🔧 DEBUG: Zeige erste Karte für Diagnose
-        if all_strain_cards:
-            first_card = all_strain_cards[0]
-            print(f"🔍 Erste Karte: {first_card['strain_name']}")
-            print(f"   - Gewichte: {first_card['available_weights']}")
-            print(f"   - Units: {first_card['total_unit_count']}")
-            print(f"   - Cannabis-Chargen: {first_card['batch_count']}")
-            print(f"   - Chargen-IDs: {first_card['cannabis_batches']}")
-            print(f"   - Available Units: {len(first_card['available_units'])}")
-        
-        # Manuelle Pagination
-        page_size = int(request.query_params.get('page_size', 12))
-        page_number = int(request.query_params.get('page', 1))
-        
-        start_index = (page_number - 1) * page_size
-        end_index = start_index + page_size
-        
-        paginated_cards = all_strain_cards[start_index:end_index]
-        
-        # Response im DRF-Pagination-Format
-        has_next = end_index < len(all_strain_cards)
-        has_previous = page_number > 1
+        strain_name = self.request.query_params.get('strain_name', '').strip()
+        if strain_name:
+            cards = cards.filter(strain_name=strain_name)
         
-        response_data = {
-            'count': len(all_strain_cards),
-            'next': f"?page={page_number + 1}&page_size={page_size}" if has_next else None,
-            'previous': f"?page={page_number - 1}&page_size={page_size}" if has_previous else None,
-            'results': paginated_cards
-        }
+        product_type = self.request.query_params.get('product_type')
+        if product_type:
+            cards = cards.filter(product_type=product_type)
         
-        return Response(response_data)
+        return cards.filter(
+            id__in=self._get_bucket_queryset().values('card_id')
+        ).order_by('strain_name', 'product_type')
+    
+    def list(self, request, *args, **kwargs):
+        """Paginiert die Sortenkarten in SQL und baut nur die aktuelle Seite auf"""
+        page = self.paginate_queryset(self._get_card_queryset())
+        strain_cards = strain_card_service.build_strain_cards(page, self.get_queryset())
+        return self.get_paginated_response(strain_cards)
     
     @action(detail=False, methods=['get'])
     def filter_options(self, request):
         """Lade verfügbare Filter-Optionen"""
+        buckets = StrainCardBucket.objects.all()
+        if self._is_u21_recipient():
+            buckets = buckets.filter(
+                Q(thc_content__lte=10.0) | Q(thc_content__isnull=True)
+            )
         
-        # Basis-Query ohne Strain-Filter
-        base_queryset = PackagingUnit.objects.filter(
-            is_destroyed=False
-        ).exclude(
-            distributions__isnull=False
-        ).select_related(
-            'batch__lab_testing_batch__processing_batch'
-        )
-        
-        # Empfänger-Filter anwenden
-        recipient_id = request.query_params.get('recipient_id')
-        if recipient_id:
-            try:
-                from members.models import Member
-                recipient = Member.objects.get(id=recipient_id)
-                if hasattr(recipient, 'age_class') and recipient.age_class == "18+":
-                    base_queryset = base_queryset.filter(
-                        Q(batch__lab_testing_batch__thc_content__lte=10.0) | 
-                        Q(batch__lab_testing_batch__thc_content__isnull=True)
-                    )
-            except Member.DoesNotExist:
-                pass
-        
-        # Verfügbare Gewichte (SQL-Abfrage möglich)
-        available_weights = base_queryset.values_list(
+        available_weights = buckets.order_by('weight').values_list(
             'weight', flat=True
-        ).distinct().order_by('weight')
+        ).distinct()
         
         weight_options = [
             {'value': str(weight), 'label': f'{weight}g'}
-            for weight in available_weights if weight is not None
+            for weight in available_weights
         ]
         
-        # Verfügbare Sorten (PYTHON-basiert, da source_strain Property ist)
-        available_strains = set()
-        
-        # Nehme eine begrenzte Anzahl Units für Performance
-        sample_units = base_queryset[:500]  # Limitiere für Performance
-        
-        for unit in sample_units:
-            strain_name = self._extract_strain_name(unit)
-            if strain_name and strain_name != 'Unbekannte Sorte':
-                available_strains.add(strain_name)
-        
-        strain_options = [
-            {'name': strain} 
-            for strain in sorted(available_strains)
-        ]
+        available_strains = StrainCard.objects.filter(
+            id__in=buckets.values('card_id')
+        ).exclude(
+            strain_name=strain_card_service.UNKNOWN_STRAIN
+        ).order_by('strain_name').values_list('strain_name', flat=True).distinct()
         
-        print(f"🔍 Filter-Optionen: {len(weight_options)} Gewichte, {len(strain_options)} Sorten")
+        strain_options = [{'name': strain} for strain in available_strains]
         
         return Response({
             'weight_options': weight_options,
             'strain_options': strain_options,
-            'total_available_units': base_queryset.count()
+            'total_available_units': buckets.aggregate(total=Sum('unit_count'))['total'] or 0
         })
     
     @action(detail=False, methods=['get'])
     def available_units_for_strain(self, request):
         """
-        🎯 KORRIGIERTER ENDPOINT: Alle verfügbaren Units einer bestimmten Sorte
-        Ermöglicht das Abrufen aller Units einer Sorte über alle Batches hinweg
+        🎯 Alle verfügbaren Units einer bestimmten Sorte über alle Batches hinweg
         """
         strain_name = request.query_params.get('strain_name')
         weight = request.query_params.get('weight')
@@ -3322,34 +3086,19 @@ class StrainCardViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Alle verfügbaren Units der Sorte
-        units = self.get_queryset()
-        
-        # Filtere nach Strain-Namen (in Python, da Property)
-        matching_units = []
-        cannabis_batches = set()
+        units = self.get_queryset().filter(
+            lineage_strain_name='' if strain_name == strain_card_service.UNKNOWN_STRAIN else strain_name
+        ).select_related(*strain_card_service.PACKAGING_UNIT_RELATED)
+        if weight:
+            try:
+                units = units.filter(weight=float(weight))
+            except (ValueError, TypeError):
+                units = units.none()
         
-        for unit in units:
-            unit_strain_name = self._extract_strain_name(unit)
-            if unit_strain_name == strain_name:
-                # Optional: Auch nach Gewicht filtern
-                if weight:
-                    try:
-                        weight_value = float(weight)
-                        if float(unit.weight) == weight_value:
-                            matching_units.append(unit)
-                            # Cannabis-Charge tracken
-                            cannabis_batch_id = self._get_cannabis_batch_id(unit)
-                            if cannabis_batch_id:
-                                cannabis_batches.add(cannabis_batch_id)
-                    except (ValueError, TypeError):
-                        pass
-                else:
-                    matching_units.append(unit)
-                    # Cannabis-Charge tracken
-                    cannabis_batch_id = self._get_cannabis_batch_id(unit)
-                    if cannabis_batch_id:
-                        cannabis_batches.add(cannabis_batch_id)
+        matching_units = list(units)
+        cannabis_batches = {
+            strain_card_service.get_batch_cannabis_id(unit.batch) for unit in matching_units
+        }
         
         # Gruppiere nach Gewicht für bessere Übersicht
         weight_groups = defaultdict(list)
@@ -3360,20 +3109,17 @@ class StrainCardViewSet(viewsets.ReadOnlyModelViewSet):
         response_data = {
             'strain_name': strain_name,
             'total_units': len(matching_units),
-            'cannabis_batch_count': len(cannabis_batches),  # 🔧 NEU: Cannabis-Chargen-Anzahl
-            'cannabis_batches': list(cannabis_batches),     # 🔧 NEU: Liste der Cannabis-Chargen
+            'cannabis_batch_count': len(cannabis_batches),
+            'cannabis_batches': list(cannabis_batches),
             'weight_groups': {}
         }
         
-        # 🔧 KORREKTUR: Alle Units zurückgeben (keine Limitierung!)
         for weight, units_list in weight_groups.items():
             response_data['weight_groups'][f"{weight}g"] = {
                 'count': len(units_list),
-                'units': PackagingUnitSerializer(units_list, many=True).data  # 🔧 ALLE Units!
+                'units': PackagingUnitSerializer(units_list, many=True).data
             }
         
-        print(f"🎯 Units für Sorte '{strain_name}': {len(matching_units)} gefunden, {len(weight_groups)} Gewichtsgruppen, {len(cannabis_batches)} Cannabis-Chargen")
-        
         return Response(response_data)
     
     @action(detail=False, methods=['get'])
@@ -3609,31 +3355,10 @@ class PackagingUnitViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def distinct_strains(self, request):
-        strains = set()
-        for unit in PackagingUnit.objects.all():
-            # Name extrahieren wie in der Tabelle
-            name = None
-            try:
-                name = unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch.flowering_batch.seed_purchase.strain.name
-            except Exception:
-                pass
-            if not name:
-                try:
-                    name = unit.batch.flowering_batch.seed_purchase.strain.name
-                except Exception:
-                    pass
-            if not name:
-                try:
-                    name = unit.batch.seed_purchase.strain.name
-                except Exception:
-                    pass
-            if not name:
-                name = getattr(unit.batch, "source_strain", None) or getattr(unit, "source_strain", None)
-            if not name:
-                name = getattr(unit, "strain_name", None)
-            if name and name != "Unbekannt":
-                strains.add(name)
-        return Response([{"name": n} for n in sorted(strains)])
+        strains = PackagingUnit.objects.exclude(
+            lineage_strain_name__in=['', 'Unbekannt']
+        ).order_by('lineage_strain_name').values_list('lineage_strain_name', flat=True).distinct()
+        return Response([{"name": n} for n in strains])
 
     @action(detail=False, methods=['get'])
     def get_units_for_strain_card(self, request):
@@ -3657,70 +3382,22 @@ class PackagingUnitViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Alle verfügbaren Units
-        units = PackagingUnit.objects.filter(
-            is_destroyed=False,
+        # Verfügbare Units der Sorte (Index auf lineage_strain_name + weight)
+        matching_units = strain_card_service.available_units().filter(
+            lineage_strain_name=self._lineage_strain_name(strain_name),
             weight=weight_value
-        ).exclude(
-            distributions__isnull=False
-        ).select_related(
-            'batch',
-            'batch__lab_testing_batch',
-            'batch__lab_testing_batch__processing_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase__strain',
-        )
-        
-        # Filtere Units nach Strain-Namen (in Python)
-        matching_units = []
-        for unit in units:
-            unit_strain_name = self._extract_strain_name_for_unit(unit)
-            if unit_strain_name == strain_name:
-                matching_units.append(unit)
-        
-        # Limitiere für Performance
-        matching_units = matching_units[:10]
+        ).select_related(*strain_card_service.PACKAGING_UNIT_RELATED)[:10]
         
         serializer = PackagingUnitSerializer(matching_units, many=True)
         return Response(serializer.data)
     
-    def _extract_strain_name_for_unit(self, unit):
-        """Hilfsfunktion für Strain-Name-Extraktion"""
-        name = None
-        try:
-            name = unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch.flowering_batch.seed_purchase.strain.name
-        except Exception:
-            pass
-        if not name:
-            try:
-                name = unit.batch.flowering_batch.seed_purchase.strain.name
-            except Exception:
-                pass
-        if not name:
-            try:
-                name = unit.batch.seed_purchase.strain.name
-            except Exception:
-                pass
-        if not name:
-            name = getattr(unit.batch, "source_strain", None) or getattr(unit, "source_strain", None)
-        if not name:
-            name = getattr(unit, "strain_name", None)
-        
-        return name if name and name != "Unbekannt" else "Unbekannte Sorte"
+    def _lineage_strain_name(self, strain_name):
+        """Übersetzt den Anzeigenamen unbekannter Sorten auf den gespeicherten Wert"""
+        return '' if strain_name == strain_card_service.UNKNOWN_STRAIN else strain_name
 
     def get_queryset(self):
         queryset = PackagingUnit.objects.select_related(
-            'batch',
-            'batch__lab_testing_batch',
-            'batch__lab_testing_batch__processing_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase',
-            'batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase__strain',
+            *strain_card_service.PACKAGING_UNIT_RELATED
         ).all()
 
         weight = self.request.query_params.get('weight')
@@ -3735,14 +3412,14 @@ class PackagingUnitViewSet(viewsets.ModelViewSet):
         # Produkttyp-Filter
         product_type = self.request.query_params.get('product_type')
         if product_type:
-            queryset = queryset.filter(batch__lab_testing_batch__processing_batch__product_type=product_type)
+            queryset = queryset.filter(lineage_product_type=product_type)
 
         # THC-Filter
         min_thc = self.request.query_params.get('min_thc')
         if min_thc:
             try:
                 min_thc_value = float(min_thc)
-                queryset = queryset.filter(batch__lab_testing_batch__thc_content__gte=min_thc_value)
+                queryset = queryset.filter(lineage_thc_content__gte=min_thc_value)
             except (ValueError, TypeError):
                 pass
 
@@ -3750,49 +3427,22 @@ class PackagingUnitViewSet(viewsets.ModelViewSet):
         if max_thc:
             try:
                 max_thc_value = float(max_thc)
-                queryset = queryset.filter(batch__lab_testing_batch__thc_content__lte=max_thc_value)
+                queryset = queryset.filter(lineage_thc_content__lte=max_thc_value)
             except (ValueError, TypeError):
                 pass
 
-        # Strain-Filter (bestehende Logik beibehalten)
+        # Strain-Filter
         strain_name = self.request.query_params.get('strain_name')
         if strain_name:
-            pks = []
-            for unit in queryset:
-                name = None
-                try:
-                    name = unit.batch.lab_testing_batch.processing_batch.drying_batch.harvest_batch.flowering_batch.seed_purchase.strain.name
-                except Exception:
-                    pass
-                if not name:
-                    try:
-                        name = unit.batch.flowering_batch.seed_purchase.strain.name
-                    except Exception:
-                        pass
-                if not name:
-                    try:
-                        name = unit.batch.seed_purchase.strain.name
-                    except Exception:
-                        pass
-                if not name:
-                    name = getattr(unit.batch, "source_strain", None) or getattr(unit, "source_strain", None)
-                if not name:
-                    name = getattr(unit, "strain_name", None)
-                if name == strain_name:
-                    pks.append(unit.pk)
-            queryset = queryset.filter(pk__in=pks)
+            queryset = queryset.filter(lineage_strain_name=self._lineage_strain_name(strain_name))
 
         # Suchfilter
         search = self.request.query_params.get('search')
         if search:
             queryset = queryset.filter(
                 Q(batch_number__icontains=search) |
-                Q(batch__source_strain__icontains=search) |
-                Q(batch__lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase__strain__name__icontains=search)
+                Q(lineage_strain_name__icontains=search)
             )
-
-        # Debug-Ausgabe für Entwicklung
-        print(f"📊 Queryset Count nach Filterung: {queryset.count()}")
         
         return queryset
     
@@ -3843,145 +3493,90 @@ class ProductDistributionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Empfänger laden
-        try:
-            from members.models import Member
-            recipient = Member.objects.get(id=recipient_id)
-        except Member.DoesNotExist:
-            return Response(
-                {"error": "Empfänger nicht gefunden"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Altersklasse bestimmen
-        age_class = recipient.age_class if hasattr(recipient, 'age_class') else "21+"
-        is_u21 = age_class == "18+"
-        
-        # Limits basierend auf Altersklasse
-        daily_limit = 25.0
-        monthly_limit = 30.0 if is_u21 else 50.0
-        max_thc_percentage = 10.0 if is_u21 else None
+        from members.models import Member
         
-        # Aktuelles Datum
-        today = timezone.now().date()
-        month_start = today.replace(day=1)
-        
-        # Bisherige Ausgaben abrufen
-        daily_consumption = ProductDistribution.objects.filter(
-            recipient_id=recipient_id,
-            distribution_date__date=today
-        ).aggregate(
-            total_weight=Sum('packaging_units__weight')
-        )['total_weight'] or 0
-        
-        monthly_consumption = ProductDistribution.objects.filter(
-            recipient_id=recipient_id,
-            distribution_date__date__gte=month_start,
-            distribution_date__date__lte=today
-        ).aggregate(
-            total_weight=Sum('packaging_units__weight')
-        )['total_weight'] or 0
-        
-        # Gewicht der ausgewählten Einheiten berechnen und Preisberechnung
-        selected_weight = 0
-        total_price = 0
-        thc_violations = []
-        
-        for unit_id in packaging_unit_ids:
+        # Prüfung, Ausgabe, Verbrauchsbuch und Kontostand in einer Transaktion.
+        # Die Sperre auf dem Empfänger serialisiert parallele Ausgaben an dasselbe Mitglied.
+        with transaction.atomic():
+            # Empfänger laden
             try:
-                unit = PackagingUnit.objects.select_related(
-                    'batch__lab_testing_batch'
-                ).get(id=unit_id)
-                
-                unit_weight = float(unit.weight)
-                selected_weight += unit_weight
+                recipient = Member.objects.select_for_update().get(id=recipient_id)
+            except Member.DoesNotExist:
+                return Response(
+                    {"error": "Empfänger nicht gefunden"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            # Limits basierend auf Altersklasse
+            limits = consumption_service.get_limits(recipient)
+            daily_limit = limits['daily_limit']
+            monthly_limit = limits['monthly_limit']
+            
+            # Bisheriger Verbrauch (Verbrauchsbuch) und ausgewählte Einheiten (eine Abfrage)
+            check = consumption_service.check_selection(recipient, packaging_unit_ids, limits)
+            total_price = check['total_price']
+            
+            # Validierung
+            errors = []
+            
+            if check['exceeds_daily_limit']:
+                remaining = daily_limit - check['daily_consumed']
+                errors.append(f"Tageslimit überschritten! Noch verfügbar: {remaining:.2f}g")
                 
-                # Preisberechnung
-                if unit.unit_price:
-                    total_price += float(unit.unit_price)
+            if check['exceeds_monthly_limit']:
+                remaining = monthly_limit - check['monthly_consumed']
+                errors.append(f"Monatslimit überschritten! Noch verfügbar: {remaining:.2f}g")
                 
-                # THC-Prüfung für U21
-                if is_u21 and unit.batch and unit.batch.lab_testing_batch:
-                    thc_content = unit.batch.lab_testing_batch.thc_content
-                    if thc_content and float(thc_content) > max_thc_percentage:
-                        thc_violations.append({
-                            'unit_id': str(unit_id),
-                            'unit_number': unit.batch_number,
-                            'thc_content': float(thc_content),
-                            'strain': unit.batch.source_strain
-                        })
-                        
-            except PackagingUnit.DoesNotExist:
-                continue
-        
-        # Neue Gesamtwerte berechnen
-        new_daily_total = float(daily_consumption) + selected_weight
-        new_monthly_total = float(monthly_consumption) + selected_weight
-        
-        # Validierung
-        errors = []
-        
-        if new_daily_total > daily_limit:
-            remaining = daily_limit - float(daily_consumption)
-            errors.append(f"Tageslimit überschritten! Noch verfügbar: {remaining:.2f}g")
-            
-        if new_monthly_total > monthly_limit:
-            remaining = monthly_limit - float(monthly_consumption)
-            errors.append(f"Monatslimit überschritten! Noch verfügbar: {remaining:.2f}g")
+            if check['thc_violations']:
+                errors.append("THC-Limit überschritten! Max. 10% THC für Mitglieder unter 21 Jahren.")
             
-        if thc_violations:
-            errors.append("THC-Limit überschritten! Max. 10% THC für Mitglieder unter 21 Jahren.")
-        
-        if errors:
-            return Response(
-                {
-                    "error": "Ausgabe nicht möglich",
-                    "details": errors,
-                    "validation": {
-                        "recipient": {
-                            "id": str(recipient.id),
-                            "name": f"{recipient.first_name} {recipient.last_name}",
-                            "age_class": age_class
-                        },
-                        "violations": {
-                            "exceeds_daily_limit": new_daily_total > daily_limit,
-                            "exceeds_monthly_limit": new_monthly_total > monthly_limit,
-                            "thc_violations": thc_violations
-                        },
-                        "remaining": {
-                            "daily_remaining": daily_limit - new_daily_total,
-                            "monthly_remaining": monthly_limit - new_monthly_total
+            if errors:
+                return Response(
+                    {
+                        "error": "Ausgabe nicht möglich",
+                        "details": errors,
+                        "validation": {
+                            "recipient": {
+                                "id": str(recipient.id),
+                                "name": f"{recipient.first_name} {recipient.last_name}",
+                                "age_class": limits['age_class']
+                            },
+                            "violations": {
+                                "exceeds_daily_limit": check['exceeds_daily_limit'],
+                                "exceeds_monthly_limit": check['exceeds_monthly_limit'],
+                                "thc_violations": check['thc_violations']
+                            },
+                            "remaining": {
+                                "daily_remaining": daily_limit - check['new_daily_total'],
+                                "monthly_remaining": monthly_limit - check['new_monthly_total']
+                            }
                         }
-                    }
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Kontostand vor der Transaktion speichern
-        balance_before = float(recipient.kontostand)
-        
-        # Erstelle die Distribution mit Preisinformationen
-        distribution_data = request.data.copy()
-        distribution_data['total_price'] = total_price
-        distribution_data['balance_before'] = balance_before
-        distribution_data['balance_after'] = balance_before - total_price
-        
-        # Serializer mit erweiterten Daten
-        serializer = self.get_serializer(data=distribution_data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
-        
-        # Kontostand aktualisieren
-        recipient.kontostand = balance_before - total_price
-        recipient.save(update_fields=['kontostand'])
-        
-        # Joomla-Sync
-        try:
-            from members.api_views import sync_joomla_user
-            sync_joomla_user(recipient)
-        except Exception as e:
-            print(f"⚠️ Joomla-Sync fehlgeschlagen: {str(e)}")
-        
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Kontostand vor der Transaktion speichern
+            balance_before = float(recipient.kontostand)
+            
+            # Erstelle die Distribution mit Preisinformationen
+            distribution_data = request.data.copy()
+            distribution_data['total_price'] = total_price
+            distribution_data['balance_before'] = balance_before
+            distribution_data['balance_after'] = balance_before - total_price
+            
+            # Serializer mit erweiterten Daten (Verbrauchsbuch folgt über m2m_changed)
+            serializer = self.get_serializer(data=distribution_data)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+            
+            # Kontostand aktualisieren
+            recipient.kontostand = balance_before - total_price
+            recipient.save(update_fields=['kontostand'])
+
+            # Joomla-Sync über die Outbox (Worker: run_member_sync_worker)
+            from members.sync_outbox import enqueue_member_sync
+            enqueue_member_sync(recipient, ['joomla'], reason='distribution')
+
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
@@ -4051,34 +3646,22 @@ class ProductDistributionViewSet(viewsets.ModelViewSet):
         
         # Zeiträume
         today = timezone.now().date()
-        month_start = today.replace(day=1)
         thirty_days_ago = today - timedelta(days=30)
         
         # Bestehende Abfragen
         received = ProductDistribution.objects.filter(recipient_id=member_id)
         distributed = ProductDistribution.objects.filter(distributor_id=member_id)
         
-        # Tages- und Monatsverbrauch
-        daily_consumption = received.filter(
-            distribution_date__date=today
-        ).aggregate(
-            total_weight=Sum('packaging_units__weight')
-        )['total_weight'] or 0
-        
-        monthly_consumption = received.filter(
-            distribution_date__date__gte=month_start,
-            distribution_date__date__lte=today
-        ).aggregate(
-            total_weight=Sum('packaging_units__weight')
-        )['total_weight'] or 0
+        # Tages- und Monatsverbrauch aus dem Verbrauchsbuch
+        daily_consumption, monthly_consumption = consumption_service.get_consumption(member.id)
         
         # Limits basierend auf Alter
-        age_class = member.age_class if hasattr(member, 'age_class') else "21+"
+        limits = consumption_service.get_limits(member)
+        age_class = limits['age_class']
         age = member.age if hasattr(member, 'age') else None
-        is_u21 = age_class == "18+"
-        daily_limit = 25.0
-        monthly_limit = 30.0 if is_u21 else 50.0
-        max_thc = 10.0 if is_u21 else None
+        daily_limit = limits['daily_limit']
+        monthly_limit = limits['monthly_limit']
+        max_thc = limits['max_thc_percentage']
         
         summary = {
             'member': {
@@ -4149,8 +3732,8 @@ class ProductDistributionViewSet(viewsets.ModelViewSet):
                 # Wenn U21, filtere Produkte mit >10% THC
                 if hasattr(recipient, 'age_class') and recipient.age_class == "18+":
                     units = units.filter(
-                        Q(batch__lab_testing_batch__thc_content__lte=10.0) | 
-                        Q(batch__lab_testing_batch__thc_content__isnull=True)
+                        Q(lineage_thc_content__lte=10.0) | 
+                        Q(lineage_thc_content__isnull=True)
                     )
             except Member.DoesNotExist:
                 pass
@@ -4158,7 +3741,7 @@ class ProductDistributionViewSet(viewsets.ModelViewSet):
         # Weitere bestehende Filter...
         product_type = request.query_params.get('product_type')
         if product_type:
-            units = units.filter(batch__lab_testing_batch__processing_batch__product_type=product_type)
+            units = units.filter(lineage_product_type=product_type)
             
         serializer = PackagingUnitSerializer(units, many=True)
         return Response(serializer.data)
@@ -4197,101 +3780,48 @@ def validate_distribution_limits(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Altersklasse bestimmen
-    age_class = recipient.age_class  # Nutzt die property aus dem Member Model
-    is_u21 = age_class == "18+"
-    
     # Limits basierend auf Altersklasse
-    daily_limit = 25.0  # Beide Altersklassen haben 25g/Tag
-    monthly_limit = 30.0 if is_u21 else 50.0
-    max_thc_percentage = 10.0 if is_u21 else None
-    
-    # Aktuelles Datum für Berechnungen
-    today = timezone.now().date()
-    month_start = today.replace(day=1)
-    
-    # Bisherige Ausgaben heute abrufen
-    daily_consumption = ProductDistribution.objects.filter(
-        recipient_id=recipient_id,
-        distribution_date__date=today
-    ).aggregate(
-        total_weight=Sum('packaging_units__weight')
-    )['total_weight'] or 0
-    
-    # Bisherige Ausgaben diesen Monat abrufen
-    monthly_consumption = ProductDistribution.objects.filter(
-        recipient_id=recipient_id,
-        distribution_date__date__gte=month_start,
-        distribution_date__date__lte=today
-    ).aggregate(
-        total_weight=Sum('packaging_units__weight')
-    )['total_weight'] or 0
-    
-    # Gewicht der ausgewählten Einheiten berechnen
-    selected_weight = 0
-    thc_violations = []
-    
-    for unit_data in selected_units:
-        unit_id = unit_data.get('id')
-        try:
-            unit = PackagingUnit.objects.select_related(
-                'batch__lab_testing_batch'
-            ).get(id=unit_id)
-            
-            unit_weight = float(unit.weight)
-            selected_weight += unit_weight
-            
-            # THC-Prüfung für U21
-            if is_u21 and unit.batch and unit.batch.lab_testing_batch:
-                thc_content = unit.batch.lab_testing_batch.thc_content
-                if thc_content and float(thc_content) > max_thc_percentage:
-                    thc_violations.append({
-                        'unit_id': unit_id,
-                        'unit_number': unit.batch_number,
-                        'thc_content': float(thc_content),
-                        'strain': unit.batch.source_strain
-                    })
-                    
-        except PackagingUnit.DoesNotExist:
-            continue
+    limits = consumption_service.get_limits(recipient)
+    daily_limit = limits['daily_limit']
+    monthly_limit = limits['monthly_limit']
     
-    # Neue Gesamtwerte berechnen
-    new_daily_total = float(daily_consumption) + selected_weight
-    new_monthly_total = float(monthly_consumption) + selected_weight
+    # Verbrauch aus dem Verbrauchsbuch, ausgewählte Einheiten mit einer Abfrage
+    unit_ids = [unit_data.get('id') for unit_data in selected_units]
+    check = consumption_service.check_selection(recipient, unit_ids, limits)
     
     # Validierungsergebnis
     validation_result = {
         'recipient': {
             'id': str(recipient.id),
             'name': f"{recipient.first_name} {recipient.last_name}",
-            'age_class': age_class,
+            'age_class': limits['age_class'],
             'age': recipient.age
         },
         'limits': {
             'daily_limit': daily_limit,
             'monthly_limit': monthly_limit,
-            'max_thc_percentage': max_thc_percentage
+            'max_thc_percentage': limits['max_thc_percentage']
         },
         'consumption': {
-            'daily_consumed': float(daily_consumption),
-            'monthly_consumed': float(monthly_consumption),
-            'selected_weight': selected_weight,
-            'new_daily_total': new_daily_total,
-            'new_monthly_total': new_monthly_total
+            'daily_consumed': check['daily_consumed'],
+            'monthly_consumed': check['monthly_consumed'],
+            'selected_weight': check['selected_weight'],
+            'new_daily_total': check['new_daily_total'],
+            'new_monthly_total': check['new_monthly_total']
         },
         'remaining': {
-            'daily_remaining': daily_limit - new_daily_total,
-            'monthly_remaining': monthly_limit - new_monthly_total
+            'daily_remaining': daily_limit - check['new_daily_total'],
+            'monthly_remaining': monthly_limit - check['new_monthly_total']
         },
         'violations': {
-            'exceeds_daily_limit': new_daily_total > daily_limit,
-            'exceeds_monthly_limit': new_monthly_total > monthly_limit,
-            'thc_violations': thc_violations
+            'exceeds_daily_limit': check['exceeds_daily_limit'],
+            'exceeds_monthly_limit': check['exceeds_monthly_limit'],
+            'thc_violations': check['thc_violations']
         },
         'is_valid': (
-            new_daily_total <= daily_limit and 
-            new_monthly_total <= monthly_limit and 
-            len(thc_violations) == 0
+            not check['exceeds_daily_limit'] and 
+            not check['exceeds_monthly_limit'] and 
+            len(check['thc_violations']) == 0
         )
     }
     
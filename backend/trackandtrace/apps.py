@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TrackandtraceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trackandtrace'
+
+    def ready(self):
+        # Signal-Handler für den Sortenkarten-Index registrieren
+        from . import signals  # noqa: F401
@@ -0,0 +1,85 @@
+# backend/trackandtrace/bulk_creation_service.py
+"""
+Sammelanlage von Einzelpflanzen, Stecklingen und Verpackungseinheiten.
+
+Die Chargennummern werden blockweise über BatchNumberSequence reserviert,
+alle Zeilen werden mit einem bulk_create in einer Transaktion geschrieben.
+Da dabei weder save() noch post_save laufen, setzt dieses Modul die
+abgeleiteten Felder (Preis, Herkunft) selbst und aktualisiert den
+Sortenkarten-Index einmal pro Verpackungs-Batch.
+"""
+from django.db import transaction
+
+from .models import LINEAGE_FIELDS, BatchNumberSequence, PackagingUnit
+from .strain_card_service import refresh_packaging_batches
+
+BULK_BATCH_SIZE = 500
+
+
+@transaction.atomic
+def create_plants(model, batch, quantity, **fields):
+    """
+    Legt `quantity` Einzelpflanzen/Stecklinge von `model` (MotherPlant,
+    FloweringPlant, Cutting, BloomingCuttingPlant) für `batch` an.
+    """
+    if quantity <= 0:
+        return []
+
+    batch_numbers = BatchNumberSequence.reserve(model, model.BATCH_NUMBER_PREFIX, quantity)
+    plants = [
+        model(batch=batch, batch_number=batch_number, **fields)
+        for batch_number in batch_numbers
+    ]
+    return model.objects.bulk_create(plants, batch_size=BULK_BATCH_SIZE)
+
+
+@transaction.atomic
+def create_packaging_units(packaging_batch, count=None, notes=None):
+    """
+    Legt die Verpackungseinheiten eines Verpackungs-Batches an.
+    Preis und Herkunft werden wie in PackagingUnit.save() übernommen.
+    """
+    count = packaging_batch.unit_count if count is None else count
+    if count <= 0:
+        return []
+
+    if notes is None:
+        notes = f"Automatisch erstellt aus Batch {packaging_batch.batch_number}"
+
+    unit_weight = packaging_batch.unit_weight
+    unit_price = None
+    if packaging_batch.price_per_gram and unit_weight:
+        unit_price = float(packaging_batch.price_per_gram) * float(unit_weight)
+
+    lineage = {}
+    for field in LINEAGE_FIELDS:
+        attname = PackagingUnit._meta.get_field(field).attname
+        lineage[attname] = getattr(packaging_batch, attname)
+
+    batch_numbers = BatchNumberSequence.reserve(
+        PackagingUnit, packaging_batch.unit_number_prefix, count
+    )
+    units = PackagingUnit.objects.bulk_create([
+        PackagingUnit(
+            batch=packaging_batch,
+            batch_number=batch_number,
+            weight=unit_weight,
+            unit_price=unit_price,
+            notes=notes,
+            **lineage
+        )
+        for batch_number in batch_numbers
+    ], batch_size=BULK_BATCH_SIZE)
+
+    # bulk_create löst kein post_save aus – Index einmalig nachziehen
+    refresh_packaging_batches([packaging_batch.id])
+
+    return units
+
+
+def describe_rows(objects):
+    """Kurzform der angelegten Zeilen für API-Antworten"""
+    return [
+        {'id': str(obj.id), 'batch_number': obj.batch_number}
+        for obj in objects
+    ]
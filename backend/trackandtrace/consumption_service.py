@@ -0,0 +1,173 @@
+# backend/trackandtrace/consumption_service.py
+"""
+Verbrauchsbuch und Limitprüfung für die Cannabis-Ausgabe.
+
+MemberConsumptionLedger hält pro Mitglied und Tag die ausgegebene Menge.
+Tages- und Monatsverbrauch kommen damit aus einer Abfrage über den Index
+(member, day); die ausgewählten Einheiten werden mit einer id__in-Abfrage
+geladen.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import MemberConsumptionLedger, PackagingUnit, ProductDistribution
+
+DAILY_LIMIT = 25.0          # Beide Altersklassen haben 25g/Tag
+MONTHLY_LIMIT = 50.0
+MONTHLY_LIMIT_U21 = 30.0
+MAX_THC_PERCENTAGE_U21 = 10.0
+
+
+def get_limits(member):
+    """Limits basierend auf der Altersklasse des Mitglieds"""
+    age_class = getattr(member, 'age_class', "21+")
+    is_u21 = age_class == "18+"
+    return {
+        'age_class': age_class,
+        'is_u21': is_u21,
+        'daily_limit': DAILY_LIMIT,
+        'monthly_limit': MONTHLY_LIMIT_U21 if is_u21 else MONTHLY_LIMIT,
+        'max_thc_percentage': MAX_THC_PERCENTAGE_U21 if is_u21 else None,
+    }
+
+
+def ledger_day(distribution_date):
+    """Kalendertag einer Ausgabe in der lokalen Zeitzone"""
+    return timezone.localdate(distribution_date)
+
+
+def get_consumption(member_id, today=None):
+    """Liefert (Tagesverbrauch, Monatsverbrauch) in Gramm mit einer Abfrage"""
+    today = today or timezone.localdate()
+    totals = MemberConsumptionLedger.objects.filter(
+        member_id=member_id,
+        day__gte=today.replace(day=1),
+        day__lte=today
+    ).aggregate(
+        daily=Sum('weight', filter=Q(day=today)),
+        monthly=Sum('weight')
+    )
+    return float(totals['daily'] or 0), float(totals['monthly'] or 0)
+
+
+def load_units(unit_ids):
+    """Lädt die ausgewählten Einheiten mit einer Abfrage (Reihenfolge wie übergeben)"""
+    unit_ids = [str(unit_id) for unit_id in unit_ids if unit_id]
+    units = PackagingUnit.objects.filter(
+        id__in=unit_ids
+    ).select_related('batch__lab_testing_batch')
+    units_by_id = {str(unit.id): unit for unit in units}
+    return [units_by_id[unit_id] for unit_id in unit_ids if unit_id in units_by_id]
+
+
+def get_unit_thc_content(unit):
+    if unit.lineage_thc_content is not None:
+        return unit.lineage_thc_content
+    if unit.batch and unit.batch.lab_testing_batch:
+        return unit.batch.lab_testing_batch.thc_content
+    return None
+
+
+def check_selection(member, unit_ids, limits=None):
+    """
+    Prüft eine geplante Ausgabe gegen Tages-, Monats- und THC-Limit.
+    Nicht gefundene Einheiten werden wie bisher übersprungen.
+    """
+    limits = limits or get_limits(member)
+    daily_consumed, monthly_consumed = get_consumption(member.id)
+
+    selected_weight = 0
+    total_price = 0
+    thc_violations = []
+    max_thc = limits['max_thc_percentage']
+
+    for unit in load_units(unit_ids):
+        selected_weight += float(unit.weight)
+
+        if unit.unit_price:
+            total_price += float(unit.unit_price)
+
+        # THC-Prüfung für U21
+        if max_thc is not None:
+            thc_content = get_unit_thc_content(unit)
+            if thc_content and float(thc_content) > max_thc:
+                thc_violations.append({
+                    'unit_id': str(unit.id),
+                    'unit_number': unit.batch_number,
+                    'thc_content': float(thc_content),
+                    'strain': unit.batch.source_strain
+                })
+
+    new_daily_total = daily_consumed + selected_weight
+    new_monthly_total = monthly_consumed + selected_weight
+
+    return {
+        'daily_consumed': daily_consumed,
+        'monthly_consumed': monthly_consumed,
+        'selected_weight': selected_weight,
+        'total_price': total_price,
+        'new_daily_total': new_daily_total,
+        'new_monthly_total': new_monthly_total,
+        'exceeds_daily_limit': new_daily_total > limits['daily_limit'],
+        'exceeds_monthly_limit': new_monthly_total > limits['monthly_limit'],
+        'thc_violations': thc_violations,
+    }
+
+
+def refresh_ledger(keys):
+    """
+    Berechnet die Verbrauchszeilen für die angegebenen (member_id, day)-Paare
+    aus den Ausgaben neu.
+    """
+    keys = {(member_id, day) for member_id, day in keys if member_id and day}
+    for member_id, day in keys:
+        totals = ProductDistribution.objects.filter(
+            recipient_id=member_id,
+            distribution_date__date=day
+        ).aggregate(
+            weight=Sum('packaging_units__weight'),
+            distribution_count=Count('id', distinct=True)
+        )
+        if totals['distribution_count']:
+            MemberConsumptionLedger.objects.update_or_create(
+                member_id=member_id,
+                day=day,
+                defaults={
+                    'weight': totals['weight'] or 0,
+                    'distribution_count': totals['distribution_count']
+                }
+            )
+        else:
+            MemberConsumptionLedger.objects.filter(member_id=member_id, day=day).delete()
+
+
+def distribution_ledger_key(distribution):
+    return (distribution.recipient_id, ledger_day(distribution.distribution_date))
+
+
+@transaction.atomic
+def rebuild_ledger():
+    """Baut das komplette Verbrauchsbuch aus den Ausgaben neu auf"""
+    MemberConsumptionLedger.objects.all().delete()
+
+    rows = ProductDistribution.objects.filter(
+        recipient__isnull=False
+    ).annotate(
+        day=TruncDate('distribution_date')
+    ).order_by().values('recipient_id', 'day').annotate(
+        weight=Sum('packaging_units__weight'),
+        distribution_count=Count('id', distinct=True)
+    )
+
+    entries = MemberConsumptionLedger.objects.bulk_create([
+        MemberConsumptionLedger(
+            member_id=row['recipient_id'],
+            day=row['day'],
+            weight=row['weight'] or 0,
+            distribution_count=row['distribution_count']
+        )
+        for row in rows
+    ], batch_size=500)
+    return len(entries)
@@ -0,0 +1,56 @@
+# backend/trackandtrace/management/commands/backfill_packaging_lineage.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trackandtrace.models import LINEAGE_FIELDS, PackagingBatch, PackagingUnit
+from trackandtrace.strain_card_service import rebuild_all
+
+# Herkunftskette für get_lineage() in einer Abfrage laden
+LAB_TESTING_CHAIN = (
+    'lab_testing_batch__processing_batch__drying_batch__harvest_batch__flowering_batch__seed_purchase__strain',
+    'lab_testing_batch__processing_batch__drying_batch__harvest_batch__blooming_cutting_batch'
+    '__cutting_batch__mother_batch__seed_purchase__strain',
+)
+
+
+class Command(BaseCommand):
+    help = "Befüllt die denormalisierten Herkunftsfelder (lineage_*) an Verpackungen und Einheiten."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--all', action='store_true',
+                            help="Auch bereits befüllte Verpackungen neu berechnen")
+
+    def handle(self, *args, **options):
+        batches = PackagingBatch.objects.select_related(*LAB_TESTING_CHAIN).order_by('created_at')
+        if not options['all']:
+            batches = batches.filter(lineage_harvest_batch__isnull=True)
+
+        batch_ids = list(batches.values_list('id', flat=True))
+        total = len(batch_ids)
+        self.stdout.write(f"🔄 Übertrage Herkunft auf {total} Verpackungs-Batches...")
+
+        chunk_size = options['chunk_size']
+        updated = 0
+        for start in range(0, total, chunk_size):
+            chunk = list(batches.filter(id__in=batch_ids[start:start + chunk_size]))
+
+            with transaction.atomic():
+                for batch in chunk:
+                    for field, value in batch.lab_testing_batch.get_lineage().items():
+                        setattr(batch, field, value)
+                PackagingBatch.objects.bulk_update(chunk, LINEAGE_FIELDS)
+
+                for batch in chunk:
+                    PackagingUnit.objects.filter(batch=batch).update(**{
+                        field: getattr(batch, field) for field in LINEAGE_FIELDS
+                    })
+
+            updated += len(chunk)
+            self.stdout.write(f"   {updated}/{total}")
+
+        card_count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {updated} Verpackungs-Batches aktualisiert, {card_count} Sortenkarten neu aufgebaut"
+        ))
@@ -0,0 +1,14 @@
+# backend/trackandtrace/management/commands/rebuild_consumption_ledger.py
+
+from django.core.management.base import BaseCommand
+
+from trackandtrace.consumption_service import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Baut das Verbrauchsbuch (MemberConsumptionLedger) aus allen Ausgaben neu auf."
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Baue Verbrauchsbuch neu auf...")
+        entry_count = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f"✅ {entry_count} Tageseinträge erstellt"))
@@ -0,0 +1,14 @@
+# backend/trackandtrace/management/commands/rebuild_strain_cards.py
+
+from django.core.management.base import BaseCommand
+
+from trackandtrace.strain_card_service import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Baut den materialisierten Sortenkarten-Index (StrainCard) komplett neu auf."
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Baue Sortenkarten-Index neu auf...")
+        card_count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"✅ {card_count} Sortenkarten erstellt"))
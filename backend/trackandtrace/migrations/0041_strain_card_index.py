@@ -0,0 +1,61 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trackandtrace', '0040_rename_distributionimage_productdistributionimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrainCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strain_name', models.CharField(max_length=100)),
+                ('product_type', models.CharField(max_length=20)),
+                ('total_unit_count', models.PositiveIntegerField(default=0)),
+                ('batch_count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('min_thc', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('max_thc', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sortenkarte',
+                'verbose_name_plural': 'Sortenkarten',
+                'ordering': ['strain_name', 'product_type'],
+                'unique_together': {('strain_name', 'product_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StrainCardBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cannabis_batch_id', models.CharField(max_length=100)),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('thc_content', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('unit_count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='trackandtrace.straincard')),
+                ('packaging_batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='strain_card_buckets', to='trackandtrace.packagingbatch')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='straincardbucket',
+            index=models.Index(fields=['card', 'weight'], name='strain_bucket_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='straincardbucket',
+            index=models.Index(fields=['card', 'thc_content'], name='strain_bucket_thc_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='straincardbucket',
+            unique_together={('packaging_batch', 'weight')},
+        ),
+    ]
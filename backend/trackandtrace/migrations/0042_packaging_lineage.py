@@ -0,0 +1,70 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_remove_member_unifi_user_id'),
+        ('trackandtrace', '0041_strain_card_index'),
+        ('wawi', '0006_delete_strainpurchasehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packagingbatch',
+            name='lineage_harvest_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packaging_batches', to='trackandtrace.harvestbatch'),
+        ),
+        migrations.AddField(
+            model_name='packagingbatch',
+            name='lineage_product_type',
+            field=models.CharField(blank=True, choices=[('marijuana', 'Marihuana'), ('hashish', 'Haschisch')], db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='packagingbatch',
+            name='lineage_strain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packaging_batches', to='wawi.cannabisstrain'),
+        ),
+        migrations.AddField(
+            model_name='packagingbatch',
+            name='lineage_strain_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='packagingbatch',
+            name='lineage_thc_content',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='packagingunit',
+            name='lineage_harvest_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packaging_units', to='trackandtrace.harvestbatch'),
+        ),
+        migrations.AddField(
+            model_name='packagingunit',
+            name='lineage_product_type',
+            field=models.CharField(blank=True, choices=[('marijuana', 'Marihuana'), ('hashish', 'Haschisch')], db_index=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='packagingunit',
+            name='lineage_strain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packaging_units', to='wawi.cannabisstrain'),
+        ),
+        migrations.AddField(
+            model_name='packagingunit',
+            name='lineage_strain_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='packagingunit',
+            name='lineage_thc_content',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='packagingunit',
+            index=models.Index(fields=['lineage_strain_name', 'weight'], name='packaging_unit_strain_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trackandtrace', '0042_packaging_lineage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100)),
+                ('prefix', models.CharField(max_length=50)),
+                ('day', models.DateField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Chargennummern-Zähler',
+                'verbose_name_plural': 'Chargennummern-Zähler',
+                'unique_together': {('scope', 'prefix', 'day')},
+            },
+        ),
+    ]
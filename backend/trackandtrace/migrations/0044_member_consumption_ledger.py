@@ -0,0 +1,59 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_consumption_ledger(apps, schema_editor):
+    """Verbrauchsbuch aus den bestehenden Ausgaben befüllen"""
+    ProductDistribution = apps.get_model('trackandtrace', 'ProductDistribution')
+    MemberConsumptionLedger = apps.get_model('trackandtrace', 'MemberConsumptionLedger')
+
+    rows = ProductDistribution.objects.filter(
+        recipient__isnull=False
+    ).annotate(
+        day=TruncDate('distribution_date')
+    ).order_by().values('recipient_id', 'day').annotate(
+        weight=Sum('packaging_units__weight'),
+        distribution_count=Count('id', distinct=True)
+    )
+    MemberConsumptionLedger.objects.bulk_create([
+        MemberConsumptionLedger(
+            member_id=row['recipient_id'],
+            day=row['day'],
+            weight=row['weight'] or 0,
+            distribution_count=row['distribution_count']
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0012_remove_member_unifi_user_id'),
+        ('trackandtrace', '0043_batch_number_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberConsumptionLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('weight', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('distribution_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumption_ledger', to='members.member')),
+            ],
+            options={
+                'verbose_name': 'Verbrauchsbuch',
+                'verbose_name_plural': 'Verbrauchsbuch',
+                'ordering': ['-day'],
+                'unique_together': {('member', 'day')},
+            },
+        ),
+        migrations.RunPython(fill_consumption_ledger, migrations.RunPython.noop),
+    ]
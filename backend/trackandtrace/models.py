@@ -1,5 +1,6 @@
 import uuid, io
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from members.models import Member
 from rooms.models import Room
@@ -9,6 +10,95 @@ from django.core.validators import FileExtensionValidator, ValidationError
 
 from PIL import Image
 
+class BatchNumberSequence(models.Model):
+    """
+    Tageszähler für Chargennummern im Format "<prefix>:<TT:MM:JJJJ>:<NNNN>".
+
+    Pro Modell, Präfix und Tag existiert genau eine Zeile. Nummern werden
+    blockweise über ein atomares UPDATE reserviert, damit parallele
+    Anlagen keine doppelten Nummern erzeugen und kein COUNT über die
+    Tagesdaten nötig ist.
+    """
+    scope = models.CharField(max_length=100)  # z.B. "trackandtrace.packagingunit"
+    prefix = models.CharField(max_length=50)
+    day = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['scope', 'prefix', 'day']
+        verbose_name = "Chargennummern-Zähler"
+        verbose_name_plural = "Chargennummern-Zähler"
+
+    def __str__(self):
+        return f"{self.scope} {self.prefix}:{self.day.strftime('%d:%m:%Y')} = {self.last_value}"
+
+    @staticmethod
+    def format_number(prefix, day, value):
+        return f"{prefix}:{day.strftime('%d:%m:%Y')}:{value:04d}"
+
+    @classmethod
+    def _initial_value(cls, model, prefix, day):
+        """
+        Startwert für einen neuen Tageszähler: höchste bereits vergebene
+        Nummer des Tages (Bestandsdaten aus der Zeit vor dem Zähler).
+        """
+        day_prefix = f"{prefix}:{day.strftime('%d:%m:%Y')}:"
+        highest = 0
+        numbers = model._default_manager.filter(
+            batch_number__startswith=day_prefix
+        ).values_list('batch_number', flat=True)
+        for number in numbers:
+            suffix = number[len(day_prefix):]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest
+
+    @classmethod
+    def reserve(cls, model, prefix, count=1):
+        """
+        Reserviert `count` fortlaufende Chargennummern für `model` und gibt
+        sie als Liste zurück.
+        """
+        if count < 1:
+            return []
+
+        day = timezone.now().date()
+        scope = model._meta.label_lower
+
+        sequence = cls.objects.filter(scope=scope, prefix=prefix, day=day)
+
+        with transaction.atomic():
+            # Das UPDATE sperrt die Zeile (bzw. bei SQLite die Datenbank)
+            # bis zum Ende der Transaktion – zuerst schreiben, dann lesen
+            updated = sequence.update(
+                last_value=F('last_value') + count,
+                updated_at=timezone.now()
+            )
+            if not updated:
+                cls.objects.get_or_create(
+                    scope=scope,
+                    prefix=prefix,
+                    day=day,
+                    defaults={'last_value': lambda: cls._initial_value(model, prefix, day)}
+                )
+                sequence.update(
+                    last_value=F('last_value') + count,
+                    updated_at=timezone.now()
+                )
+            last_value = sequence.values_list('last_value', flat=True).get()
+
+        first_value = last_value - count + 1
+        return [
+            cls.format_number(prefix, day, value)
+            for value in range(first_value, last_value + 1)
+        ]
+
+    @classmethod
+    def next_number(cls, model, prefix):
+        """Reserviert eine einzelne Chargennummer"""
+        return cls.reserve(model, prefix)[0]
+
 class SeedPurchase(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     batch_number = models.CharField(max_length=50, unique=True, blank=True, null=True)
@@ -44,16 +134,7 @@ class SeedPurchase(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Samen, die heute erstellt wurden
-            count = SeedPurchase.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"charge:seed:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(SeedPurchase, "charge:seed")
 
         if self.strain and not self.id:  # Nur bei Neuanlage
             self.strain_name = self.strain.name
@@ -86,20 +167,13 @@ class MotherPlantBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Mutterpflanzen-Batches, die heute erstellt wurden
-            count = MotherPlantBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"mother-plant:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(MotherPlantBatch, "mother-plant")
         
         super().save(*args, **kwargs)
 
 class MotherPlant(models.Model):
+    BATCH_NUMBER_PREFIX = "mother-plant"
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     batch = models.ForeignKey(MotherPlantBatch, related_name='plants', on_delete=models.CASCADE)
     batch_number = models.CharField(max_length=50, unique=True, blank=True, null=True)
@@ -119,16 +193,7 @@ class MotherPlant(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Mutterpflanzen, die heute erstellt wurden
-            count = MotherPlant.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"mother-plant:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(MotherPlant, self.BATCH_NUMBER_PREFIX)
         
         super().save(*args, **kwargs)
 
@@ -152,20 +217,13 @@ class FloweringPlantBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Blühpflanzen-Batches, die heute erstellt wurden
-            count = FloweringPlantBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"blooming-plant:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(FloweringPlantBatch, "blooming-plant")
         
         super().save(*args, **kwargs)
 
 class FloweringPlant(models.Model):
+    BATCH_NUMBER_PREFIX = "blooming-plant"
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     batch = models.ForeignKey(FloweringPlantBatch, related_name='plants', on_delete=models.CASCADE)
     batch_number = models.CharField(max_length=50, unique=True, blank=True, null=True)
@@ -185,16 +243,7 @@ class FloweringPlant(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Blühpflanzen, die heute erstellt wurden
-            count = FloweringPlant.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"blooming-plant:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(FloweringPlant, self.BATCH_NUMBER_PREFIX)
         
         super().save(*args, **kwargs)
 
@@ -218,20 +267,13 @@ class CuttingBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Stecklinge-Batches, die heute erstellt wurden
-            count = CuttingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"cutting:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(CuttingBatch, "cutting")
         
         super().save(*args, **kwargs)
 
 class Cutting(models.Model):
+    BATCH_NUMBER_PREFIX = "cutting"
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     batch = models.ForeignKey(CuttingBatch, related_name='cuttings', on_delete=models.CASCADE)
     batch_number = models.CharField(max_length=50, unique=True, blank=True, null=True)
@@ -256,16 +298,7 @@ class Cutting(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Stecklinge, die heute erstellt wurden
-            count = Cutting.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"cutting:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(Cutting, self.BATCH_NUMBER_PREFIX)
         
         super().save(*args, **kwargs)
 
@@ -289,20 +322,13 @@ class BloomingCuttingBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Blühpflanzen-Batches, die heute erstellt wurden
-            count = BloomingCuttingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"charge:blooming-cutting:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(BloomingCuttingBatch, "charge:blooming-cutting")
         
         super().save(*args, **kwargs)
 
 class BloomingCuttingPlant(models.Model):
+    BATCH_NUMBER_PREFIX = "blooming-cutting"
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     batch = models.ForeignKey(BloomingCuttingBatch, related_name='plants', on_delete=models.CASCADE)
     batch_number = models.CharField(max_length=50, unique=True, blank=True, null=True)
@@ -322,16 +348,7 @@ class BloomingCuttingPlant(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Blühpflanzen, die heute erstellt wurden
-            count = BloomingCuttingPlant.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"blooming-cutting:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(BloomingCuttingPlant, self.BATCH_NUMBER_PREFIX)
         
         super().save(*args, **kwargs)
 
@@ -370,22 +387,6 @@ class HarvestBatch(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    def save(self, *args, **kwargs):
-        # Generiere Batch-Nummer falls nicht vorhanden
-        if not self.batch_number:
-            today = timezone.now()
-            # Zähle Ernten, die heute erstellt wurden
-            count = HarvestBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"charge:harvest:{today.strftime('%d:%m:%Y')}:{count:04d}"
-        
-        super().save(*args, **kwargs)
-    
     @property
     def source_strain(self):
         """Gibt die Genetik der Quelle zurück."""
@@ -421,24 +422,7 @@ class HarvestBatch(models.Model):
     def generate_batch_number(self):
         """Generiert eine eindeutige Batch-Nummer für Ernten"""
         prefix = "harvest"  # WICHTIG: Muss "harvest" sein!
-        
-        # Aktuelles Datum
-        now = timezone.now()
-        date_part = now.strftime("%d:%m:%Y")
-        
-        # Zähler für den Tag
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Zähle Batches vom gleichen Tag
-        count = HarvestBatch.objects.filter(
-            created_at__range=(start_of_day, end_of_day)
-        ).count()
-        
-        # Batch-Nummer mit führenden Nullen
-        batch_number = f"{prefix}:{date_part}:{count + 1:04d}"
-        
-        return batch_number
+        return BatchNumberSequence.next_number(HarvestBatch, prefix)
     
     def save(self, *args, **kwargs):
         if not self.batch_number:
@@ -477,29 +461,6 @@ class DryingBatch(models.Model):
     processing_batch = models.ForeignKey('ProcessingBatch', on_delete=models.SET_NULL, 
                                         related_name='source_drying', null=True, blank=True)
     
-    def save(self, *args, **kwargs):
-        # Generiere Batch-Nummer falls nicht vorhanden
-        if not self.batch_number:
-            today = timezone.now()
-            # Zähle Trocknungen, die heute erstellt wurden
-            count = DryingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"charge:drying:{today.strftime('%d:%m:%Y')}:{count:04d}"
-        
-        # Berechne Gewichtsverlust-Prozentsatz (kann später für Statistiken genutzt werden)
-        if not hasattr(self, 'weight_loss_percentage') and self.initial_weight and self.final_weight:
-            if float(self.initial_weight) > 0:
-                self.weight_loss_percentage = (1 - (float(self.final_weight) / float(self.initial_weight))) * 100
-            else:
-                self.weight_loss_percentage = 0
-        
-        super().save(*args, **kwargs)
-    
     @property
     def weight_loss(self):
         """Gibt den absoluten Gewichtsverlust in Gramm zurück."""
@@ -524,24 +485,7 @@ class DryingBatch(models.Model):
     def generate_batch_number(self):
         """Generiert eine eindeutige Batch-Nummer für Trocknungen"""
         prefix = "drying"  # WICHTIG: Muss "drying" sein!
-        
-        # Aktuelles Datum
-        now = timezone.now()
-        date_part = now.strftime("%d:%m:%Y")
-        
-        # Zähler für den Tag
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = now.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Zähle Batches vom gleichen Tag
-        count = DryingBatch.objects.filter(
-            created_at__range=(start_of_day, end_of_day)
-        ).count()
-        
-        # Batch-Nummer mit führenden Nullen
-        batch_number = f"{prefix}:{date_part}:{count + 1:04d}"
-        
-        return batch_number
+        return BatchNumberSequence.next_number(DryingBatch, prefix)
     
     def save(self, *args, **kwargs):
         if not self.batch_number:
@@ -599,20 +543,11 @@ class ProcessingBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
             # Erstelle ein Präfix basierend auf dem Produkttyp
             prefix = "marijuana" if self.product_type == "marijuana" else "hashish"
             
-            # Zähle Verarbeitungs-Batches dieses Typs, die heute erstellt wurden
-            count = ProcessingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day,
-                product_type=self.product_type
-            ).count() + 1
-            
             # Generiere Batch-Nummer mit Produkttyp im Prefix
-            self.batch_number = f"charge:{prefix}:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(ProcessingBatch, f"charge:{prefix}")
         
         # Berechne Ausbeute-Prozentsatz
         if not hasattr(self, 'yield_percentage') and self.input_weight and self.output_weight:
@@ -716,21 +651,13 @@ class LabTestingBatch(models.Model):
     def save(self, *args, **kwargs):
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
             # Erstelle ein Präfix basierend auf dem Produkttyp der Quelle
             prefix = "labtesting"
             if self.processing_batch:
                 prefix = f"labtesting-{self.processing_batch.product_type}"
             
-            # Zähle Laborkontroll-Batches, die heute erstellt wurden
-            count = LabTestingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
             # Generiere Batch-Nummer mit Präfix
-            self.batch_number = f"charge:{prefix}:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(LabTestingBatch, f"charge:{prefix}")
         
         super().save(*args, **kwargs)
     
@@ -761,6 +688,44 @@ class LabTestingBatch(models.Model):
         if self.processing_batch:
             return self.processing_batch.product_type_display
         return "Unbekannt"
+    
+    def get_lineage(self):
+        """
+        Ermittelt die Herkunftsdaten (Ernte, Genetik, Produkttyp, THC) einmalig über die
+        komplette Kette, damit Verpackungen sie denormalisiert speichern können.
+        """
+        harvest = None
+        if self.processing_batch and self.processing_batch.drying_batch:
+            harvest = self.processing_batch.drying_batch.harvest_batch
+        
+        seed_purchase = None
+        if harvest and harvest.flowering_batch:
+            seed_purchase = harvest.flowering_batch.seed_purchase
+        elif (harvest and harvest.blooming_cutting_batch and
+              harvest.blooming_cutting_batch.cutting_batch and
+              harvest.blooming_cutting_batch.cutting_batch.mother_batch):
+            seed_purchase = harvest.blooming_cutting_batch.cutting_batch.mother_batch.seed_purchase
+        
+        strain = seed_purchase.strain if seed_purchase else None
+        strain_name = ''
+        if strain:
+            strain_name = strain.name
+        elif seed_purchase:
+            strain_name = seed_purchase.strain_name
+        
+        return {
+            'lineage_harvest_batch': harvest,
+            'lineage_strain': strain,
+            'lineage_strain_name': strain_name or '',
+            'lineage_product_type': self.processing_batch.product_type if self.processing_batch else '',
+            'lineage_thc_content': self.thc_content,
+        }
+
+# Denormalisierte Herkunftsfelder, die von LabTestingBatch.get_lineage() befüllt werden
+LINEAGE_FIELDS = [
+    'lineage_harvest_batch', 'lineage_strain', 'lineage_strain_name',
+    'lineage_product_type', 'lineage_thc_content',
+]
 
 class PackagingBatch(models.Model):
     """Modell für die Verpackung von freigegeben Produkten nach der Laborkontrolle"""
@@ -799,6 +764,16 @@ class PackagingBatch(models.Model):
         help_text="Preis pro Verpackungseinheit (automatisch berechnet)"
     )
     
+    # Denormalisierte Herkunft (beim Verpacken aus der Laborkontrolle übernommen)
+    lineage_harvest_batch = models.ForeignKey(HarvestBatch, on_delete=models.SET_NULL, null=True, blank=True,
+                                              related_name='packaging_batches')
+    lineage_strain = models.ForeignKey(CannabisStrain, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='packaging_batches')
+    lineage_strain_name = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    lineage_product_type = models.CharField(max_length=20, choices=PRODUCT_TYPE_CHOICES, blank=True, default='',
+                                            db_index=True)
+    lineage_thc_content = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
     # Mitglieder- und Raumzuordnung
     member = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True,
                               related_name='packaging_batches')
@@ -838,21 +813,19 @@ class PackagingBatch(models.Model):
     
     def save(self, *args, **kwargs):
         # Speichere zuerst den Status, bevor der erste save
-        creating = self.pk is None
+        creating = self._state.adding
+        
+        # Herkunft einmalig bei der Anlage übernehmen
+        if creating and self.lab_testing_batch and not self.lineage_harvest_batch_id:
+            for field, value in self.lab_testing_batch.get_lineage().items():
+                setattr(self, field, value)
         
         if not self.batch_number:
-            today = timezone.now()
             prefix = "packaging"
             if self.lab_testing_batch and self.lab_testing_batch.processing_batch:
                 prefix = f"packaging-{self.lab_testing_batch.processing_batch.product_type}"
             
-            count = PackagingBatch.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            self.batch_number = f"charge:{prefix}:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(PackagingBatch, f"charge:{prefix}")
         
         # 🆕 AUTOMATISCHE PREISBERECHNUNG:
         if self.price_per_gram and self.total_weight:
@@ -870,16 +843,22 @@ class PackagingBatch(models.Model):
             units_count = self.units.count()
             if units_count == 0:
                 print(f"DEBUG: ERSTELLE UNITS - Anzahl: {self.unit_count}")
-                for _ in range(self.unit_count):
-                    PackagingUnit.objects.create(
-                        batch=self,
-                        weight=self.unit_weight,
-                        notes=f"Automatisch erstellt aus Batch {self.batch_number}"
-                    )
+                # Alle Einheiten in einem bulk_create anlegen (inkl. Sortenkarten-Index)
+                from .bulk_creation_service import create_packaging_units
+                create_packaging_units(self)
+    
+    @property
+    def unit_number_prefix(self):
+        """Präfix der Chargennummern für die Verpackungseinheiten dieses Batches"""
+        if self.lab_testing_batch and self.lab_testing_batch.processing_batch:
+            return f"unit:pack-{self.lab_testing_batch.processing_batch.product_type}"
+        return "unit:pack"
     
     @property
     def source_strain(self):
         """Gibt die Genetik der Quelle zurück."""
+        if self.lineage_strain_name:
+            return self.lineage_strain_name
         if self.lab_testing_batch:
             return self.lab_testing_batch.source_strain
         return "Unbekannt"
@@ -887,6 +866,8 @@ class PackagingBatch(models.Model):
     @property
     def product_type(self):
         """Gibt den Produkttyp der Quelle zurück."""
+        if self.lineage_product_type:
+            return self.lineage_product_type
         if self.lab_testing_batch and self.lab_testing_batch.processing_batch:
             return self.lab_testing_batch.processing_batch.product_type
         return "Unbekannt"
@@ -894,13 +875,17 @@ class PackagingBatch(models.Model):
     @property
     def product_type_display(self):
         """Gibt den formatierten Produkttyp der Quelle zurück."""
+        if self.lineage_product_type:
+            return self.get_lineage_product_type_display()
         if self.lab_testing_batch and self.lab_testing_batch.processing_batch:
-            return self.lab_testing_batch.processing_batch.product_type_display
+            return self.lab_testing_batch.processing_batch.get_product_type_display()
         return "Unbekannt"
     
     @property
     def thc_content(self):
         """Gibt den THC-Gehalt aus der Laborprobe zurück."""
+        if self.lineage_harvest_batch_id:
+            return self.lineage_thc_content
         if self.lab_testing_batch:
             return self.lab_testing_batch.thc_content
         return None
@@ -930,6 +915,16 @@ class PackagingUnit(models.Model):
         help_text="Preis für diese Verpackungseinheit in Euro"
     )
     
+    # Denormalisierte Herkunft (vom Verpackungs-Batch übernommen)
+    lineage_harvest_batch = models.ForeignKey(HarvestBatch, on_delete=models.SET_NULL, null=True, blank=True,
+                                              related_name='packaging_units')
+    lineage_strain = models.ForeignKey(CannabisStrain, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='packaging_units')
+    lineage_strain_name = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    lineage_product_type = models.CharField(max_length=20, choices=PRODUCT_TYPE_CHOICES, blank=True, default='',
+                                            db_index=True)
+    lineage_thc_content = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
     # Mitgliederzuordnung für Vernichtung
     destroyed_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True,
                                     related_name='destroyed_packaging_units')
@@ -972,6 +967,12 @@ class PackagingUnit(models.Model):
             models.Index(
                 fields=['-created_at'], 
                 name='packaging_unit_created_idx'
+            ),
+            
+            # Index für Sorten-Filter nach Gewicht (StrainCard-Einheiten)
+            models.Index(
+                fields=['lineage_strain_name', 'weight'], 
+                name='packaging_unit_strain_idx'
             )
         ]
         
@@ -979,24 +980,18 @@ class PackagingUnit(models.Model):
         ordering = ['-created_at', 'batch_number']
     
     def save(self, *args, **kwargs):
+        # Herkunft bei der Anlage vom Verpackungs-Batch übernehmen
+        if self._state.adding and self.batch and not self.lineage_harvest_batch_id:
+            for field in LINEAGE_FIELDS:
+                attname = self._meta.get_field(field).attname
+                setattr(self, attname, getattr(self.batch, attname))
+        
         # Generiere Batch-Nummer falls nicht vorhanden
         if not self.batch_number:
-            today = timezone.now()
-            # Zähle Verpackungseinheiten, die heute erstellt wurden
-            count = PackagingUnit.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            # Produkttyp aus dem übergeordneten Batch ermitteln
-            product_type_prefix = "pack"
-            if self.batch.lab_testing_batch and self.batch.lab_testing_batch.processing_batch:
-                product_type = self.batch.lab_testing_batch.processing_batch.product_type
-                product_type_prefix = f"pack-{product_type}"
-            
-            # Generiere Batch-Nummer
-            self.batch_number = f"unit:{product_type_prefix}:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            # Generiere Batch-Nummer mit dem Produkttyp des übergeordneten Batches
+            self.batch_number = BatchNumberSequence.next_number(
+                PackagingUnit, self.batch.unit_number_prefix
+            )
         
         # 🆕 PREISBERECHNUNG AUS DEM BATCH, FALLS NICHT GESETZT:
         if not self.unit_price and self.batch and self.batch.price_per_gram and self.weight:
@@ -1058,14 +1053,7 @@ class ProductDistribution(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.batch_number:
-            today = timezone.now()
-            count = ProductDistribution.objects.filter(
-                created_at__year=today.year,
-                created_at__month=today.month,
-                created_at__day=today.day
-            ).count() + 1
-            
-            self.batch_number = f"distro:{today.strftime('%d:%m:%Y')}:{count:04d}"
+            self.batch_number = BatchNumberSequence.next_number(ProductDistribution, "distro")
         
         super().save(*args, **kwargs)
     
@@ -1111,6 +1099,80 @@ class ProductDistribution(models.Model):
         verbose_name = "Cannabis-Ausgabe"
         verbose_name_plural = "Cannabis-Ausgaben"
 
+class MemberConsumptionLedger(models.Model):
+    """
+    Tagesverbrauch eines Mitglieds (Summe der ausgegebenen Gramm pro Tag).
+    Wird zusammen mit ProductDistribution in derselben Transaktion gepflegt
+    (trackandtrace.consumption_service), damit Tages- und Monatslimits mit
+    einer Abfrage über (member, day) geprüft werden können.
+    """
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='consumption_ledger')
+    day = models.DateField()
+    weight = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    distribution_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['member', 'day']
+        ordering = ['-day']
+        verbose_name = "Verbrauchsbuch"
+        verbose_name_plural = "Verbrauchsbuch"
+
+    def __str__(self):
+        return f"{self.member} {self.day}: {self.weight}g"
+
+class StrainCard(models.Model):
+    """
+    Materialisierte Sortenkarte für die Ausgabe: eine Zeile pro Sorte und Produkttyp.
+    Wird über trackandtrace.strain_card_service inkrementell gepflegt, sobald
+    Verpackungseinheiten erstellt, vernichtet oder ausgegeben werden.
+    """
+    strain_name = models.CharField(max_length=100)
+    product_type = models.CharField(max_length=20)
+
+    # Aggregierte Bestandswerte über alle Buckets der Karte
+    total_unit_count = models.PositiveIntegerField(default=0)
+    batch_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    min_thc = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    max_thc = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['strain_name', 'product_type']
+        ordering = ['strain_name', 'product_type']
+        verbose_name = "Sortenkarte"
+        verbose_name_plural = "Sortenkarten"
+
+    def __str__(self):
+        return f"{self.strain_name} ({self.product_type}): {self.total_unit_count} Einheiten"
+
+class StrainCardBucket(models.Model):
+    """
+    Verfügbarer Bestand einer Sortenkarte je Verpackungs-Batch und Gewicht.
+    Alle Einheiten eines Buckets teilen Cannabis-Charge und THC-Gehalt.
+    """
+    card = models.ForeignKey(StrainCard, related_name='buckets', on_delete=models.CASCADE)
+    packaging_batch = models.ForeignKey(PackagingBatch, related_name='strain_card_buckets',
+                                        on_delete=models.CASCADE)
+    cannabis_batch_id = models.CharField(max_length=100)
+    weight = models.DecimalField(max_digits=6, decimal_places=2)
+    thc_content = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    unit_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        unique_together = ['packaging_batch', 'weight']
+        indexes = [
+            # Index für Gewichts- und THC-Filter auf Kartenebene
+            models.Index(fields=['card', 'weight'], name='strain_bucket_weight_idx'),
+            models.Index(fields=['card', 'thc_content'], name='strain_bucket_thc_idx'),
+        ]
+
 import io
 from PIL import Image
 from django.db import models
@@ -1228,11 +1228,14 @@ class PackagingUnitSerializer(serializers.ModelSerializer):
             
         batch = obj.batch
         
-        # Sichere Ermittlung des Produkttyps
+        # Sichere Ermittlung des Produkttyps (denormalisiert am Batch, sonst über die Kette)
         product_type = 'unknown'
         product_type_display = 'Unbekannt'
         
-        if batch.lab_testing_batch and batch.lab_testing_batch.processing_batch:
+        if batch.lineage_product_type:
+            product_type = batch.lineage_product_type
+            product_type_display = batch.get_lineage_product_type_display()
+        elif batch.lab_testing_batch and batch.lab_testing_batch.processing_batch:
             processing_batch = batch.lab_testing_batch.processing_batch
             product_type = processing_batch.product_type
             # Verwende die Django Choice-Methode für die Anzeige
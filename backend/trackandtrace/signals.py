@@ -0,0 +1,114 @@
+# backend/trackandtrace/signals.py
+"""
+Hält den materialisierten Sortenkarten-Index aktuell, wenn Verpackungseinheiten
+erstellt, vernichtet, gelöscht oder ausgegeben werden, und pflegt das
+Verbrauchsbuch der Mitglieder bei jeder Änderung an einer Ausgabe.
+"""
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .consumption_service import distribution_ledger_key, ledger_day, refresh_ledger
+from .models import LabTestingBatch, PackagingBatch, PackagingUnit, ProductDistribution
+from .strain_card_service import refresh_packaging_batches
+
+
+@receiver(post_save, sender=PackagingUnit)
+def packaging_unit_saved(sender, instance, raw=False, **kwargs):
+    # Massenanlagen aktualisieren den Index einmalig am Ende
+    if raw or getattr(instance, '_skip_strain_card_refresh', False):
+        return
+    refresh_packaging_batches([instance.batch_id])
+
+
+@receiver(post_delete, sender=PackagingUnit)
+def packaging_unit_deleted(sender, instance, **kwargs):
+    refresh_packaging_batches([instance.batch_id])
+
+
+@receiver(post_save, sender=LabTestingBatch)
+def lab_testing_batch_saved(sender, instance, raw=False, **kwargs):
+    # Denormalisierter THC-Wert und Buckets folgen nachträglichen Laborergebnissen
+    if raw:
+        return
+    batch_ids = list(
+        instance.packaging_batches.exclude(
+            lineage_thc_content=instance.thc_content
+        ).values_list('id', flat=True)
+    )
+    if not batch_ids:
+        return
+    PackagingBatch.objects.filter(id__in=batch_ids).update(lineage_thc_content=instance.thc_content)
+    PackagingUnit.objects.filter(batch_id__in=batch_ids).update(lineage_thc_content=instance.thc_content)
+    refresh_packaging_batches(batch_ids)
+
+
+@receiver(m2m_changed, sender=ProductDistribution.packaging_units.through)
+def distribution_units_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._strain_card_batch_ids = _distribution_batch_ids(instance, reverse)
+        instance._ledger_keys = _distribution_ledger_keys(instance, reverse)
+    elif action == 'post_clear':
+        refresh_packaging_batches(getattr(instance, '_strain_card_batch_ids', []))
+        refresh_ledger(getattr(instance, '_ledger_keys', []))
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            refresh_packaging_batches([instance.batch_id])
+        else:
+            refresh_packaging_batches(
+                PackagingUnit.objects.filter(id__in=pk_set).values_list('batch_id', flat=True)
+            )
+        refresh_ledger(_distribution_ledger_keys(instance, reverse, pk_set))
+
+
+@receiver(pre_save, sender=ProductDistribution)
+def distribution_saving(sender, instance, raw=False, **kwargs):
+    # Alter Empfänger/Tag, falls eine bestehende Ausgabe umgebucht wird
+    instance._previous_ledger_key = None
+    if raw or instance._state.adding:
+        return
+    previous = ProductDistribution.objects.filter(
+        pk=instance.pk
+    ).values_list('recipient_id', 'distribution_date').first()
+    if previous:
+        instance._previous_ledger_key = (previous[0], ledger_day(previous[1]))
+
+
+@receiver(post_save, sender=ProductDistribution)
+def distribution_saved(sender, instance, created, raw=False, **kwargs):
+    # Neue Ausgaben landen über m2m_changed (post_add) im Verbrauchsbuch
+    if raw or created:
+        return
+    previous_key = getattr(instance, '_previous_ledger_key', None)
+    current_key = distribution_ledger_key(instance)
+    if previous_key and previous_key != current_key:
+        refresh_ledger([previous_key, current_key])
+
+
+@receiver(pre_delete, sender=ProductDistribution)
+def distribution_deleting(sender, instance, **kwargs):
+    instance._strain_card_batch_ids = _distribution_batch_ids(instance, reverse=False)
+
+
+@receiver(post_delete, sender=ProductDistribution)
+def distribution_deleted(sender, instance, **kwargs):
+    refresh_packaging_batches(getattr(instance, '_strain_card_batch_ids', []))
+    refresh_ledger([distribution_ledger_key(instance)])
+
+
+def _distribution_batch_ids(instance, reverse):
+    if reverse:
+        return [instance.batch_id]
+    return list(instance.packaging_units.values_list('batch_id', flat=True))
+
+
+def _distribution_ledger_keys(instance, reverse, pk_set=None):
+    if not reverse:
+        return [distribution_ledger_key(instance)]
+    distributions = ProductDistribution.objects.all()
+    if pk_set is not None:
+        distributions = distributions.filter(id__in=pk_set)
+    else:
+        distributions = distributions.filter(packaging_units=instance)
+    return [distribution_ledger_key(distribution) for distribution in distributions]
@@ -0,0 +1,297 @@
+# backend/trackandtrace/strain_card_service.py
+"""
+Pflege und Auslieferung des materialisierten Sortenkarten-Index.
+
+Der Index besteht aus StrainCard (eine Zeile pro Sorte/Produkttyp) und
+StrainCardBucket (verfügbarer Bestand je Verpackungs-Batch und Gewicht).
+Änderungen an Verpackungseinheiten aktualisieren nur die betroffenen
+Verpackungs-Batches, die StrainCard-Liste wird dann per SQL paginiert.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .models import (
+    PRODUCT_TYPE_CHOICES, PackagingBatch, PackagingUnit, StrainCard, StrainCardBucket
+)
+
+UNKNOWN_STRAIN = "Unbekannte Sorte"
+UNKNOWN_PRODUCT_TYPE = "unknown"
+
+# Für die Serialisierung von Einheiten (cbd_content liegt nur an der Laborkontrolle)
+PACKAGING_UNIT_RELATED = ('batch', 'batch__lab_testing_batch')
+
+
+def available_units():
+    """Verpackungseinheiten, die weder vernichtet noch ausgegeben wurden"""
+    return PackagingUnit.objects.filter(
+        is_destroyed=False
+    ).exclude(
+        distributions__isnull=False
+    )
+
+
+def get_product_type_display(product_type):
+    return dict(PRODUCT_TYPE_CHOICES).get(product_type, 'Unbekannt')
+
+
+def get_batch_cannabis_id(batch):
+    """Ermittelt die echte Cannabis-Charge-ID (Ernte) eines Verpackungs-Batches"""
+    if batch.lineage_harvest_batch_id:
+        return f"harvest_{batch.lineage_harvest_batch_id}"
+    return f"packaging_{batch.id}"
+
+
+@transaction.atomic
+def refresh_packaging_batches(batch_ids):
+    """
+    Baut die Buckets der angegebenen Verpackungs-Batches neu auf und
+    aktualisiert die Summen der betroffenen Sortenkarten.
+    """
+    batch_ids = {batch_id for batch_id in batch_ids if batch_id}
+    if not batch_ids:
+        return
+
+    existing_buckets = StrainCardBucket.objects.filter(packaging_batch_id__in=batch_ids)
+    affected_cards = set(existing_buckets.values_list('card_id', flat=True))
+    existing_buckets.delete()
+
+    # Verfügbarer Bestand pro Batch und Gewicht in einer Abfrage
+    stock_by_batch = defaultdict(list)
+    stock = available_units().filter(
+        batch_id__in=batch_ids
+    ).order_by().values(
+        'batch_id', 'weight'
+    ).annotate(
+        unit_count=Count('id'),
+        min_price=Min('unit_price'),
+        max_price=Max('unit_price')
+    )
+    for row in stock:
+        stock_by_batch[row['batch_id']].append(row)
+
+    if stock_by_batch:
+        batches = PackagingBatch.objects.filter(id__in=stock_by_batch.keys())
+
+        new_buckets = []
+        for batch in batches:
+            card, _ = StrainCard.objects.get_or_create(
+                strain_name=batch.lineage_strain_name or UNKNOWN_STRAIN,
+                product_type=batch.lineage_product_type or UNKNOWN_PRODUCT_TYPE
+            )
+            affected_cards.add(card.id)
+
+            cannabis_batch_id = get_batch_cannabis_id(batch)
+            for row in stock_by_batch[batch.id]:
+                new_buckets.append(StrainCardBucket(
+                    card=card,
+                    packaging_batch=batch,
+                    cannabis_batch_id=cannabis_batch_id,
+                    weight=row['weight'],
+                    thc_content=batch.lineage_thc_content,
+                    unit_count=row['unit_count'],
+                    min_price=row['min_price'],
+                    max_price=row['max_price']
+                ))
+
+        StrainCardBucket.objects.bulk_create(new_buckets)
+
+    _recalculate_cards(affected_cards)
+
+
+def _recalculate_cards(card_ids):
+    """Berechnet die Kartensummen aus den Buckets neu und entfernt leere Karten"""
+    if not card_ids:
+        return
+
+    totals = {
+        row['card_id']: row
+        for row in StrainCardBucket.objects.filter(
+            card_id__in=card_ids
+        ).order_by().values('card_id').annotate(
+            total_unit_count=Sum('unit_count'),
+            batch_count=Count('cannabis_batch_id', distinct=True),
+            min_price=Min('min_price'),
+            max_price=Max('max_price'),
+            min_thc=Min('thc_content'),
+            max_thc=Max('thc_content')
+        )
+    }
+
+    StrainCard.objects.filter(id__in=card_ids).exclude(id__in=totals.keys()).delete()
+
+    cards = list(StrainCard.objects.filter(id__in=totals.keys()))
+    for card in cards:
+        row = totals[card.id]
+        card.total_unit_count = row['total_unit_count'] or 0
+        card.batch_count = row['batch_count']
+        card.min_price = row['min_price']
+        card.max_price = row['max_price']
+        card.min_thc = row['min_thc']
+        card.max_thc = row['max_thc']
+
+    StrainCard.objects.bulk_update(cards, [
+        'total_unit_count', 'batch_count', 'min_price', 'max_price', 'min_thc', 'max_thc'
+    ])
+
+
+@transaction.atomic
+def rebuild_all(chunk_size=500):
+    """Baut den kompletten Index neu auf (Erstbefüllung / Reparatur)"""
+    StrainCard.objects.all().delete()
+
+    batch_ids = list(
+        available_units().order_by().values_list('batch_id', flat=True).distinct()
+    )
+    for start in range(0, len(batch_ids), chunk_size):
+        refresh_packaging_batches(batch_ids[start:start + chunk_size])
+
+    return StrainCard.objects.count()
+
+
+def compose_strain_card(strain_name, product_type, entries):
+    """
+    Baut das StrainCard-Format für das Frontend.
+
+    entries: Liste von (unit, cannabis_batch_id, thc_content) in Anzeigereihenfolge
+    """
+    available_weights = set()
+    weight_counts = defaultdict(int)
+    thc_values_by_batch = defaultdict(list)
+    cannabis_batches = set()
+    price_ranges = defaultdict(list)
+    min_price = float('inf')
+    max_price = 0
+
+    for unit, cannabis_batch_id, thc_content in entries:
+        weight = float(unit.weight) if unit.weight else 0
+        available_weights.add(weight)
+        weight_counts[weight] += 1
+
+        if unit.unit_price:
+            price = float(unit.unit_price)
+            price_ranges[weight].append(price)
+            min_price = min(min_price, price)
+            max_price = max(max_price, price)
+
+        if cannabis_batch_id:
+            cannabis_batches.add(cannabis_batch_id)
+            if thc_content:
+                thc_values_by_batch[cannabis_batch_id].append(float(thc_content))
+
+    # THC-Bereich über die Cannabis-Chargen
+    thc_display = "k.A."
+    if thc_values_by_batch:
+        all_thc_values = set()
+        for thc_list in thc_values_by_batch.values():
+            if thc_list:
+                all_thc_values.add(round(sum(thc_list) / len(thc_list), 1))
+
+        if len(all_thc_values) == 1:
+            thc_display = f"{list(all_thc_values)[0]}"
+        elif len(all_thc_values) > 1:
+            thc_display = f"{min(all_thc_values)} - {max(all_thc_values)}"
+
+    price_info = {
+        'has_prices': min_price != float('inf'),
+        'min_price': min_price if min_price != float('inf') else None,
+        'max_price': max_price if max_price > 0 else None,
+        'price_by_weight': {}
+    }
+
+    for weight, prices in price_ranges.items():
+        min_price_for_weight = min(prices)
+        max_price_for_weight = max(prices)
+        if min_price_for_weight == max_price_for_weight:
+            price_info['price_by_weight'][weight] = {
+                'price': min_price_for_weight,
+                'display': f"{min_price_for_weight:.2f} €"
+            }
+        else:
+            price_info['price_by_weight'][weight] = {
+                'min': min_price_for_weight,
+                'max': max_price_for_weight,
+                'display': f"{min_price_for_weight:.2f} - {max_price_for_weight:.2f} €"
+            }
+
+    # Preis pro Gramm vom ersten Unit mit Preis
+    price_per_gram = None
+    for unit, _, _ in entries:
+        if unit.unit_price and unit.weight:
+            price_per_gram = float(unit.unit_price) / float(unit.weight)
+            break
+
+    size_options = []
+    for weight in sorted(available_weights):
+        price_display = ""
+        if weight in price_info['price_by_weight']:
+            price_display = f" • {price_info['price_by_weight'][weight]['display']}"
+        size_options.append(f"{weight}g ({weight_counts[weight]}x){price_display}")
+
+    available_units_data = [
+        {
+            'id': str(unit.id),
+            'batch_number': unit.batch_number,
+            'weight': float(unit.weight) if unit.weight else 0,
+            'packaging_batch_id': unit.batch_id,
+            'cannabis_batch_id': cannabis_batch_id,
+            'unit_price': float(unit.unit_price) if unit.unit_price else None,
+            'price_display': f"{float(unit.unit_price):.2f} €" if unit.unit_price else None
+        }
+        for unit, cannabis_batch_id, _ in entries
+    ]
+
+    first_unit = entries[0][0]
+    sorted_weights = sorted(available_weights)
+
+    return {
+        'id': f"strain_{strain_name.replace(' ', '_')}_{product_type}",
+        'strain_name': strain_name,
+        'product_type': product_type,
+        'product_type_display': get_product_type_display(product_type),
+        'total_unit_count': len(entries),
+        'avg_thc_content': thc_display,
+        'size_options': size_options,
+        'available_weights': sorted_weights,
+        'batch_count': len(cannabis_batches),
+        'cannabis_batches': list(cannabis_batches),
+        'available_units': available_units_data,
+        'price_info': price_info,
+        'price_per_gram': f"{price_per_gram:.2f}" if price_per_gram else None,
+        'price_display': price_info['price_by_weight'][sorted_weights[0]]['display']
+            if price_info['has_prices'] and sorted_weights[0] in price_info['price_by_weight'] else None,
+        'first_unit': {
+            'id': str(first_unit.id),
+            'batch_number': first_unit.batch_number,
+            'weight': float(first_unit.weight) if first_unit.weight else 0,
+            'unit_price': float(first_unit.unit_price) if first_unit.unit_price else None
+        }
+    }
+
+
+def build_strain_cards(cards, units):
+    """
+    Baut die StrainCards für eine Seite aus den Index-Zeilen und den bereits
+    gefilterten verfügbaren Einheiten (eine Abfrage für Buckets).
+    """
+    cards = list(cards)
+    buckets = StrainCardBucket.objects.filter(card__in=cards)
+    bucket_by_key = {
+        (bucket.packaging_batch_id, bucket.weight): bucket
+        for bucket in buckets
+    }
+
+    entries_by_card = defaultdict(list)
+    for unit in units.filter(batch_id__in={key[0] for key in bucket_by_key}):
+        bucket = bucket_by_key.get((unit.batch_id, unit.weight))
+        if bucket:
+            entries_by_card[bucket.card_id].append(
+                (unit, bucket.cannabis_batch_id, bucket.thc_content)
+            )
+
+    return [
+        compose_strain_card(card.strain_name, card.product_type, entries_by_card[card.id])
+        for card in cards
+        if entries_by_card.get(card.id)
+    ]
@@ -1,8 +1,21 @@
 from django.contrib import admin
-from .models import AccessEvent
+from .models import AccessEvent, AccessEventHourly, ListenerHealth
 
 @admin.register(AccessEvent)
 class AccessEventAdmin(admin.ModelAdmin):
     list_display = ('timestamp', 'actor', 'door', 'event_type')
     list_filter = ('event_type', 'door')
     search_fields = ('actor',)
+
+
+@admin.register(AccessEventHourly)
+class AccessEventHourlyAdmin(admin.ModelAdmin):
+    list_display = ('bucket', 'door', 'actor', 'count')
+    list_filter = ('door',)
+    search_fields = ('actor',)
+
+
+@admin.register(ListenerHealth)
+class ListenerHealthAdmin(admin.ModelAdmin):
+    list_display = ('name', 'connected', 'last_connected_at', 'last_event_at', 'events_written', 'updated_at')
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,128 @@
+# unifi_access/analytics.py
+"""
+Auswertungen der Zugriffsereignisse.
+
+- event_feed: Ereignisliste mit Keyset-Paginierung über (timestamp, id);
+  jede Seite ist eine Indexabfrage, unabhängig davon, wie weit geblättert
+  wird.
+- AccessEventHourly: Zugriffe pro Stunde, Tür und Person. Wird nach jedem
+  Schreiben für die betroffenen Stunden neu gebildet (refresh_hourly) und
+  dient als Grundlage der Heatmap, die damit höchstens eine Zeile pro
+  Stunde liest statt aller Ereignisse.
+"""
+import base64
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import AccessEvent, AccessEventHourly
+
+FEED_DEFAULT_LIMIT = 50
+FEED_MAX_LIMIT = 500
+
+
+def hour_start(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def refresh_hourly(start, end=None):
+    """
+    Berechnet die Stundenzählungen für alle Stunden neu, die [start, end]
+    berühren. Gibt die Anzahl geschriebener Zeilen zurück.
+    """
+    end = end or start
+    hour_from = hour_start(start)
+    hour_to = hour_start(end) + timedelta(hours=1)
+
+    rows = [
+        AccessEventHourly(**row)
+        for row in AccessEvent.objects.filter(
+            timestamp__gte=hour_from, timestamp__lt=hour_to
+        ).annotate(
+            bucket=TruncHour('timestamp')
+        ).order_by().values('bucket', 'door', 'actor').annotate(count=Count('id'))
+    ]
+    if rows:
+        AccessEventHourly.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['bucket', 'door', 'actor'],
+            update_fields=['count']
+        )
+    return len(rows)
+
+
+def encode_cursor(event):
+    raw = f"{event['timestamp'].isoformat()}|{event['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Ungültiger Cursor")
+
+
+def event_feed(cursor=None, limit=FEED_DEFAULT_LIMIT, door=None, actor=None, start=None, end=None):
+    """
+    Liefert (ereignisse, next_cursor), neueste zuerst. next_cursor ist None,
+    wenn keine weiteren Ereignisse vorhanden sind.
+    """
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+    queryset = AccessEvent.objects.all()
+    if door:
+        queryset = queryset.filter(door=door)
+    if actor:
+        queryset = queryset.filter(actor=actor)
+    if start:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end:
+        queryset = queryset.filter(timestamp__lt=end)
+    if cursor:
+        timestamp, event_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=event_id))
+
+    events = list(
+        queryset.order_by('-timestamp', '-id').values(
+            'id', 'actor', 'door', 'event_type', 'authentication', 'card_uid', 'timestamp'
+        )[:limit + 1]
+    )
+    next_cursor = encode_cursor(events[limit - 1]) if len(events) > limit else None
+    return events[:limit], next_cursor
+
+
+def heatmap(start, end, door=None, actor=None):
+    """
+    Zugriffe im Zeitraum als Raster Wochentag (0 = Montag) × Stunde in
+    lokaler Zeit, dazu Summen je Tür.
+    """
+    queryset = AccessEventHourly.objects.filter(bucket__gte=hour_start(start), bucket__lt=end)
+    if door:
+        queryset = queryset.filter(door=door)
+    if actor:
+        queryset = queryset.filter(actor=actor)
+
+    grid = [[0] * 24 for _ in range(7)]
+    total = 0
+    for row in queryset.order_by().values('bucket').annotate(total=Sum('count')):
+        local = timezone.localtime(row['bucket'])
+        grid[local.weekday()][local.hour] += row['total']
+        total += row['total']
+
+    doors = {
+        row['door']: row['total']
+        for row in queryset.order_by().values('door').annotate(total=Sum('count')).order_by('-total')
+    }
+    return {
+        'start': start,
+        'end': end,
+        'total': total,
+        'actors': queryset.order_by().values('actor').distinct().count(),
+        'grid': grid,
+        'doors': doors,
+    }
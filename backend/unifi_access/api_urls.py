@@ -3,4 +3,6 @@ from . import api_views
 
 urlpatterns = [
     path('events/', api_views.api_latest_events, name='api_latest_events'),
+    path('events/feed/', api_views.api_event_feed, name='api_event_feed'),
+    path('events/heatmap/', api_views.api_event_heatmap, name='api_event_heatmap'),
 ]
@@ -1,12 +1,85 @@
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from .analytics import FEED_DEFAULT_LIMIT, event_feed, heatmap
 from .models import AccessEvent
 from .serializers import AccessEventSerializer
 
+HEATMAP_MAX_DAYS = 366
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def api_latest_events(request):
     events = AccessEvent.objects.all().order_by('-timestamp')[:50]
     serializer = AccessEventSerializer(events, many=True)
     return Response(serializer.data)
+
+
+def _parse_time(value):
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _parse_range(params, default_days=None):
+    """Zeitraum aus days oder start/end (ISO-Format); end standardmäßig jetzt"""
+    start = end = None
+    if params.get('days'):
+        days = int(params['days'])
+        if days < 1:
+            raise ValueError("days muss mindestens 1 sein")
+        start = timezone.now() - timedelta(days=days)
+    elif default_days:
+        start = timezone.now() - timedelta(days=default_days)
+    if params.get('start'):
+        start = _parse_time(params['start'])
+    if params.get('end'):
+        end = _parse_time(params['end'])
+    return start, end
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_event_feed(request):
+    """
+    Ereignisliste mit Keyset-Paginierung, neueste zuerst.
+    Parameter: cursor (aus next_cursor), limit, door, actor, days oder start/end.
+    """
+    try:
+        start, end = _parse_range(request.query_params)
+        limit = int(request.query_params.get('limit', FEED_DEFAULT_LIMIT))
+        events, next_cursor = event_feed(
+            cursor=request.query_params.get('cursor'),
+            limit=limit,
+            door=request.query_params.get('door'),
+            actor=request.query_params.get('actor'),
+            start=start,
+            end=end
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': events, 'next_cursor': next_cursor})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_event_heatmap(request):
+    """
+    Zugriffe als Raster Wochentag × Stunde aus den Stundenzählungen.
+    Parameter: days (Standard 7) oder start/end, door, actor.
+    """
+    try:
+        start, end = _parse_range(request.query_params, default_days=7)
+    except ValueError as e:
+        return Response({"error": f"Ungültiger Zeitraum: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    end = end or timezone.now()
+    if start is None or start >= end or end - start > timedelta(days=HEATMAP_MAX_DAYS):
+        return Response({"error": f"Zeitraum muss zwischen 0 und {HEATMAP_MAX_DAYS} Tagen liegen"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(heatmap(start, end, request.query_params.get('door'), request.query_params.get('actor')))
@@ -3,8 +3,6 @@ import os
 import asyncio
 import json
 import websockets
-import datetime
-from threading import Thread
 
 # Pfad zur Django-App sicherstellen
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -18,6 +16,19 @@ load_dotenv()
 HA_ACCESS_TOKEN = os.getenv('HOME_ASSISTANT_ACCESS_TOKEN')
 HA_API_URL = os.getenv('HOME_ASSISTANT_API_URL')
 
+# Name des Listeners in der Statustabelle (unifi_access.ListenerHealth)
+LISTENER_NAME = "home_assistant"
+
+# Schreibfenster: Ereignisse werden gesammelt und gemeinsam gespeichert
+WRITE_BATCH_SIZE = 50
+WRITE_WINDOW_SECONDS = 0.5
+WRITE_RETRIES = 3
+
+# Keepalive über den nativen WebSocket-Ping der Bibliothek; nach jedem
+# beantworteten Ping wird das Lebenszeichen (ListenerHealth.updated_at) erneuert
+PING_INTERVAL = 30
+PING_TIMEOUT = 10
+
 # WebSocket-URL aus API-URL ableiten
 def get_websocket_url():
     if HA_API_URL.startswith("http://"):
@@ -26,128 +37,185 @@ def get_websocket_url():
         return HA_API_URL.replace("https://", "wss://") + "/api/websocket"
     return "ws://" + HA_API_URL + "/api/websocket"
 
-# Direktstart (optional)
-if __name__ == "__main__":
-    import django
-    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../config')))
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
-    django.setup()
 
-    from django.conf import settings
+# Status speichern (in der Datenbank, damit API und andere Prozesse ihn sehen)
+def record_health(**fields):
+    from unifi_access.models import ListenerHealth
+    try:
+        ListenerHealth.record(LISTENER_NAME, **fields)
+    except Exception as e:
+        print("❗ Fehler beim Speichern des Listener-Status:", e)
+
+
+# Ereignisse eines Schreibfensters speichern
+def write_access_events(batch):
+    from django.db.models import F
     from django.utils import timezone
-    from asgiref.sync import sync_to_async
+    from unifi_access.analytics import refresh_hourly
     from unifi_access.models import AccessEvent
 
-    # Globale Status-Flags
-    if not hasattr(settings, 'HA_WEBSOCKET_CONNECTED'):
-        settings.HA_WEBSOCKET_CONNECTED = False
+    events = AccessEvent.objects.bulk_create([AccessEvent(**fields) for fields in batch])
+    refresh_hourly(events[0].timestamp, events[-1].timestamp)
+    record_health(last_event_at=timezone.now(), events_written=F('events_written') + len(events))
+    print(f"✅ {len(events)} Ereignis(se) gespeichert")
+    return len(events)
+
+
+def parse_access_event(data):
+    """Wandelt eine Home-Assistant-Nachricht in AccessEvent-Felder um (oder None)"""
+    if data.get("type") != "event" or data.get("event", {}).get("event_type") != "unifi_access_entry":
+        return None
+
+    event_data = data.get("event", {})
+    data_field = event_data.get("data", {})
+    return {
+        "actor": data_field.get("actor") or "Unbekannt",
+        "door": data_field.get("door_name") or "Unbekannte Tür",
+        "authentication": data_field.get("authentication") or "Unbekannt",
+        "event_type": event_data.get("event_type") or "unifi_access_entry",
+    }
+
+
+async def access_event_writer(queue, batch_size=WRITE_BATCH_SIZE, window=WRITE_WINDOW_SECONDS):
+    """
+    Leert die Ereignis-Queue: wartet auf das erste Ereignis, sammelt bis zu
+    batch_size weitere innerhalb von window Sekunden und speichert sie mit
+    einem bulk_create in einem Thread-Wechsel.
+    """
+    from asgiref.sync import sync_to_async
+    write_async = sync_to_async(write_access_events)
+    loop = asyncio.get_running_loop()
+
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + window
+        while len(batch) < batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                await write_async(batch)
+                break
+            except Exception as e:
+                print(f"❗ Fehler beim Speichern in DB (Versuch {attempt}/{WRITE_RETRIES}):", e)
+                await asyncio.sleep(attempt)
+        else:
+            print(f"❌ {len(batch)} Ereignis(se) verworfen:", batch)
+
+        for _ in batch:
+            queue.task_done()
 
-    if not hasattr(settings, 'HA_LAST_CONNECTION_TIME'):
-        settings.HA_LAST_CONNECTION_TIME = None
 
-    # Event speichern
-    def create_access_event(actor, door, event_type, authentication=None):
+async def report_alive(ws, record_health_async):
+    """Erneuert das Lebenszeichen, solange die Verbindung Pings beantwortet"""
+    while True:
+        await asyncio.sleep(PING_INTERVAL)
         try:
-            event = AccessEvent.objects.create(
-                actor=actor,
-                door=door,
-                event_type=event_type,
-                authentication=authentication
-            )
-            print(f"✅ Ereignis gespeichert: #{event.id}")
-            return event.id
-        except Exception as e:
-            print("❗ Fehler beim Speichern in DB:", e)
-            return None
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, PING_TIMEOUT)
+        except Exception:
+            return  # Verbindung beendet; die Bibliothek schließt sie selbst
+        await record_health_async(connected=True)
 
-    create_access_event_async = sync_to_async(create_access_event)
 
-    # Listener für WebSocket
-    async def listen_to_home_assistant():
-        print("💡 WebSocket-Listener wird vorbereitet...")
-        websocket_url = get_websocket_url()
-        reconnect_delay = 5
-        attempt = 0
+# Listener für WebSocket
+async def listen_to_home_assistant(queue):
+    from asgiref.sync import sync_to_async
+    from django.utils import timezone
+    record_health_async = sync_to_async(record_health)
 
-        while True:
-            attempt += 1
-            print(f"🔁 Verbindungsversuch #{attempt} zu {websocket_url}...")
+    print("💡 WebSocket-Listener wird vorbereitet...")
+    websocket_url = get_websocket_url()
+    reconnect_delay = 5
+    attempt = 0
 
-            try:
-                async with websockets.connect(websocket_url) as ws:
-                    print("✅ WebSocket-Verbindung hergestellt.")
-                    settings.HA_WEBSOCKET_CONNECTED = True
-                    settings.HA_LAST_CONNECTION_TIME = timezone.now()
-
-                    await ws.recv()
-                    await ws.send(json.dumps({
-                        "type": "auth",
-                        "access_token": HA_ACCESS_TOKEN
-                    }))
-
-                    auth_response = json.loads(await ws.recv())
-                    if auth_response.get("type") != "auth_ok":
-                        print("❌ Authentifizierung fehlgeschlagen!")
-                        settings.HA_WEBSOCKET_CONNECTED = False
-                        await asyncio.sleep(reconnect_delay)
-                        continue
-
-                    await ws.send(json.dumps({
-                        "id": 1,
-                        "type": "subscribe_events",
-                        "event_type": "unifi_access_entry"
-                    }))
-                    print("📱 Abonnement erfolgreich.")
-
-                    ping_counter = 0
-
-                    while True:
+    while True:
+        attempt += 1
+        print(f"🔁 Verbindungsversuch #{attempt} zu {websocket_url}...")
+
+        try:
+            async with websockets.connect(
+                websocket_url, ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT
+            ) as ws:
+                print("✅ WebSocket-Verbindung hergestellt.")
+
+                await ws.recv()
+                await ws.send(json.dumps({
+                    "type": "auth",
+                    "access_token": HA_ACCESS_TOKEN
+                }))
+
+                auth_response = json.loads(await ws.recv())
+                if auth_response.get("type") != "auth_ok":
+                    print("❌ Authentifizierung fehlgeschlagen!")
+                    await record_health_async(connected=False, last_disconnected_at=timezone.now(),
+                                              last_error="Authentifizierung fehlgeschlagen")
+                    await asyncio.sleep(reconnect_delay)
+                    continue
+
+                await ws.send(json.dumps({
+                    "id": 1,
+                    "type": "subscribe_events",
+                    "event_type": "unifi_access_entry"
+                }))
+                print("📱 Abonnement erfolgreich.")
+                await record_health_async(connected=True, last_connected_at=timezone.now(), last_error="")
+                attempt = 0
+
+                # Kein Timeout-Polling: Pings laufen im Hintergrund der Bibliothek
+                alive = asyncio.create_task(report_alive(ws, record_health_async))
+                try:
+                    async for message in ws:
                         try:
-                            if ping_counter >= 60:
-                                ping_id = int(datetime.datetime.now().timestamp())
-                                await ws.send(json.dumps({"id": ping_id, "type": "ping"}))
-                                ping_counter = 0
-
-                            message = await asyncio.wait_for(ws.recv(), timeout=1.0)
-                            data = json.loads(message)
-
-                            if data.get("type") == "event" and data.get("event", {}).get("event_type") == "unifi_access_entry":
-                                try:
-                                    event_data = data.get("event", {})
-                                    data_field = event_data.get("data", {})
-
-                                    actor = data_field.get("actor") or "Unbekannt"
-                                    door = data_field.get("door_name") or "Unbekannte Tür"
-                                    auth_method = data_field.get("authentication") or "Unbekannt"
-                                    event_type = event_data.get("event_type") or "unifi_access_entry"
-
-                                    print(f"🔓 RFID-Event erkannt: {actor} an {door} mit {auth_method}")
-                                    await create_access_event_async(actor, door, event_type, auth_method)
-
-                                except Exception as e:
-                                    print("❗ Fehler beim Verarbeiten eines Events:", e)
-
-                        except asyncio.TimeoutError:
-                            ping_counter += 1
-                            continue
-                        except websockets.exceptions.ConnectionClosed:
-                            print("🔌 Verbindung verloren – neuer Versuch...")
-                            settings.HA_WEBSOCKET_CONNECTED = False
-                            break
+                            fields = parse_access_event(json.loads(message))
+                            if fields:
+                                print(f"🔓 RFID-Event erkannt: {fields['actor']} an {fields['door']} "
+                                      f"mit {fields['authentication']}")
+                                queue.put_nowait(fields)
                         except Exception as e:
-                            print("⚠️ Fehler in der Event-Schleife:", e)
-                            continue
+                            print("❗ Fehler beim Verarbeiten eines Events:", e)
+                finally:
+                    alive.cancel()
 
-            except Exception as e:
-                print("❗ Listener konnte nicht starten:", e)
-                settings.HA_WEBSOCKET_CONNECTED = False
+                print("🔌 Verbindung verloren – neuer Versuch...")
+                await record_health_async(connected=False, last_disconnected_at=timezone.now(),
+                                          last_error="Verbindung geschlossen")
+
+        except Exception as e:
+            print("❗ Listener konnte nicht starten:", e)
+            await record_health_async(connected=False, last_disconnected_at=timezone.now(), last_error=str(e))
+
+        wait_time = min(reconnect_delay * (attempt % 5 + 1), 60)
+        print(f"⏳ Warten {wait_time}s vor erneutem Versuch...")
+        await asyncio.sleep(wait_time)
 
-            wait_time = min(reconnect_delay * (attempt % 5 + 1), 60)
-            print(f"⏳ Warten {wait_time}s vor erneutem Versuch...")
-            await asyncio.sleep(wait_time)
+
+async def run_listener():
+    queue = asyncio.Queue()
+    writer = asyncio.create_task(access_event_writer(queue))
+    try:
+        await listen_to_home_assistant(queue)
+    finally:
+        # Bereits empfangene Ereignisse noch speichern
+        await asyncio.wait_for(queue.join(), timeout=10)
+        writer.cancel()
+
+
+# Direktstart (optional)
+if __name__ == "__main__":
+    import django
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../config')))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+    django.setup()
 
     try:
-        asyncio.run(listen_to_home_assistant())
+        asyncio.run(run_listener())
     except KeyboardInterrupt:
         pass
     except Exception as e:
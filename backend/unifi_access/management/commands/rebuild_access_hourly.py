@@ -0,0 +1,36 @@
+# backend/unifi_access/management/commands/rebuild_access_hourly.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from unifi_access.analytics import refresh_hourly
+from unifi_access.models import AccessEvent
+
+
+class Command(BaseCommand):
+    help = "Berechnet die Zugriffe pro Stunde, Tür und Person neu (tageweise)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help="Nur die letzten N Tage neu berechnen")
+
+    def handle(self, *args, **options):
+        bounds = AccessEvent.objects.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+        if not bounds['first']:
+            self.stdout.write("⚠️ Keine Zugriffsereignisse vorhanden.")
+            return
+
+        start = bounds['first']
+        if options['days']:
+            start = max(start, bounds['last'] - timedelta(days=options['days']))
+
+        self.stdout.write(f"🔄 Verdichte Zugriffsereignisse ab {start:%d.%m.%Y}...")
+        rows = 0
+        while start <= bounds['last']:
+            end = min(start + timedelta(days=1), bounds['last'])
+            rows += refresh_hourly(start, end)
+            start += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} Stundenzählungen geschrieben"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unifi_access', '0004_accessevent_card_uid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListenerHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('connected', models.BooleanField(default=False)),
+                ('last_connected_at', models.DateTimeField(blank=True, null=True)),
+                ('last_disconnected_at', models.DateTimeField(blank=True, null=True)),
+                ('last_event_at', models.DateTimeField(blank=True, null=True)),
+                ('events_written', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Listener-Status',
+                'verbose_name_plural': 'Listener-Status',
+            },
+        ),
+    ]
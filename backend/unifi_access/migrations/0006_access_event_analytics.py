@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unifi_access', '0005_listener_health'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessEventHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Beginn der Stunde (lokale Zeit)')),
+                ('door', models.CharField(max_length=255)),
+                ('actor', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Zugriffe pro Stunde',
+                'verbose_name_plural': 'Zugriffe pro Stunde',
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='accessevent',
+            index=models.Index(fields=['timestamp', 'id'], name='unifi_acces_timesta_d11c08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accessevent',
+            index=models.Index(fields=['door', 'timestamp'], name='unifi_acces_door_329d3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accessevent',
+            index=models.Index(fields=['actor', 'timestamp'], name='unifi_acces_actor_7fe53a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesseventhourly',
+            index=models.Index(fields=['door', 'bucket'], name='unifi_acces_door_9ee218_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesseventhourly',
+            index=models.Index(fields=['actor', 'bucket'], name='unifi_acces_actor_15c8fc_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='accesseventhourly',
+            unique_together={('bucket', 'door', 'actor')},
+        ),
+    ]
@@ -1,5 +1,8 @@
 # models.py für unifi_access
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 
 class AccessEvent(models.Model):
     actor = models.CharField(max_length=255, help_text="Benutzer, der das Ereignis ausgelöst hat")
@@ -11,8 +14,82 @@ class AccessEvent(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['door', 'timestamp']),
+            models.Index(fields=['actor', 'timestamp']),
+        ]
         verbose_name = "Zugriffsereignis"
         verbose_name_plural = "Zugriffsereignisse"
 
     def __str__(self):
         return f"{self.actor} - {self.door} - {self.event_type} ({self.timestamp.strftime('%d.%m.%Y %H:%M:%S')})"
+
+
+
+class AccessEventHourly(models.Model):
+    """
+    Vorverdichtete Zugriffe pro Stunde, Tür und Person.
+    Grundlage für Belegungs-Heatmaps, ohne die Ereignistabelle zu scannen.
+    """
+    bucket = models.DateTimeField(help_text="Beginn der Stunde (lokale Zeit)")
+    door = models.CharField(max_length=255)
+    actor = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['bucket', 'door', 'actor']
+        indexes = [
+            models.Index(fields=['door', 'bucket']),
+            models.Index(fields=['actor', 'bucket']),
+        ]
+        ordering = ['-bucket']
+        verbose_name = "Zugriffe pro Stunde"
+        verbose_name_plural = "Zugriffe pro Stunde"
+
+    def __str__(self):
+        return f"{self.door} - {self.actor} ({self.bucket:%d.%m.%Y %H:00}): {self.count}"
+
+class ListenerHealth(models.Model):
+    """
+    Verbindungszustand eines Listener-Prozesses (z. B. Home Assistant).
+    Wird vom Listener geschrieben und von der API gelesen, damit der Zustand
+    auch außerhalb des Listener-Prozesses sichtbar ist. Solange die
+    Verbindung steht, erneuert der Listener updated_at nach jedem Ping; ohne
+    Lebenszeichen seit STALE_AFTER_SECONDS gilt er als getrennt (z. B. wenn
+    der Prozess beendet wurde oder abgestürzt ist).
+    """
+    STALE_AFTER_SECONDS = 90  # Drei Ping-Intervalle des Listeners
+
+    name = models.CharField(max_length=50, unique=True)
+    connected = models.BooleanField(default=False)
+    last_connected_at = models.DateTimeField(null=True, blank=True)
+    last_disconnected_at = models.DateTimeField(null=True, blank=True)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    events_written = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Listener-Status"
+        verbose_name_plural = "Listener-Status"
+
+    def __str__(self):
+        return f"{self.name} ({'verbunden' if self.connected else 'getrennt'})"
+
+    @classmethod
+    def record(cls, name, **fields):
+        """Aktualisiert den Status eines Listeners (Felder dürfen F-Ausdrücke sein)"""
+        fields['updated_at'] = timezone.now()
+        if not cls.objects.filter(name=name).update(**fields):
+            cls.objects.get_or_create(name=name)
+            cls.objects.filter(name=name).update(**fields)
+
+    @classmethod
+    def state(cls, name):
+        return cls.objects.filter(name=name).first()
+
+    def is_connected(self, now=None):
+        """Verbunden laut Listener und mit aktuellem Lebenszeichen"""
+        stale_before = (now or timezone.now()) - timedelta(seconds=self.STALE_AFTER_SECONDS)
+        return self.connected and self.updated_at is not None and self.updated_at >= stale_before
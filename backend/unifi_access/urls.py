@@ -1,10 +1,12 @@
 from django.urls import path
-from . import views
+from . import api_views, views
 
 app_name = 'unifi_access'
 
 urlpatterns = [
     path('api/events/', views.get_events, name='get_events'),
     path('api/status/', views.ha_status, name='ha_status'),
+    path('api/events/feed/', api_views.api_event_feed, name='event_feed'),
+    path('api/events/heatmap/', api_views.api_event_heatmap, name='event_heatmap'),
     path('latest-rfid/', views.latest_rfid_event, name='latest_rfid_event'),
 ]
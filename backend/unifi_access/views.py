@@ -1,8 +1,9 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.conf import settings
 from django.utils.timezone import now, timedelta
-from .models import AccessEvent
+from .models import AccessEvent, ListenerHealth
+
+HA_LISTENER_NAME = "home_assistant"
 
 @csrf_exempt
 def latest_rfid_event(request):
@@ -37,17 +38,24 @@ def get_events(request):
         'timestamp': event.timestamp.strftime('%d.%m.%Y %H:%M:%S')
     } for event in events]
 
+    health = ListenerHealth.state(HA_LISTENER_NAME)
     return JsonResponse({
         'events': events_data,
         'count': len(events_data),
-        'ha_connected': getattr(settings, 'HA_WEBSOCKET_CONNECTED', False)
+        'ha_connected': health.is_connected() if health else False
     })
 
 
 @csrf_exempt
 def ha_status(request):
+    # Status schreibt der Listener-Prozess (ha_listener.py) in die Datenbank;
+    # ohne aktuelles Lebenszeichen (updated_at) gilt er als getrennt
+    health = ListenerHealth.state(HA_LISTENER_NAME)
     return JsonResponse({
-        'connected': getattr(settings, 'HA_WEBSOCKET_CONNECTED', False),
-        'last_connection': getattr(settings, 'HA_LAST_CONNECTION_TIME', None),
+        'connected': health.is_connected() if health else False,
+        'last_heartbeat': health.updated_at if health else None,
+        'last_connection': health.last_connected_at if health else None,
+        'last_event': health.last_event_at if health else None,
+        'last_error': health.last_error if health else None,
         'events_count': AccessEvent.objects.count()
     })
@@ -7,6 +7,8 @@ from .api_views import (
     BindRfidSessionView,
     SecureMemberBindingView,
     CancelRfidSessionView,
+    StartRfidSessionView,
+    rfid_session_status,
 )
 
 urlpatterns = [
@@ -15,5 +17,7 @@ urlpatterns = [
     path('bind-rfid-session/', BindRfidSessionView.as_view(), name='bind-rfid-session'),
     path('secure-member-binding/', SecureMemberBindingView.as_view(), name='secure-member-binding'),
     path('cancel-rfid-session/', CancelRfidSessionView.as_view(), name='cancel-rfid-session'),
+    path('rfid-session/start/', StartRfidSessionView.as_view(), name='rfid-session-start'),
+    path('rfid-session/<str:session_id>/', rfid_session_status, name='rfid-session-status'),
 
 ]
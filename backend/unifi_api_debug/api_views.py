@@ -8,15 +8,21 @@ from rest_framework.generics import ListAPIView
 from django.conf import settings
 from django.utils.timezone import now
 from rest_framework import status
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.request import Request
 from .models import NfcDebugLog
 from .serializers import NfcDebugLogSerializer
+from . import nfc_index
+from .reader_sessions import reader_sessions
 from .unifi_rfid_listener import (
     get_token_from_reader,
     resolve_and_store_user_from_token,
-    get_recent_rfid_user
+    get_recent_rfid_user,
+    save_recent_rfid_user
 )
 from members.models import Member
-import requests
 
 UNIFI_API_URL = f"{settings.UNIFI_ACCESS_HOST}/api/v1/developer"
 UNIFI_API_TOKEN = settings.UNIFI_ACCESS_TOKEN
@@ -25,41 +31,14 @@ class TestNfcSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        token = get_token_from_reader()
+        token, _session_id = get_token_from_reader()
         if not token:
             return Response({"success": False, "message": "Keine Karte erkannt."})
 
-        headers = {
-            "Authorization": f"Bearer {UNIFI_API_TOKEN}",
-            "Accept": "application/json",
-        }
-
-        full_name = None
-        unifi_user_id = None
-
-        try:
-            response = requests.get(f"{UNIFI_API_URL}/users", headers=headers, verify=False)
-            if response.status_code == 200:
-                for user in response.json().get("data", []):
-                    for card in user.get("nfc_cards", []):
-                        if card.get("token") == token:
-                            full_name = user.get("full_name")
-                            unifi_user_id = user.get("id")
-                            break
-        except Exception:
-            pass
-
-        member_name = None
-
-        if full_name:
-            try:
-                parts = full_name.strip().split()
-                first_name = parts[0]
-                last_name = parts[-1] if len(parts) > 1 else ""
-                member = Member.objects.get(first_name__iexact=first_name, last_name__iexact=last_name)
-                member_name = str(member)
-            except Member.DoesNotExist:
-                pass
+        entry = nfc_index.resolve_token(token)
+        full_name = entry.unifi_name if entry else None
+        unifi_user_id = entry.unifi_user_id if entry else None
+        member_name = str(entry.member) if entry and entry.member else None
 
         NfcDebugLog.objects.create(
             token=token,
@@ -148,33 +127,77 @@ class SecureMemberBindingView(APIView):
         })
 
 
+class StartRfidSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Startet eine Leser-Session und antwortet sofort mit der Session-ID.
+        Das Ergebnis liefert rfid_session_status (Long-Poll über ?wait=).
+        """
+        try:
+            session_id = reader_sessions.start(device_id=request.data.get("device_id"))
+        except Exception as e:
+            return Response({"success": False, "message": f"Fehler beim Erstellen der Session: {str(e)}"}, status=502)
+
+        return Response({"success": True, "session_id": session_id, "status": "pending"}, status=202)
+
+
+MAX_LONG_POLL_SECONDS = 25
+
+
+def _is_authenticated(request):
+    drf_request = Request(request, authenticators=[TokenAuthentication(), SessionAuthentication()])
+    return drf_request.user.is_authenticated
+
+
+async def rfid_session_status(request, session_id):
+    """
+    Liefert den Stand einer Leser-Session. Mit ?wait=<Sekunden> wird bis zum
+    Ergebnis gewartet (Long-Poll); unter ASGI belegt das keinen Worker-Thread.
+    """
+    if not await sync_to_async(_is_authenticated)(request):
+        return JsonResponse({"detail": "Nicht authentifiziert."}, status=401)
+
+    try:
+        wait = min(max(float(request.GET.get("wait", 0)), 0), MAX_LONG_POLL_SECONDS)
+    except ValueError:
+        wait = 0
+
+    state = reader_sessions.get(session_id)
+    if state is None:
+        return JsonResponse({"success": False, "message": "Session nicht gefunden."}, status=404)
+
+    if state["status"] == "pending" and wait:
+        state = await reader_sessions.wait_async(session_id, timeout=wait) or state
+
+    if state["status"] == "success":
+        entry = await sync_to_async(nfc_index.resolve_token)(state["token"])
+        if entry:
+            save_recent_rfid_user(state["token"], entry.unifi_user_id)
+            state = dict(state, unifi_user_id=entry.unifi_user_id, unifi_name=entry.unifi_name)
+
+    return JsonResponse(dict(state, success=state["status"] in ("pending", "success")))
+
+
 class CancelRfidSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         from django.core.cache import cache
-        session_id = cache.get('active_rfid_session_id')
+        session_id = request.data.get('session_id') or cache.get('active_rfid_session_id')
         
         if not session_id:
             return Response({"success": False, "message": "Keine aktive Session gefunden."}, status=404)
         
         try:
-            # UniFi API aufrufen
-            headers = {
-                "Authorization": f"Bearer {UNIFI_API_TOKEN}",
-                "Accept": "application/json",
-            }
-            
-            response = requests.delete(
-                f"{UNIFI_API_URL}/credentials/nfc_cards/sessions/{session_id}",
-                headers=headers,
-                verify=False
-            )
+            # Lokales Polling beenden und Session bei UniFi löschen
+            status_code = reader_sessions.cancel(session_id)
             
             # Den Cache-Eintrag für die aktive Session löschen
             cache.delete('active_rfid_session_id')
             
-            if response.status_code == 200:
+            if status_code == 200:
                 return Response({
                     "success": True, 
                     "message": "RFID-Session erfolgreich abgebrochen."
@@ -182,11 +205,11 @@ class CancelRfidSessionView(APIView):
             else:
                 return Response({
                     "success": False, 
-                    "message": f"Fehler beim Abbrechen der Session. Status: {response.status_code}"
+                    "message": f"Fehler beim Abbrechen der Session. Status: {status_code}"
                 }, status=400)
                 
         except Exception as e:
             return Response({
                 "success": False, 
                 "message": f"Fehler beim Abbrechen der Session: {str(e)}"
-            }, status=500)
\ No newline at end of file
+            }, status=500)
@@ -0,0 +1,39 @@
+# backend/unifi_api_debug/management/commands/refresh_nfc_index.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from unifi_api_debug.nfc_index import refresh_from_unifi
+
+
+class Command(BaseCommand):
+    help = "Gleicht den lokalen NFC-Kartenindex mit UniFi Access ab (mit --interval regelmäßig)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Sekunden zwischen zwei Abgleichen; ohne Angabe nur ein Durchlauf")
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        try:
+            while True:
+                close_old_connections()
+                self.stdout.write("📡 Lade NFC-Karten aus UniFi Access...")
+                try:
+                    result = refresh_from_unifi()
+                except Exception as e:
+                    if not interval:
+                        raise
+                    self.stdout.write(self.style.WARNING(f"⚠️ Abgleich fehlgeschlagen: {e}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✅ {result['created']} neu, {result['updated']} geändert, {result['removed']} entfernt"
+                    ))
+
+                if not interval:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("🛑 NFC-Index-Abgleich beendet"))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0013_member_sync_outbox'),
+        ('unifi_api_debug', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NfcCardIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=128, unique=True)),
+                ('unifi_user_id', models.CharField(db_index=True, max_length=64)),
+                ('unifi_name', models.CharField(blank=True, max_length=255)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('member', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='nfc_cards', to='members.member')),
+            ],
+        ),
+    ]
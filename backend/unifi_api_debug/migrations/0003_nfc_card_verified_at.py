@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 13:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unifi_api_debug', '0002_nfc_card_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='nfccardindex',
+            old_name='refreshed_at',
+            new_name='verified_at',
+        ),
+        migrations.AlterField(
+            model_name='nfccardindex',
+            name='verified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
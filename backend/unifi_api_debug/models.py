@@ -1,7 +1,30 @@
 from django.db import models
+from django.utils import timezone
 
 class NfcDebugLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     token = models.CharField(max_length=128)
     status = models.CharField(max_length=32)
     raw_data = models.TextField(blank=True)
+
+
+class NfcCardIndex(models.Model):
+    """
+    Lokaler Index NFC-Token → UniFi-Benutzer/Mitglied. Wird beim Zuweisen
+    einer Karte gepflegt und bei unbekannten oder veralteten Token
+    (verified_at) aus UniFi nachgeladen.
+    """
+    token = models.CharField(max_length=128, unique=True)
+    unifi_user_id = models.CharField(max_length=64, db_index=True)
+    unifi_name = models.CharField(max_length=255, blank=True)
+    member = models.ForeignKey(
+        'members.Member',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='nfc_cards'
+    )
+    verified_at = models.DateTimeField(default=timezone.now)  # Zuletzt von UniFi bestätigt
+
+    def __str__(self):
+        return f"{self.token[:16]}... → {self.unifi_name or self.unifi_user_id}"
@@ -0,0 +1,167 @@
+# Datei: backend/unifi_api_debug/nfc_index.py
+"""
+Lokaler Index für NFC-Karten (NfcCardIndex).
+
+Ein Kartenscan wird über eine indizierte Abfrage auf den Token aufgelöst.
+Bei unbekannten Token und bei Einträgen, die UniFi seit MAX_AGE_SECONDS
+nicht mehr bestätigt hat (verified_at), wird die UniFi-Benutzerliste
+geladen und der Index abgeglichen (neue Karten anlegen, geänderte
+aktualisieren, entfernte löschen). Damit unbekannte Karten UniFi nicht bei
+jedem Scan abfragen, ist der Abgleich auf einmal pro
+REFRESH_THROTTLE_SECONDS begrenzt. Ist UniFi nicht erreichbar, wird ein
+veralteter Eintrag nicht mehr anerkannt.
+
+Regelmäßiger Abgleich: manage.py refresh_nfc_index --interval 300
+"""
+import re
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from members.models import Member
+from .models import NfcCardIndex
+
+UNIFI_API_URL = f"{settings.UNIFI_ACCESS_HOST}/api/v1/developer"
+REQUEST_TIMEOUT = 10
+REFRESH_THROTTLE_SECONDS = 30
+REFRESH_LOCK_KEY = "nfc_index:refreshed"
+MAX_AGE_SECONDS = getattr(settings, 'NFC_INDEX_MAX_AGE_SECONDS', 15 * 60)
+
+UNIFI_ID_PATTERN = re.compile(r'UniFi-ID:\s*(\S+)')
+
+
+def lookup(token):
+    """Indizierte Abfrage, None falls der Token nicht im Index ist"""
+    if not token:
+        return None
+    return NfcCardIndex.objects.select_related('member').filter(token=token).first()
+
+
+def is_verified(entry, now=None):
+    """True, wenn UniFi den Eintrag innerhalb von MAX_AGE_SECONDS bestätigt hat"""
+    return entry.verified_at >= (now or timezone.now()) - timedelta(seconds=MAX_AGE_SECONDS)
+
+
+def resolve_token(token):
+    """
+    Löst einen Token auf. Bei einem Fehltreffer oder veralteten Eintrag wird
+    der Index einmal mit UniFi abgeglichen und erneut gesucht.
+    """
+    entry = lookup(token)
+    if not token or (entry and is_verified(entry)):
+        return entry
+
+    if cache.add(REFRESH_LOCK_KEY, True, timeout=REFRESH_THROTTLE_SECONDS):
+        try:
+            refresh_from_unifi()
+        except Exception as e:
+            print(f"⚠️ NFC-Index konnte nicht aktualisiert werden: {e}")
+    # Nur bestätigte Einträge gelten (auch wenn der Abgleich gerade gedrosselt ist)
+    entry = lookup(token)
+    return entry if entry and is_verified(entry) else None
+
+
+def fetch_unifi_users():
+    headers = {
+        "Authorization": f"Bearer {settings.UNIFI_ACCESS_TOKEN}",
+        "Accept": "application/json",
+    }
+    response = requests.get(f"{UNIFI_API_URL}/users", headers=headers, verify=False, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("data", [])
+
+
+def _member_lookup():
+    """Zuordnung UniFi-ID → Mitglied (aus den Notizen) und Name → Mitglied"""
+    by_unifi_id = {}
+    by_name = {}
+    for member_id, first_name, last_name, notes in Member.objects.values_list(
+        'id', 'first_name', 'last_name', 'notes'
+    ):
+        match = UNIFI_ID_PATTERN.search(notes or "")
+        if match:
+            by_unifi_id[match.group(1).rstrip('.,;:"\' \t\n')] = member_id
+        by_name[(first_name.lower(), last_name.lower())] = member_id
+    return by_unifi_id, by_name
+
+
+def _match_member(user, by_unifi_id, by_name):
+    member_id = by_unifi_id.get(user.get("id"))
+    if member_id:
+        return member_id
+    parts = (user.get("full_name") or "").strip().split()
+    if parts:
+        return by_name.get((parts[0].lower(), parts[-1].lower() if len(parts) > 1 else ""))
+    return None
+
+
+@transaction.atomic
+def refresh_from_unifi(users=None):
+    """
+    Gleicht den Index mit den NFC-Karten aus UniFi ab und gibt die Anzahl
+    angelegter, aktualisierter und gelöschter Einträge zurück.
+    """
+    if users is None:
+        users = fetch_unifi_users()
+
+    by_unifi_id, by_name = _member_lookup()
+    remote = {}
+    for user in users:
+        if user.get("status") == "DEACTIVATED":
+            continue
+        member_id = _match_member(user, by_unifi_id, by_name)
+        for card in user.get("nfc_cards", []):
+            if card.get("token"):
+                remote[card["token"]] = (user.get("id"), user.get("full_name") or "", member_id)
+
+    now = timezone.now()
+    existing = {entry.token: entry for entry in NfcCardIndex.objects.all()}
+
+    created = [
+        NfcCardIndex(token=token, unifi_user_id=user_id, unifi_name=name, member_id=member_id, verified_at=now)
+        for token, (user_id, name, member_id) in remote.items()
+        if token not in existing
+    ]
+    updated = []
+    for token, entry in existing.items():
+        if token in remote and (entry.unifi_user_id, entry.unifi_name, entry.member_id) != remote[token]:
+            entry.unifi_user_id, entry.unifi_name, entry.member_id = remote[token]
+            updated.append(entry)
+    removed = [entry.id for token, entry in existing.items() if token not in remote]
+
+    NfcCardIndex.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
+    NfcCardIndex.objects.bulk_update(updated, ['unifi_user_id', 'unifi_name', 'member'], batch_size=500)
+    NfcCardIndex.objects.filter(id__in=removed).delete()
+    # Übrig sind nur noch Karten, die UniFi gerade geliefert hat: als bestätigt markieren
+    NfcCardIndex.objects.update(verified_at=now)
+
+    print(f"🔁 NFC-Index abgeglichen: {len(created)} neu, {len(updated)} geändert, {len(removed)} entfernt")
+    return {'created': len(created), 'updated': len(updated), 'removed': len(removed)}
+
+
+def remember_card(token, unifi_user_id, member=None, unifi_name=""):
+    """Trägt eine (neu) zugewiesene Karte ein; eine vorherige Zuordnung wird ersetzt"""
+    if not token or not unifi_user_id:
+        return None
+    entry, _ = NfcCardIndex.objects.update_or_create(
+        token=token,
+        defaults={
+            'unifi_user_id': unifi_user_id,
+            'unifi_name': unifi_name or (f"{member.first_name} {member.last_name}" if member else ""),
+            'member': member,
+            'verified_at': timezone.now(),
+        }
+    )
+    return entry
+
+
+def forget_unifi_user(unifi_user_id):
+    """Entfernt alle Karten eines UniFi-Benutzers aus dem Index"""
+    if not unifi_user_id:
+        return 0
+    deleted, _ = NfcCardIndex.objects.filter(unifi_user_id=unifi_user_id).delete()
+    return deleted
@@ -0,0 +1,183 @@
+# Datei: backend/unifi_api_debug/reader_sessions.py
+"""
+Asynchrone NFC-Leser-Sessions.
+
+Der ReaderSessionService besitzt eine eigene asyncio-Schleife in einem
+Hintergrund-Thread. Dort wird die UniFi-Session angelegt und abgefragt,
+ohne dass ein Django-Worker wartet. Ergebnisse werden im Cache
+veröffentlicht (rfid_session:<id>) und über ein Future gemeldet, auf das
+synchroner Code (wait) oder async Views (wait_async) warten können.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+UNIFI_API_URL = f"{settings.UNIFI_ACCESS_HOST}/api/v1/developer"
+
+SESSION_TIMEOUT = 10        # Sekunden, wie bisher im Polling
+POLL_INTERVAL = 0.8
+RESULT_TTL = 60             # So lange bleibt das Ergebnis im Cache abrufbar
+REQUEST_TIMEOUT = 5
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {settings.UNIFI_ACCESS_TOKEN}",
+        "Accept": "application/json",
+    }
+
+
+def _cache_key(session_id):
+    return f"rfid_session:{session_id}"
+
+
+class ReaderSessionService:
+    def __init__(self):
+        self._loop = None
+        self._client = None
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._futures = {}
+
+    # --- Hintergrund-Schleife ---
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, name="rfid-sessions", daemon=True)
+                thread.start()
+            return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(verify=False, timeout=REQUEST_TIMEOUT, headers=_headers())
+        return self._client
+
+    # --- Zustand ---
+
+    def _publish(self, session_id, status, token=None, error=None):
+        state = {
+            "session_id": session_id,
+            "status": status,
+            "token": token,
+            "error": error,
+            "updated_at": time.time(),
+        }
+        cache.set(_cache_key(session_id), state, timeout=RESULT_TTL)
+
+        if status != "pending":
+            future = self._futures.pop(session_id, None)
+            if future and not future.done():
+                future.set_result(state)
+            self._tasks.pop(session_id, None)
+            if cache.get('active_rfid_session_id') == session_id:
+                cache.delete('active_rfid_session_id')
+        return state
+
+    def get(self, session_id):
+        """Aktueller Stand einer Session oder None"""
+        return cache.get(_cache_key(session_id))
+
+    # --- Ablauf ---
+
+    async def _create_session(self, device_id):
+        client = await self._get_client()
+        response = await client.post(
+            f"{UNIFI_API_URL}/credentials/nfc_cards/sessions",
+            json={"device_id": device_id},
+        )
+        if response.status_code != 200:
+            raise ConnectionError(f"Session konnte nicht erstellt werden (Status {response.status_code})")
+        session_id = response.json().get("data", {}).get("session_id")
+        if not session_id:
+            raise ConnectionError("UniFi hat keine Session-ID geliefert")
+        return session_id
+
+    async def _poll(self, session_id, timeout):
+        client = await self._get_client()
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                response = await client.get(f"{UNIFI_API_URL}/credentials/nfc_cards/sessions/{session_id}")
+                if response.status_code == 200:
+                    result = response.json()
+                    data = result.get("data")
+                    if result.get("code") == "SUCCESS" and data and "token" in data:
+                        self._publish(session_id, "success", token=data["token"])
+                        return
+                await asyncio.sleep(POLL_INTERVAL)
+            self._publish(session_id, "timeout")
+        except asyncio.CancelledError:
+            self._publish(session_id, "cancelled")
+            raise
+        except Exception as e:
+            print(f"Fehler beim Abfragen der Session: {e}")
+            self._publish(session_id, "error", error=str(e))
+
+    async def _start(self, device_id, timeout):
+        session_id = await self._create_session(device_id)
+        self._futures[session_id] = concurrent.futures.Future()
+        self._publish(session_id, "pending")
+        self._tasks[session_id] = asyncio.get_running_loop().create_task(self._poll(session_id, timeout))
+        return session_id
+
+    def start(self, device_id=None, timeout=SESSION_TIMEOUT):
+        """
+        Legt eine Leser-Session an und gibt sofort die Session-ID zurück.
+        Das Abfragen übernimmt die Hintergrund-Schleife.
+        """
+        session_id = self._submit(
+            self._start(device_id or settings.UNIFI_DEVICE_ID, timeout)
+        ).result(timeout=REQUEST_TIMEOUT + 1)
+
+        # Session-ID im Cache speichern für möglichen Abbruch
+        cache.set('active_rfid_session_id', session_id, timeout=30)
+        print(f"Aktive Session gestartet: {session_id}")
+        return session_id
+
+    def wait(self, session_id, timeout=SESSION_TIMEOUT):
+        """Blockierendes Warten (für bestehende synchrone Aufrufer)"""
+        future = self._futures.get(session_id)
+        if future is None:
+            return self.get(session_id)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            return self.get(session_id)
+
+    async def wait_async(self, session_id, timeout=SESSION_TIMEOUT):
+        """Warten ohne Thread, für async Views unter ASGI"""
+        future = self._futures.get(session_id)
+        if future is None:
+            return self.get(session_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            return self.get(session_id)
+
+    async def _cancel(self, session_id):
+        task = self._tasks.get(session_id)
+        if task:
+            task.cancel()
+        else:
+            self._publish(session_id, "cancelled")
+        client = await self._get_client()
+        response = await client.delete(f"{UNIFI_API_URL}/credentials/nfc_cards/sessions/{session_id}")
+        return response.status_code
+
+    def cancel(self, session_id):
+        """Bricht eine Session lokal und bei UniFi ab und gibt den UniFi-Statuscode zurück"""
+        cache.set(f"cancelled_session:{session_id}", True, timeout=60)
+        return self._submit(self._cancel(session_id)).result(timeout=REQUEST_TIMEOUT + 1)
+
+
+reader_sessions = ReaderSessionService()
@@ -1,13 +1,13 @@
 # Datei: backend/unifi_api_debug/unifi_rfid_listener.py
 
 import os
-import time
-import requests
 from django.conf import settings
 from dotenv import load_dotenv
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 from django.core.cache import cache
+from . import nfc_index
+from .reader_sessions import reader_sessions
 
 load_dotenv()
 
@@ -26,19 +26,11 @@ def resolve_and_store_user_from_token():
     if not token:
         return None, None, None
 
-    try:
-        response = requests.get(f"{UNIFI_API_URL}/users", headers=HEADERS, verify=False)
-        if response.status_code == 200:
-            users = response.json().get("data", [])
-            for user in users:
-                for card in user.get("nfc_cards", []):
-                    if card.get("token") == token:
-                        user_id = user.get("id")
-                        full_name = user.get("full_name")
-                        save_recent_rfid_user(token, user_id)
-                        return token, user_id, full_name
-    except Exception:
-        pass
+    # Indizierte Abfrage, UniFi wird nur bei unbekannten Karten gefragt
+    entry = nfc_index.resolve_token(token)
+    if entry:
+        save_recent_rfid_user(token, entry.unifi_user_id)
+        return token, entry.unifi_user_id, entry.unifi_name
 
     return token, None, None
 
@@ -49,55 +41,19 @@ def get_recent_rfid_user(token: str):
     return cache.get(f"rfid:{token}")
 
 def get_token_from_reader():
-    session_id = None
-    token = None
-
+    """
+    Startet eine Leser-Session und wartet blockierend auf die Karte.
+    Das Polling läuft im ReaderSessionService; neue Clients sollten die
+    Endpunkte rfid-session/start, rfid-session/<id> und cancel-rfid-session
+    verwenden, die keinen Worker für die Wartezeit belegen.
+    """
     try:
-        response = requests.post(
-            f"{UNIFI_API_URL}/credentials/nfc_cards/sessions",
-            headers=HEADERS,
-            json={"device_id": UNIFI_DEVICE_ID},
-            verify=False,
-        )
-        if response.status_code == 200:
-            session_id = response.json().get("data", {}).get("session_id")
-            
-            # Session-ID im Cache speichern für möglichen Abbruch
-            if session_id:
-                cache.set('active_rfid_session_id', session_id, timeout=30)
-                print(f"Aktive Session gestartet: {session_id}")
+        session_id = reader_sessions.start()
     except Exception as e:
         print(f"Fehler beim Erstellen der Session: {e}")
         return None, None
 
-    if not session_id:
-        return None, None
-
-    token = None
-    timeout = time.time() + 10  # Maximal 10 Sekunden warten
-    
-    while time.time() < timeout:
-        try:
-            # Vor jedem Poll-Versuch prüfen, ob Session bereits abgebrochen wurde
-            if cache.get(f"cancelled_session:{session_id}"):
-                print(f"Session {session_id} wurde abgebrochen, polling wird beendet")
-                return None, None
-                
-            response = requests.get(
-                f"{UNIFI_API_URL}/credentials/nfc_cards/sessions/{session_id}",
-                headers=HEADERS,
-                verify=False,
-            )
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("code") == "SUCCESS":
-                    data = result.get("data")
-                    if data and "token" in data:
-                        token = data["token"]
-                        break
-        except Exception as e:
-            print(f"Fehler beim Abfragen der Session: {e}")
-            return None, None
-        time.sleep(0.8)
-
-    return token, session_id
\ No newline at end of file
+    state = reader_sessions.wait(session_id) or {}
+    if state.get("status") == "cancelled":
+        print(f"Session {session_id} wurde abgebrochen, polling wird beendet")
+    return state.get("token"), session_id
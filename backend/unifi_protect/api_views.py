@@ -6,6 +6,9 @@ from django.utils import timezone
 from datetime import timedelta
 from .models import ProtectSensor, ProtectSensorHistory
 from .serializers import ProtectSensorSerializer, ProtectSensorHistorySerializer
+from .ingestion import ingest_readings
+from . import rollups
+from .export import export_response, history_rows
 from rest_framework import viewsets, permissions, status
 from django.db.models import Q
 
@@ -107,6 +110,7 @@ class ProtectSensorViewSet(viewsets.ModelViewSet):
                     source="api"
                 )
                 print(f"Historieneintrag erstellt: {history_entry}")
+                rollups.refresh_rollups([sensor_name], current_time)
             else:
                 print(f"Historieneintrag existiert bereits für {sensor_name} um {current_time}")
         except Exception as e:
@@ -117,18 +121,38 @@ class ProtectSensorViewSet(viewsets.ModelViewSet):
         response["Cache-Control"] = "no-cache, no-store, must-revalidate"
         return response
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Nimmt alle Sensoren eines Abrufs in einer Anfrage entgegen.
+        Erwartet eine Liste oder {"sensors": [...], "source": "..."}; die
+        Einträge dürfen direkt aus dem Protect-Bootstrap stammen.
+        """
+        data = request.data
+        if isinstance(data, list):
+            items, source = data, "listener"
+        else:
+            items, source = data.get("sensors"), data.get("source", "listener")
+
+        if not isinstance(items, list):
+            return Response({"error": "Liste von Sensoren erforderlich"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest_readings(items, source=source)
+
+        response = Response(result, status=status.HTTP_201_CREATED)
+        response["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        return response
+
     @action(detail=True, methods=["get"])
     def history(self, request, pk=None):
         """
-        Endpunkt für Verlaufsdaten mit umfassender Debug-Ausgabe und verbesserter Logik.
-        Gibt historische Daten für einen bestimmten Sensor zurück.
+        Verlaufsdaten eines Sensors für Diagramme.
+        Zeitraum über days oder start/end (Standard: letzte 24 Stunden).
+        resolution=auto|raw|hour|day wählt die Stufe, max_points (Standard 500)
+        begrenzt die Anzahl der Punkte; längere Reihen werden per LTTB reduziert.
         """
-        print("\n===== HISTORY API-AUFRUF =====")
-        print(f"History-Endpunkt aufgerufen für Sensor-ID: {pk}")
-        
         try:
             sensor = ProtectSensor.objects.get(pk=pk)
-            print(f"Sensor gefunden: {sensor.name} (Typ: {sensor.sensor_type})")
         except ProtectSensor.DoesNotExist:
             print(f"Sensor mit ID {pk} nicht gefunden!")
             return Response({"error": "Sensor nicht gefunden"}, status=status.HTTP_404_NOT_FOUND)
@@ -136,28 +160,17 @@ class ProtectSensorViewSet(viewsets.ModelViewSet):
         days = request.GET.get("days")
         start = request.GET.get("start")
         end = request.GET.get("end")
-        print(f"Anfrageparameter: days={days}, start={start}, end={end}")
+        resolution = request.GET.get("resolution", "auto")
 
-        # Prüfen, ob Historieneinträge für diesen Sensor existieren
-        history_count = ProtectSensorHistory.objects.filter(sensor_name=sensor.name).count()
-        print(f"Anzahl Historieneinträge für '{sensor.name}': {history_count}")
+        try:
+            max_points = int(request.GET.get("max_points", rollups.DEFAULT_MAX_POINTS))
+        except ValueError:
+            return Response({"error": "Ungültiger max_points-Wert"}, status=status.HTTP_400_BAD_REQUEST)
 
         now = timezone.now()
-        queryset = None
-        
-        # WICHTIG: Die Abfrage erfolgt nun aus dem ProtectSensorHistory-Modell
         if days:
             try:
-                days = int(days)
-                since = now - timedelta(days=days)
-                print(f"Zeitfilter: Letzte {days} Tage (seit {since.isoformat()})")
-                
-                queryset = ProtectSensorHistory.objects.filter(
-                    sensor_name=sensor.name,
-                    timestamp__gte=since
-                ).order_by('timestamp')
-                
-                print(f"Abfrageergebnis: {queryset.count()} Einträge")
+                start_dt, end_dt = now - timedelta(days=int(days)), now
             except ValueError:
                 print(f"Fehler: Ungültiger days-Wert: {days}")
                 return Response({"error": "Ungültiger days-Wert"}, status=status.HTTP_400_BAD_REQUEST)
@@ -166,64 +179,33 @@ class ProtectSensorViewSet(viewsets.ModelViewSet):
                 # Standardisierte ISO-Format-Behandlung
                 start_dt = timezone.datetime.fromisoformat(start.replace('Z', '+00:00'))
                 end_dt = timezone.datetime.fromisoformat(end.replace('Z', '+00:00'))
-                print(f"Zeitfilter: Von {start_dt.isoformat()} bis {end_dt.isoformat()}")
-                
-                queryset = ProtectSensorHistory.objects.filter(
-                    sensor_name=sensor.name,
-                    timestamp__range=(start_dt, end_dt)
-                ).order_by('timestamp')
-                
-                print(f"Abfrageergebnis: {queryset.count()} Einträge")
             except Exception as e:
                 print(f"Fehler bei der Zeitumwandlung: {e}")
                 return Response({"error": f"Ungültiges Start/End Format: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
         else:
             # Standard: Letzte 24 Stunden
-            since = now - timedelta(days=1)
-            print(f"Zeitfilter: Standard (letzte 24 Stunden, seit {since.isoformat()})")
-            
-            queryset = ProtectSensorHistory.objects.filter(
-                sensor_name=sensor.name,
-                timestamp__gte=since
-            ).order_by('timestamp')
-            
-            print(f"Abfrageergebnis: {queryset.count()} Einträge")
+            start_dt, end_dt = now - timedelta(days=1), now
 
-        # Falls keine Historieneinträge gefunden wurden, fügen wir den aktuellen Sensor als Fallback hinzu
-        if not queryset.exists():
-            print("KEINE HISTORIENEINTRÄGE gefunden!")
-            print("Als Fallback den aktuellen Sensor als einzigen Datenpunkt verwenden...")
-            
-            # Den aktuellen Sensorwert als Historiendatenpunkt zurückgeben
+        resolution, history_data = rollups.history_series(
+            sensor.name, start_dt, end_dt, resolution=resolution, max_points=max_points
+        )
+
+        # Falls keine Historieneinträge gefunden wurden, den aktuellen Sensor als einzigen Datenpunkt verwenden
+        if not history_data:
             history_data = [{
                 "timestamp": sensor.last_seen.isoformat(),
                 "temperature": sensor.temperature,
                 "humidity": sensor.humidity
             }]
-        else:
-            # Daten für das Diagramm aufbereiten
-            history_data = []
-            for entry in queryset:
-                point = {
-                    "timestamp": entry.timestamp.isoformat(),
-                    "temperature": entry.temperature,
-                    "humidity": entry.humidity
-                }
-                history_data.append(point)
-            
-        print(f"Sende {len(history_data)} Datenpunkte zurück")
-        
-        if history_data:
-            print(f"Erster Datenpunkt: {history_data[0]['timestamp']}")
-            print(f"Letzter Datenpunkt: {history_data[-1]['timestamp']}")
-        
-        print("============================\n")
+
+        print(f"History {sensor.name}: {len(history_data)} Punkte ({resolution}) von {start_dt.isoformat()} bis {end_dt.isoformat()}")
 
         # Antwort mit Cache-Control-Headern
         response = Response(history_data)
         response["Cache-Control"] = "no-cache, no-store, must-revalidate"
         response["Pragma"] = "no-cache"
         response["Expires"] = "0"
+        response["X-History-Resolution"] = resolution
         
         return response
 
@@ -271,4 +253,40 @@ class ProtectSensorHistoryViewSet(viewsets.ReadOnlyModelViewSet):
         response["Pragma"] = "no-cache"
         response["Expires"] = "0"
         
-        return response
\ No newline at end of file
+        return response
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Streamt die Historie als CSV (Standard) oder NDJSON.
+        Parameter: sensor_name (mehrfach oder kommagetrennt), days oder
+        start/end (ISO-Format), export_format=csv|ndjson.
+        """
+        sensor_names = [
+            name.strip()
+            for value in request.query_params.getlist('sensor_name')
+            for name in value.split(',')
+            if name.strip()
+        ]
+
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response({"error": "export_format muss csv oder ndjson sein"}, status=status.HTTP_400_BAD_REQUEST)
+
+        days = request.query_params.get('days')
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        start_dt = end_dt = None
+        try:
+            if days:
+                start_dt = timezone.now() - timedelta(days=int(days))
+            if start:
+                start_dt = timezone.datetime.fromisoformat(start.replace('Z', '+00:00'))
+            if end:
+                end_dt = timezone.datetime.fromisoformat(end.replace('Z', '+00:00'))
+        except ValueError as e:
+            return Response({"error": f"Ungültiger Zeitraum: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"sensorverlauf-{timezone.localtime():%Y%m%d-%H%M}"
+        return export_response(history_rows(sensor_names, start_dt, end_dt), export_format, filename)
+
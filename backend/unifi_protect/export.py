@@ -0,0 +1,68 @@
+# unifi_protect/export.py
+"""
+Streaming-Export der Sensorhistorie als CSV oder NDJSON.
+
+Die Zeilen werden mit iterator(chunk_size=...) gelesen und einzeln
+geschrieben; der Speicherbedarf hängt damit nicht von der Länge des
+Zeitraums ab.
+"""
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from .models import ProtectSensorHistory
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = ['sensor_name', 'timestamp', 'temperature', 'humidity', 'source']
+
+
+class _Echo:
+    """Pseudo-Puffer für csv.writer: gibt die geschriebene Zeile direkt zurück"""
+
+    def write(self, value):
+        return value
+
+
+def history_rows(sensor_names=None, start=None, end=None):
+    queryset = ProtectSensorHistory.objects.all()
+    if sensor_names:
+        queryset = queryset.filter(sensor_name__in=sensor_names)
+    if start:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end:
+        queryset = queryset.filter(timestamp__lte=end)
+    # Reihenfolge passend zum Index (sensor_name, timestamp)
+    return queryset.order_by('sensor_name', 'timestamp').values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield writer.writerow(EXPORT_FIELDS)
+    for sensor_name, timestamp, temperature, humidity, source in rows:
+        yield writer.writerow([sensor_name, timestamp.isoformat(), temperature, humidity, source])
+
+
+def _ndjson_lines(rows):
+    for sensor_name, timestamp, temperature, humidity, source in rows:
+        yield json.dumps({
+            'sensor_name': sensor_name,
+            'timestamp': timestamp.isoformat(),
+            'temperature': temperature,
+            'humidity': humidity,
+            'source': source,
+        }) + "\n"
+
+
+def export_response(rows, export_format, filename):
+    if export_format == 'ndjson':
+        response = StreamingHttpResponse(_ndjson_lines(rows), content_type='application/x-ndjson')
+        filename += '.ndjson'
+    else:
+        response = StreamingHttpResponse(_csv_lines(rows), content_type='text/csv; charset=utf-8')
+        filename += '.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
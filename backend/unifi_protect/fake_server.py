@@ -0,0 +1,250 @@
+# unifi_protect/fake_server.py
+"""
+Minimaler Fake-Server für UniFi Protect (Login, Bootstrap und
+Update-Websocket) zum lokalen Testen von ProtectClient und
+protect_listener ohne Controller.
+
+    python -m unifi_protect.fake_server --port 8765 --expire-after 3
+    PROTECT_URL=http://127.0.0.1:8765 python unifi_protect/protect_listener.py
+    PROTECT_EVENT_STREAM=1 PROTECT_URL=http://127.0.0.1:8765 python unifi_protect/protect_listener.py
+
+Mit --expire-after N verliert das Cookie nach N Bootstrap-Abrufen seine
+Gültigkeit (401), um die erneute Anmeldung zu prüfen. Der Websocket
+(UPDATES_PATH) sendet alle --update-interval Sekunden eine Temperatur-
+änderung eines Sensors im Protect-Paketformat (encode_packet); mit
+--update-count N schließt er die Verbindung nach N Änderungen.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import secrets
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .protect_client import BOOTSTRAP_PATH, LOGIN_PATH, UPDATES_PATH, encode_packet
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def _sensor(index):
+    return {
+        "id": f"fake-sensor-{index}",
+        "name": f"Fake Sensor {index}",
+        "type": "uvc-sensor",
+        "mac": f"AA:BB:CC:00:00:{index:02X}",
+        "state": "CONNECTED",
+        "batteryStatus": {"percentage": 90},
+        "stats": {
+            "temperature": {"value": round(random.uniform(18, 28), 1)},
+            "humidity": {"value": round(random.uniform(40, 70), 1)},
+        },
+    }
+
+
+class FakeProtectServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, sensors=3, expire_after=0, update_interval=5.0, update_count=0):
+        super().__init__(address, FakeProtectHandler)
+        self.sensor_count = sensors
+        self.expire_after = expire_after
+        self.update_interval = update_interval
+        self.update_count = update_count
+        self.tokens = {}
+        self.logins = 0
+        self.bootstrap_requests = 0
+        self.websocket_connections = 0
+        self.updates_sent = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Startet den Server in einem Hintergrund-Thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FakeProtectHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _token(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "TOKEN":
+                return value
+        return None
+
+    def do_POST(self):
+        if self.path != LOGIN_PATH:
+            return self._send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        credentials = json.loads(self.rfile.read(length) or b"{}")
+        if not credentials.get("username") or not credentials.get("password"):
+            return self._send_json(401, {"error": "invalid credentials"})
+
+        token = secrets.token_hex(16)
+        with self.server.lock:
+            self.server.tokens[token] = 0
+            self.server.logins += 1
+        self._send_json(200, {"username": credentials["username"]}, {
+            "Set-Cookie": f"TOKEN={token}; Path=/; HttpOnly",
+            "X-CSRF-Token": secrets.token_hex(8),
+        })
+
+    def do_GET(self):
+        if self.path.split("?")[0] == UPDATES_PATH:
+            return self._websocket()
+        if self.path.split("?")[0] != BOOTSTRAP_PATH:
+            return self._send_json(404, {"error": "not found"})
+
+        token = self._token()
+        server = self.server
+        with server.lock:
+            if token not in server.tokens:
+                return self._send_json(401, {"error": "unauthorized"})
+            server.tokens[token] += 1
+            if server.expire_after and server.tokens[token] > server.expire_after:
+                del server.tokens[token]
+                return self._send_json(401, {"error": "token expired"})
+            server.bootstrap_requests += 1
+
+        self._send_json(200, {
+            "lastUpdateId": secrets.token_hex(8),
+            "sensors": [_sensor(index) for index in range(1, server.sensor_count + 1)],
+        })
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack(">Q", len(payload))
+        with self.send_lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def _read_frame(self):
+        """Liest einen (maskierten) Client-Frame und gibt (opcode, payload) zurück"""
+        head = self.rfile.read(2)
+        if len(head) < 2:  # Verbindung geschlossen
+            return OPCODE_CLOSE, b""
+        size = head[1] & 0x7F
+        if size == 126:
+            size = struct.unpack(">H", self.rfile.read(2))[0]
+        elif size == 127:
+            size = struct.unpack(">Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(self.rfile.read(size)))
+        return head[0] & 0x0F, payload
+
+    def _websocket(self):
+        """Update-Websocket: sendet Temperaturänderungen im Protect-Paketformat"""
+        server = self.server
+        with server.lock:
+            if self._token() not in server.tokens:
+                return self._send_json(401, {"error": "unauthorized"})
+            server.websocket_connections += 1
+
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+
+        # Client-Frames (Ping, Close) liest ein eigener Thread, gesendet wird unter Sperre
+        self.send_lock = threading.Lock()
+        closed = threading.Event()
+
+        def read_client():
+            try:
+                while True:
+                    opcode, payload = self._read_frame()
+                    if opcode == OPCODE_CLOSE:
+                        break
+                    if opcode == OPCODE_PING:
+                        self._send_frame(OPCODE_PONG, payload)
+            except OSError:
+                pass
+            closed.set()
+
+        threading.Thread(target=read_client, daemon=True).start()
+
+        sent = 0
+        while not closed.wait(server.update_interval):
+            if server.update_count and sent >= server.update_count:
+                break
+            index = random.randint(1, server.sensor_count)
+            action = {
+                "action": "update",
+                "modelKey": "sensor",
+                "id": f"fake-sensor-{index}",
+                "newUpdateId": secrets.token_hex(8),
+            }
+            data = {"stats": {"temperature": {"value": round(random.uniform(18, 28), 1)}}}
+            try:
+                self._send_frame(OPCODE_BINARY, encode_packet(action, data, deflate=sent % 2 == 1))
+            except OSError:
+                break
+            sent += 1
+            with server.lock:
+                server.updates_sent += 1
+
+        try:
+            self._send_frame(OPCODE_CLOSE, struct.pack(">H", 1000))
+        except OSError:
+            pass
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake UniFi Protect Server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sensors", type=int, default=3)
+    parser.add_argument("--expire-after", type=int, default=0,
+                        help="Cookie nach N Bootstrap-Abrufen ungültig machen")
+    parser.add_argument("--update-interval", type=float, default=5.0,
+                        help="Sekunden zwischen zwei Websocket-Änderungen")
+    parser.add_argument("--update-count", type=int, default=0,
+                        help="Websocket nach N Änderungen schließen (0 = offen lassen)")
+    args = parser.parse_args()
+
+    server = FakeProtectServer((args.host, args.port), args.sensors, args.expire_after,
+                               args.update_interval, args.update_count)
+    print(f"🧪 Fake UniFi Protect läuft auf {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Fake-Server beendet.")
+
+
+if __name__ == "__main__":
+    main()
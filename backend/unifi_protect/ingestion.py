@@ -0,0 +1,101 @@
+# unifi_protect/ingestion.py
+"""
+Sammelweise Übernahme von Sensordaten aus UniFi Protect.
+
+Ein Aufruf schreibt alle Sensoren eines Bootstrap-Abrufs: bestehende
+ProtectSensor-Zeilen per bulk_update, neue per bulk_create, und die
+Historie per bulk_create mit ignore_conflicts auf (sensor_name, timestamp).
+Der Zeitstempel der Historie wird auf die volle Minute gerundet, damit ein
+doppelt gesendeter Abruf in derselben Minute keinen zweiten Eintrag erzeugt.
+Anschließend werden die Stunden- und Tageswerte (rollups.py) aktualisiert.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ProtectSensor, ProtectSensorHistory
+from .rollups import refresh_rollups
+
+BULK_BATCH_SIZE = 500
+
+
+def normalize_reading(item):
+    """
+    Akzeptiert sowohl Sensorobjekte aus dem Protect-Bootstrap
+    (name, type, stats.temperature.value, ...) als auch das flache Format
+    des create-Endpunkts (name, sensor_type, temperature, humidity).
+    """
+    stats = item.get("stats") or {}
+    return {
+        "name": item.get("name"),
+        "sensor_type": item.get("sensor_type") or item.get("type") or "",
+        "temperature": item.get("temperature", (stats.get("temperature") or {}).get("value")),
+        "humidity": item.get("humidity", (stats.get("humidity") or {}).get("value")),
+    }
+
+
+def history_timestamp(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+@transaction.atomic
+def ingest_readings(items, source="listener", now=None):
+    """
+    Schreibt eine Liste von Sensorwerten und gibt eine Zusammenfassung zurück.
+    Einträge ohne Namen werden übersprungen; kommt ein Sensor mehrfach vor,
+    gilt der letzte Wert.
+    """
+    now = now or timezone.now()
+    readings = {}
+    skipped = 0
+    for item in items:
+        reading = normalize_reading(item)
+        if not reading["name"]:
+            skipped += 1
+            continue
+        readings[reading["name"]] = reading
+
+    # Bei mehreren Zeilen mit gleichem Namen die zuletzt gesehene verwenden (wie in create)
+    existing = {}
+    for sensor in ProtectSensor.objects.filter(name__in=list(readings)).order_by('last_seen'):
+        existing[sensor.name] = sensor
+
+    to_update = []
+    to_create = []
+    for name, reading in readings.items():
+        sensor = existing.get(name)
+        if sensor is None:
+            to_create.append(ProtectSensor(last_seen=now, **reading))
+            continue
+        sensor.sensor_type = reading["sensor_type"] or sensor.sensor_type
+        sensor.temperature = reading["temperature"]
+        sensor.humidity = reading["humidity"]
+        sensor.last_seen = now  # auto_now greift bei bulk_update nicht
+        to_update.append(sensor)
+
+    ProtectSensor.objects.bulk_update(
+        to_update, ['sensor_type', 'temperature', 'humidity', 'last_seen'], batch_size=BULK_BATCH_SIZE
+    )
+    ProtectSensor.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+
+    timestamp = history_timestamp(now)
+    ProtectSensorHistory.objects.bulk_create([
+        ProtectSensorHistory(
+            sensor_name=name,
+            timestamp=timestamp,
+            temperature=reading["temperature"],
+            humidity=reading["humidity"],
+            source=source
+        )
+        for name, reading in readings.items()
+    ], batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+    # Stunden- und Tagesverdichtung für das aktuelle Zeitfenster nachziehen
+    refresh_rollups(readings.keys(), timestamp)
+
+    return {
+        "received": len(items),
+        "sensors_created": len(to_create),
+        "sensors_updated": len(to_update),
+        "history_timestamp": timestamp.isoformat(),
+        "skipped": skipped,
+    }
@@ -0,0 +1,64 @@
+# backend/unifi_protect/management/commands/apply_retention.py
+
+from django.core.management.base import BaseCommand
+
+from unifi_protect.retention import apply_retention, database_size, get_settings, vacuum
+
+
+def _format_size(size):
+    return f"{size / (1024 * 1024):.1f} MB" if size is not None else "–"
+
+
+class Command(BaseCommand):
+    help = ("Verdichtet alte Sensorrohwerte und löscht abgelaufene Verlaufsdaten "
+            "(Sensorhistorie, Stunden-/Tageswerte, Zugriffsereignisse) in Blöcken.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append',
+                            choices=['sensor_raw', 'sensor_hourly', 'sensor_daily', 'access_events'],
+                            help="Nur diese Richtlinie anwenden (mehrfach möglich)")
+        parser.add_argument('--batch-size', type=int, help="Zeilen pro Löschblock")
+        parser.add_argument('--archive-dir', help="Gelöschte Zeilen vorher als gzip-NDJSON ablegen")
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Pause in Sekunden zwischen den Blöcken")
+        parser.add_argument('--dry-run', action='store_true', help="Nur zählen, nichts löschen")
+        parser.add_argument('--vacuum', action='store_true',
+                            help="SQLite-Datei anschließend verkleinern (VACUUM)")
+
+    def handle(self, *args, **options):
+        config = get_settings()
+        if options['batch_size']:
+            config['batch_size'] = options['batch_size']
+
+        size_before = database_size()
+        self.stdout.write("🧹 Wende Aufbewahrungsrichtlinien an" + (" (Probelauf)" if options['dry_run'] else "") + "...")
+
+        report = apply_retention(
+            config=config,
+            only=options['only'],
+            archive_dir=options['archive_dir'],
+            pause=options['pause'],
+            dry_run=options['dry_run']
+        )
+
+        total = 0
+        for entry in report:
+            if not entry['days']:
+                self.stdout.write(f"   ⏭️ {entry['name']}: unbegrenzt aufbewahrt")
+                continue
+            total += entry['deleted']
+            line = f"   🗑 {entry['name']}: {entry['deleted']} Zeilen vor {entry['cutoff']:%d.%m.%Y}"
+            if entry['compacted_days']:
+                line += f", {entry['compacted_days']} Tage verdichtet"
+            if entry['archived']:
+                line += f", {entry['archived']} archiviert"
+            self.stdout.write(line)
+
+        if options['vacuum'] and not options['dry_run']:
+            self.stdout.write("📦 VACUUM...")
+            vacuum()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} Zeilen {'betroffen' if options['dry_run'] else 'freigegeben'} "
+            f"(Datenbank: {_format_size(size_before)} → {_format_size(database_size())})"
+        ))
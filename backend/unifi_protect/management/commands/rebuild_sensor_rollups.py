@@ -0,0 +1,45 @@
+# backend/unifi_protect/management/commands/rebuild_sensor_rollups.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from unifi_protect.models import ProtectSensorHistory
+from unifi_protect.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Berechnet die Stunden- und Tageswerte der Sensorhistorie neu (tageweise)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sensor', action='append', dest='sensors',
+                            help="Nur diesen Sensor neu berechnen (mehrfach möglich)")
+        parser.add_argument('--days', type=int,
+                            help="Nur die letzten N Tage neu berechnen")
+
+    def handle(self, *args, **options):
+        history = ProtectSensorHistory.objects.all()
+        if options['sensors']:
+            history = history.filter(sensor_name__in=options['sensors'])
+
+        bounds = history.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+        if not bounds['first']:
+            self.stdout.write("⚠️ Keine Historieneinträge vorhanden.")
+            return
+
+        start = bounds['first']
+        if options['days']:
+            start = max(start, bounds['last'] - timedelta(days=options['days']))
+        names = list(history.order_by().values_list('sensor_name', flat=True).distinct())
+
+        self.stdout.write(f"🔄 Verdichte {len(names)} Sensoren ab {start:%d.%m.%Y}...")
+        hours = days = 0
+        while start <= bounds['last']:
+            end = min(start + timedelta(days=1), bounds['last'])
+            written = refresh_rollups(names, start, end)
+            hours += written[0]
+            days += written[1]
+            start += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {hours} Stundenwerte und {days} Tageswerte geschrieben"))
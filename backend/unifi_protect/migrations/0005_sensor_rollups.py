@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('unifi_protect', '0004_alter_protectsensor_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProtectSensorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(max_length=100)),
+                ('resolution', models.CharField(choices=[('hour', 'Stunde'), ('day', 'Tag')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('temperature_sum', models.FloatField(default=0)),
+                ('temperature_count', models.PositiveIntegerField(default=0)),
+                ('temperature_min', models.FloatField(blank=True, null=True)),
+                ('temperature_max', models.FloatField(blank=True, null=True)),
+                ('humidity_sum', models.FloatField(default=0)),
+                ('humidity_count', models.PositiveIntegerField(default=0)),
+                ('humidity_min', models.FloatField(blank=True, null=True)),
+                ('humidity_max', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sensorverdichtung',
+                'verbose_name_plural': 'Sensorverdichtungen',
+                'ordering': ['sensor_name', 'resolution', 'bucket'],
+                'unique_together': {('sensor_name', 'resolution', 'bucket')},
+            },
+        ),
+    ]
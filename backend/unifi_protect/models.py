@@ -58,4 +58,50 @@ class ProtectSensorHistory(models.Model):
         # (Verhindert doppelte Einträge im gleichen Zeitraum)
         unique_together = ['sensor_name', 'timestamp']
         verbose_name = "Sensorverlauf"
-        verbose_name_plural = "Sensorverläufe"
\ No newline at end of file
+        verbose_name_plural = "Sensorverläufe"
+
+class ProtectSensorRollup(models.Model):
+    """
+    Verdichtete Sensorwerte pro Stunde bzw. Tag (Min/Max/Mittel).
+    Wird beim Eintreffen neuer Historieneinträge aktualisiert, damit
+    Diagramme über lange Zeiträume nicht alle Rohwerte laden müssen.
+    """
+    RESOLUTION_CHOICES = [
+        ('hour', 'Stunde'),
+        ('day', 'Tag'),
+    ]
+
+    sensor_name = models.CharField(max_length=100)
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    # Beginn des Zeitfensters
+    bucket = models.DateTimeField()
+
+    samples = models.PositiveIntegerField(default=0)
+
+    # Summen und Anzahl statt Mittelwert, damit Tage aus Stunden gebildet werden können
+    temperature_sum = models.FloatField(default=0)
+    temperature_count = models.PositiveIntegerField(default=0)
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+
+    humidity_sum = models.FloatField(default=0)
+    humidity_count = models.PositiveIntegerField(default=0)
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+
+    @property
+    def temperature_avg(self):
+        return self.temperature_sum / self.temperature_count if self.temperature_count else None
+
+    @property
+    def humidity_avg(self):
+        return self.humidity_sum / self.humidity_count if self.humidity_count else None
+
+    def __str__(self):
+        return f"{self.sensor_name} - {self.resolution} {self.bucket.strftime('%Y-%m-%d %H:%M')}"
+
+    class Meta:
+        ordering = ['sensor_name', 'resolution', 'bucket']
+        unique_together = ['sensor_name', 'resolution', 'bucket']
+        verbose_name = "Sensorverdichtung"
+        verbose_name_plural = "Sensorverdichtungen"
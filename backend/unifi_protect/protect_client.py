@@ -0,0 +1,205 @@
+# unifi_protect/protect_client.py
+"""
+Wiederverwendbarer Client für UniFi Protect.
+
+- Eine requests.Session pro Client: Verbindungen und das Auth-Cookie
+  werden wiederverwendet, angemeldet wird nur beim ersten Aufruf und
+  erneut nach einer 401-Antwort.
+- sensor_updates() abonniert optional den Update-Websocket von Protect
+  und liefert Sensoränderungen nahezu in Echtzeit, ohne den Bootstrap
+  erneut zu laden.
+
+Der Client hängt nicht von Django ab und kann damit im eigenständigen
+protect_listener und in Management-Commands verwendet werden. Zum Testen
+ohne Controller: python -m unifi_protect.fake_server
+"""
+import json
+import os
+import struct
+import time
+import zlib
+
+import requests
+import urllib3
+
+# Deaktiviere SSL-Warnungen für self-signed Zertifikate
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+BOOTSTRAP_PATH = "/proxy/protect/api/bootstrap"
+LOGIN_PATH = "/api/auth/login"
+UPDATES_PATH = "/proxy/protect/ws/updates"
+
+PACKET_HEADER_SIZE = 8
+FORMAT_JSON = 1
+FORMAT_UTF8 = 2
+
+
+class ProtectAuthError(Exception):
+    """Anmeldung bei UniFi Protect fehlgeschlagen"""
+
+
+def decode_packet(raw):
+    """
+    Zerlegt eine Update-Nachricht des Protect-Websockets in (action, data).
+    Jede Nachricht besteht aus zwei Frames (Aktion und Nutzdaten) mit je
+    8 Byte Kopf: Typ, Format, deflate-Flag, reserviert, Länge (big endian).
+    """
+    frames = []
+    offset = 0
+    while offset + PACKET_HEADER_SIZE <= len(raw) and len(frames) < 2:
+        _packet_type, payload_format, deflated, _, size = struct.unpack(
+            ">BBBBI", raw[offset:offset + PACKET_HEADER_SIZE]
+        )
+        payload = raw[offset + PACKET_HEADER_SIZE:offset + PACKET_HEADER_SIZE + size]
+        if deflated:
+            payload = zlib.decompress(payload)
+        if payload_format == FORMAT_JSON:
+            payload = json.loads(payload)
+        elif payload_format == FORMAT_UTF8:
+            payload = payload.decode("utf-8")
+        frames.append(payload)
+        offset += PACKET_HEADER_SIZE + size
+
+    if len(frames) != 2:
+        raise ValueError("Unvollständige Protect-Update-Nachricht")
+    return frames[0], frames[1]
+
+
+def encode_packet(action, data, deflate=False):
+    """Gegenstück zu decode_packet (für den Update-Websocket des Fake-Servers)"""
+    raw = b""
+    for packet_type, payload in ((1, action), (2, data)):
+        body = json.dumps(payload).encode("utf-8")
+        if deflate:
+            body = zlib.compress(body)
+        raw += struct.pack(">BBBBI", packet_type, FORMAT_JSON, 1 if deflate else 0, 0, len(body)) + body
+    return raw
+
+
+def _merge(target, update):
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+class ProtectClient:
+    def __init__(self, base_url=None, username=None, password=None, verify=False, timeout=15):
+        self.base_url = (base_url or os.getenv("PROTECT_URL") or "").rstrip("/")
+        self.username = username or os.getenv("PROTECT_USER")
+        self.password = password or os.getenv("PROTECT_PASS")
+        self.verify = verify
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.authenticated = False
+        self.last_update_id = None
+        self.sensors_by_id = {}
+        self.logins = 0
+
+    def login(self):
+        response = self.session.post(
+            f"{self.base_url}{LOGIN_PATH}",
+            headers={"Content-Type": "application/json"},
+            json={"username": self.username, "password": self.password},
+            timeout=10
+        )
+        if response.status_code != 200:
+            self.authenticated = False
+            raise ProtectAuthError(f"Login-Fehler: {response.status_code} {response.text}")
+
+        csrf_token = response.headers.get("X-CSRF-Token")
+        if csrf_token:
+            self.session.headers["X-CSRF-Token"] = csrf_token
+        self.authenticated = True
+        self.logins += 1
+        return True
+
+    def request(self, method, path, **kwargs):
+        """Anfrage mit gespeicherter Anmeldung; bei 401 einmal neu anmelden"""
+        if not self.authenticated:
+            self.login()
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        if response.status_code == 401:
+            self.login()
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        return response
+
+    def bootstrap(self):
+        response = self.request("GET", BOOTSTRAP_PATH, headers={"Accept": "application/json"})
+        response.raise_for_status()
+        data = response.json()
+        self.last_update_id = data.get("lastUpdateId")
+        self.sensors_by_id = {sensor.get("id"): sensor for sensor in data.get("sensors", [])}
+        return data
+
+    def get_sensors(self):
+        return self.bootstrap().get("sensors", [])
+
+    def _websocket_url(self):
+        url = self.base_url.replace("https://", "wss://").replace("http://", "ws://")
+        url = f"{url}{UPDATES_PATH}"
+        if self.last_update_id:
+            url += f"?lastUpdateId={self.last_update_id}"
+        return url
+
+    def sensor_updates(self, ping_interval=30, idle_seconds=5):
+        """
+        Generator über aktualisierte Sensoren (vollständiges Sensorobjekt mit
+        eingearbeiteter Änderung). Lädt den Bootstrap einmal für Namen und
+        Ausgangswerte; endet, wenn die Verbindung geschlossen wird. Kommt
+        idle_seconds lang keine Nachricht, liefert er None, damit der
+        Aufrufer gesammelte Änderungen auch ohne neue Nachricht senden kann.
+        """
+        import websocket  # websocket-client
+
+        if not self.sensors_by_id:
+            self.bootstrap()
+
+        cookie = "; ".join(f"{name}={value}" for name, value in self.session.cookies.items())
+        ws = websocket.create_connection(
+            self._websocket_url(),
+            header=[f"Cookie: {cookie}"],
+            sslopt={"cert_reqs": 0} if not self.verify else None,
+            timeout=self.timeout
+        )
+        ws.settimeout(min(idle_seconds, ping_interval))
+        last_ping = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() - last_ping >= ping_interval:
+                    ws.ping()
+                    last_ping = time.monotonic()
+                try:
+                    raw = ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    yield None
+                    continue
+                if not raw:
+                    return
+                if isinstance(raw, str):
+                    raw = raw.encode("latin-1")
+                try:
+                    action, data = decode_packet(raw)
+                except ValueError:
+                    continue
+
+                if not isinstance(action, dict) or action.get("modelKey") != "sensor":
+                    continue
+                sensor_id = action.get("id")
+                if action.get("action") == "add":
+                    self.sensors_by_id[sensor_id] = data
+                elif action.get("action") == "update" and sensor_id in self.sensors_by_id:
+                    _merge(self.sensors_by_id[sensor_id], data)
+                else:
+                    continue
+                self.last_update_id = action.get("newUpdateId", self.last_update_id)
+                yield self.sensors_by_id[sensor_id]
+        finally:
+            ws.close()
+
+    def close(self):
+        self.session.close()
@@ -3,88 +3,108 @@
 import os
 import time
 import requests
-import urllib3
 import traceback
 from dotenv import load_dotenv
 from datetime import datetime
 
-# Deaktiviere SSL-Warnungen für self-signed Zertifikate
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+try:
+    from unifi_protect.protect_client import ProtectClient
+except ImportError:  # Direkter Aufruf als Skript aus unifi_protect/
+    from protect_client import ProtectClient
 
 # Umgebungsvariablen laden
 load_dotenv()
 
 # Konfigurationsvariablen
-PROTECT_URL = os.getenv("PROTECT_URL")
-USERNAME = os.getenv("PROTECT_USER")
-PASSWORD = os.getenv("PROTECT_PASS")
 API_URL = "http://localhost:8000/api/unifi_protect/sensors/"
+BULK_API_URL = f"{API_URL}bulk/"
 INTERVAL_SECONDS = 300  # 5 Minuten
+# Ereignismodus: Sensoränderungen über den Protect-Websocket statt Abfrage im Intervall
+EVENT_STREAM = os.getenv("PROTECT_EVENT_STREAM", "").lower() in ("1", "true", "yes")
+EVENT_FLUSH_SECONDS = int(os.getenv("PROTECT_EVENT_FLUSH_SECONDS", "60"))
+
+# Eine Session für die Django-API, ein Client (mit gespeicherter Anmeldung) für Protect
+session = requests.Session()
+client = ProtectClient(
+    base_url=os.getenv("PROTECT_URL"),
+    username=os.getenv("PROTECT_USER"),
+    password=os.getenv("PROTECT_PASS")
+)
 
 def get_sensors():
-    """Ruft Sensordaten von UniFi Protect ab."""
-    print("🔐 Anmeldung bei UniFi Protect...")
-
+    """Ruft Sensordaten von UniFi Protect ab (Anmeldung nur beim ersten Mal oder nach 401)."""
     try:
-        # Login zum UniFi Protect System
-        login_resp = requests.post(
-            f"{PROTECT_URL}/api/auth/login",
-            headers={"Content-Type": "application/json"},
-            json={"username": USERNAME, "password": PASSWORD},
-            verify=False,
-            timeout=10
-        )
-
-        if login_resp.status_code != 200:
-            print(f"❌ Login-Fehler: {login_resp.status_code} {login_resp.text}")
-            return []
-
-        cookies = login_resp.cookies
-
-        # Bootstrap-Daten abrufen (enthält alle Sensoren)
-        resp = requests.get(
-            f"{PROTECT_URL}/proxy/protect/api/bootstrap",
-            headers={"Accept": "application/json"},
-            cookies=cookies,
-            verify=False,
-            timeout=15  # Längerer Timeout für Bootstrap-Daten
-        )
-
-        if resp.status_code != 200:
-            print(f"❌ Fehler beim Abrufen der Sensoren: {resp.status_code}")
-            return []
-
-        data = resp.json()
-        return data.get("sensors", [])
+        if not client.authenticated:
+            print("🔐 Anmeldung bei UniFi Protect...")
+        return client.get_sensors()
     except Exception as e:
         print(f"❌ Fehler beim Abrufen der Sensoren: {str(e)}")
         print(traceback.format_exc())  # Ausführlicher Fehler für Debugging
         return []
 
-def post_sensor(sensor):
-    """Sendet Sensordaten an die Django-API."""
-    payload = {
-        "name": sensor.get("name"),
-        "sensor_type": sensor.get("type"),
-        "temperature": sensor.get("stats", {}).get("temperature", {}).get("value"),
-        "humidity": sensor.get("stats", {}).get("humidity", {}).get("value"),
-    }
-
+def post_sensors(sensors):
+    """Sendet alle Sensordaten eines Abrufs in einer Anfrage an die Django-API."""
     try:
-        res = requests.post(API_URL, json=payload, timeout=5)
+        res = session.post(BULK_API_URL, json={"sensors": sensors, "source": "listener"}, timeout=10)
         if res.status_code not in (200, 201):
             print(f"⚠️ API-Fehler: {res.status_code} – {res.text}")
-            return False
-        return True
+            return None
+        return res.json()
     except Exception as e:
         print(f"⚠️ POST fehlgeschlagen: {e}")
         print(traceback.format_exc())  # Ausführlicher Fehler für Debugging
-        return False
+        return None
+
+def flush_pending(pending):
+    """Sendet gesammelte Sensoränderungen; bei Fehlern bleiben sie für den nächsten Versuch erhalten."""
+    if not pending:
+        return
+    result = post_sensors(list(pending.values()))
+    if result:
+        print(f"   ✅ {len(pending)} Sensoren übertragen")
+        pending.clear()
+
+def run_event_stream():
+    """
+    Überträgt Sensoränderungen aus dem Protect-Websocket. Geänderte Sensoren
+    werden gesammelt und höchstens alle EVENT_FLUSH_SECONDS gesendet, auch
+    wenn danach keine weitere Nachricht kommt (der Stream meldet Leerlauf
+    mit None). Bricht die Verbindung ab, wird das Gesammelte gesendet und
+    nach kurzer Pause neu verbunden.
+    """
+    pending = {}
+    last_flush = time.monotonic()
+    while True:
+        try:
+            print("📡 Verbinde mit dem Protect-Update-Stream...")
+            for sensor in client.sensor_updates():
+                if sensor is not None:
+                    pending[sensor.get("id")] = sensor
+                if pending and time.monotonic() - last_flush >= EVENT_FLUSH_SECONDS:
+                    flush_pending(pending)
+                    last_flush = time.monotonic()
+            print("⚠️ Update-Stream geschlossen.")
+        except Exception as e:
+            print(f"❌ Fehler im Update-Stream: {str(e)}")
+            print(traceback.format_exc())  # Ausführlicher Fehler für Debugging
+            # Beim nächsten Verbinden Bootstrap und Anmeldung erneuern
+            client.sensors_by_id = {}
+            client.authenticated = False
+        flush_pending(pending)
+        last_flush = time.monotonic()
+        time.sleep(10)
 
 def main():
     """Hauptschleife für Sensorabfrage und Datenübertragung."""
     print("🚀 Starte UniFi Protect Listener mit API-POST...")
 
+    if EVENT_STREAM:
+        try:
+            run_event_stream()
+        except KeyboardInterrupt:
+            print("\n🛑 Listener durch Benutzer beendet.")
+        return
+
     try:
         while True:
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -104,13 +124,13 @@ def main():
 
                         print(f"   → {name} ({typ}) – {temp}°C / {hum}%")
 
-                        post_result = post_sensor(sensor)
-                        # Da wir jetzt die create-Methode in der API aktualisiert haben,
-                        # wird automatisch ein Historieneintrag erstellt - keine Änderung notwendig!
-                        if post_result:
-                            print(f"   ✅ Daten für {name} erfolgreich übertragen")
-                        else:
-                            print(f"   ❌ Fehler beim Übertragen der Daten für {name}")
+                    # Alle Sensoren inkl. Historieneintrag in einer Anfrage übertragen
+                    result = post_sensors(sensors)
+                    if result:
+                        print(f"   ✅ {result['sensors_updated']} aktualisiert, "
+                              f"{result['sensors_created']} neu, {result['skipped']} übersprungen")
+                    else:
+                        print("   ❌ Fehler beim Übertragen der Sensordaten")
                 else:
                     print("⚠️ Keine Sensoren gefunden oder Fehler beim Abruf.")
 
@@ -0,0 +1,193 @@
+# unifi_protect/retention.py
+"""
+Aufbewahrung und Verdichtung der Verlaufsdaten (Sensorhistorie,
+Stunden-/Tageswerte, Zugriffsereignisse).
+
+Rohwerte der Sensoren werden vor dem Löschen in die Stunden- und
+Tageswerte übernommen. Die Stichtage liegen auf lokalen Tagesgrenzen,
+damit nie ein teilweise gelöschter Zeitraum neu verdichtet wird.
+Gelöscht wird in Blöcken nach Primärschlüssel, jeder Block in einer
+eigenen kurzen Transaktion; optional werden die Zeilen vorher als
+gzip-NDJSON archiviert.
+"""
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from unifi_access.models import AccessEvent
+from .models import ProtectSensorHistory, ProtectSensorRollup
+from .rollups import day_start, refresh_rollups
+
+
+def get_settings():
+    config = {
+        'sensor_raw_days': 30,
+        'sensor_hourly_days': 365,
+        'sensor_daily_days': 0,
+        'access_event_days': 365,
+        'batch_size': 2000,
+        'archive_dir': '',
+    }
+    config.update(getattr(settings, 'HISTORY_RETENTION', {}))
+    return config
+
+
+@dataclass
+class Policy:
+    name: str
+    queryset: object
+    time_field: str
+    days: int
+
+
+def retention_policies(config=None):
+    config = config or get_settings()
+    return [
+        Policy('sensor_raw', ProtectSensorHistory.objects.all(), 'timestamp', config['sensor_raw_days']),
+        Policy('sensor_hourly', ProtectSensorRollup.objects.filter(resolution='hour'), 'bucket', config['sensor_hourly_days']),
+        Policy('sensor_daily', ProtectSensorRollup.objects.filter(resolution='day'), 'bucket', config['sensor_daily_days']),
+        Policy('access_events', AccessEvent.objects.all(), 'timestamp', config['access_event_days']),
+    ]
+
+
+def cutoff_for(days, now=None):
+    """Beginn des lokalen Tages, ab dem Daten behalten werden"""
+    return day_start((now or timezone.now()) - timedelta(days=days))
+
+
+def compact_sensor_history(cutoff):
+    """
+    Übernimmt alle Rohwerte vor dem Stichtag tageweise in die Stunden- und
+    Tageswerte. Gibt die Anzahl verdichteter Tage zurück.
+    """
+    expired = ProtectSensorHistory.objects.filter(timestamp__lt=cutoff)
+    first = expired.aggregate(first=Min('timestamp'))['first']
+    if first is None:
+        return 0
+
+    names = list(expired.order_by().values_list('sensor_name', flat=True).distinct())
+    day = day_start(first)
+    days = 0
+    while day < cutoff:
+        next_day = day_start(day + timedelta(hours=36))
+        refresh_rollups(names, day, next_day - timedelta(microseconds=1))
+        day = next_day
+        days += 1
+    return days
+
+
+class Archive:
+    """Schreibt gelöschte Zeilen als gzip-NDJSON (eine Datei pro Lauf und Bereich)"""
+
+    def __init__(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}-{timezone.now():%Y%m%d-%H%M%S}.ndjson.gz")
+        self.file = None
+
+    def write(self, rows):
+        if self.file is None:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self.file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+def purge(policy, cutoff, batch_size, archive_dir='', pause=0, dry_run=False):
+    """
+    Löscht die Zeilen einer Richtlinie vor dem Stichtag in Blöcken.
+    Gibt (gelöscht, archiviert) zurück.
+    """
+    expired = policy.queryset.filter(**{f'{policy.time_field}__lt': cutoff}).order_by('pk')
+    if dry_run:
+        return expired.count(), 0
+
+    archive = Archive(archive_dir, policy.name) if archive_dir else None
+    deleted = archived = 0
+    try:
+        while True:
+            if archive:
+                rows = list(expired.values()[:batch_size])
+                ids = [row['id'] for row in rows]
+            else:
+                ids = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            if archive:
+                archive.write(rows)
+                archived += len(rows)
+
+            # Kurze Transaktion pro Block, damit Schreibsperren nur kurz gehalten werden
+            with transaction.atomic():
+                count, _ = policy.queryset.model.objects.filter(pk__in=ids).delete()
+            deleted += count
+
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive:
+            archive.close()
+    return deleted, archived
+
+
+def database_size():
+    """Größe der SQLite-Datei in Bytes (None bei anderen Datenbanken)"""
+    if connection.vendor != 'sqlite':
+        return None
+    name = connection.settings_dict['NAME']
+    return os.path.getsize(name) if name and os.path.exists(name) else None
+
+
+def vacuum():
+    """Gibt freigewordenen Platz in der SQLite-Datei zurück"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+
+
+def apply_retention(config=None, only=None, archive_dir=None, pause=0, dry_run=False, now=None):
+    """
+    Wendet alle Richtlinien an und liefert einen Bericht je Richtlinie:
+    {'name', 'days', 'cutoff', 'deleted', 'archived', 'compacted_days'}.
+    """
+    config = config or get_settings()
+    archive_dir = config['archive_dir'] if archive_dir is None else archive_dir
+    report = []
+
+    for policy in retention_policies(config):
+        if only and policy.name not in only:
+            continue
+        if not policy.days:
+            report.append({'name': policy.name, 'days': 0, 'cutoff': None,
+                           'deleted': 0, 'archived': 0, 'compacted_days': 0})
+            continue
+
+        cutoff = cutoff_for(policy.days, now)
+        compacted = 0
+        if policy.name == 'sensor_raw' and not dry_run:
+            compacted = compact_sensor_history(cutoff)
+
+        deleted, archived = purge(policy, cutoff, config['batch_size'], archive_dir, pause, dry_run)
+        report.append({
+            'name': policy.name,
+            'days': policy.days,
+            'cutoff': cutoff,
+            'deleted': deleted,
+            'archived': archived,
+            'compacted_days': compacted,
+        })
+    return report
@@ -0,0 +1,224 @@
+# unifi_protect/rollups.py
+"""
+Stunden- und Tagesverdichtung der Sensorhistorie sowie begrenzte
+Verlaufsreihen für Diagramme.
+
+Stunden werden aus den Rohwerten berechnet, Tage aus den Stunden. Beides
+wird nach jedem Eintreffen neuer Werte für die betroffenen Zeitfenster neu
+gebildet (refresh_rollups), damit doppelte Meldungen nichts verfälschen.
+
+history_series wählt für einen Zeitraum die feinste Stufe (raw, hour, day),
+die höchstens max_points * LTTB_FACTOR Punkte liefert, und reduziert das
+Ergebnis bei Bedarf per Largest-Triangle-Three-Buckets auf max_points.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import ProtectSensorHistory, ProtectSensorRollup
+
+RAW_INTERVAL_SECONDS = 5 * 60
+TIER_SECONDS = {'raw': RAW_INTERVAL_SECONDS, 'hour': 3600, 'day': 86400}
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+LTTB_FACTOR = 10
+
+ROLLUP_VALUE_FIELDS = [
+    'samples',
+    'temperature_sum', 'temperature_count', 'temperature_min', 'temperature_max',
+    'humidity_sum', 'humidity_count', 'humidity_min', 'humidity_max',
+]
+
+
+def hour_start(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment):
+    return timezone.make_aware(datetime.combine(timezone.localtime(moment).date(), time.min))
+
+
+def _upsert(rows):
+    if rows:
+        ProtectSensorRollup.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['sensor_name', 'resolution', 'bucket'],
+            update_fields=ROLLUP_VALUE_FIELDS
+        )
+
+
+def refresh_rollups(sensor_names, start, end=None):
+    """
+    Berechnet die Stunden- und Tageswerte der angegebenen Sensoren für alle
+    Zeitfenster neu, die [start, end] berühren. Gibt die Anzahl der
+    geschriebenen Stunden- und Tageszeilen zurück.
+    """
+    sensor_names = list(sensor_names)
+    if not sensor_names:
+        return 0, 0
+    end = end or start
+
+    hour_from = hour_start(start)
+    hour_to = hour_start(end) + timedelta(hours=1)
+
+    # Stunden aus den Rohwerten (eine gruppierte Abfrage)
+    hourly = ProtectSensorHistory.objects.filter(
+        sensor_name__in=sensor_names,
+        timestamp__gte=hour_from,
+        timestamp__lt=hour_to
+    ).annotate(
+        bucket=TruncHour('timestamp')
+    ).order_by().values('sensor_name', 'bucket').annotate(
+        samples=Count('id'),
+        temperature_sum=Sum('temperature'),
+        temperature_count=Count('temperature'),
+        temperature_min=Min('temperature'),
+        temperature_max=Max('temperature'),
+        humidity_sum=Sum('humidity'),
+        humidity_count=Count('humidity'),
+        humidity_min=Min('humidity'),
+        humidity_max=Max('humidity'),
+    )
+    hour_rows = [
+        ProtectSensorRollup(
+            resolution='hour',
+            **dict(row, temperature_sum=row['temperature_sum'] or 0, humidity_sum=row['humidity_sum'] or 0)
+        )
+        for row in hourly
+    ]
+    _upsert(hour_rows)
+
+    # Tage aus den Stundenwerten der betroffenen Tage
+    day_from = day_start(start)
+    day_to = day_start(end) + timedelta(days=1)
+    days = {}
+    for rollup in ProtectSensorRollup.objects.filter(
+        sensor_name__in=sensor_names,
+        resolution='hour',
+        bucket__gte=day_from,
+        bucket__lt=day_to
+    ).order_by('bucket'):
+        key = (rollup.sensor_name, day_start(rollup.bucket))
+        day = days.get(key)
+        if day is None:
+            days[key] = ProtectSensorRollup(
+                sensor_name=key[0],
+                resolution='day',
+                bucket=key[1],
+                **{field: getattr(rollup, field) for field in ROLLUP_VALUE_FIELDS}
+            )
+            continue
+        for prefix in ('temperature', 'humidity'):
+            setattr(day, f'{prefix}_sum', getattr(day, f'{prefix}_sum') + getattr(rollup, f'{prefix}_sum'))
+            setattr(day, f'{prefix}_count', getattr(day, f'{prefix}_count') + getattr(rollup, f'{prefix}_count'))
+            for field, pick in ((f'{prefix}_min', min), (f'{prefix}_max', max)):
+                values = [v for v in (getattr(day, field), getattr(rollup, field)) if v is not None]
+                setattr(day, field, pick(values) if values else None)
+        day.samples += rollup.samples
+    _upsert(list(days.values()))
+
+    return len(hour_rows), len(days)
+
+
+def lttb(points, threshold, value=lambda point: point['temperature']):
+    """
+    Largest-Triangle-Three-Buckets: reduziert eine zeitlich sortierte Reihe
+    auf `threshold` Punkte und erhält dabei Spitzen und Verlauf.
+    Punkte ohne Wert zählen als 0 für die Auswahl, werden aber unverändert
+    zurückgegeben.
+    """
+    length = len(points)
+    if threshold >= length or threshold < 3:
+        return points
+
+    xs = [point['_x'] for point in points]
+    ys = [value(point) or 0 for point in points]
+
+    sampled = [points[0]]
+    bucket_size = (length - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Mittelwert des nächsten Buckets als dritter Dreieckspunkt
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def choose_resolution(start, end, max_points):
+    seconds = max((end - start).total_seconds(), 0)
+    for resolution in ('raw', 'hour'):
+        if seconds / TIER_SECONDS[resolution] <= max_points * LTTB_FACTOR:
+            return resolution
+    return 'day'
+
+
+def _raw_points(sensor_name, start, end):
+    rows = ProtectSensorHistory.objects.filter(
+        sensor_name=sensor_name,
+        timestamp__gte=start,
+        timestamp__lte=end
+    ).order_by('timestamp').values_list('timestamp', 'temperature', 'humidity')
+    return [
+        {'_x': ts.timestamp(), 'timestamp': ts.isoformat(), 'temperature': temperature, 'humidity': humidity}
+        for ts, temperature, humidity in rows.iterator(chunk_size=2000)
+    ]
+
+
+def _rollup_points(sensor_name, resolution, start, end):
+    bucket_from = hour_start(start) if resolution == 'hour' else day_start(start)
+    rollups = ProtectSensorRollup.objects.filter(
+        sensor_name=sensor_name,
+        resolution=resolution,
+        bucket__gte=bucket_from,
+        bucket__lte=end
+    ).order_by('bucket')
+    return [
+        {
+            '_x': rollup.bucket.timestamp(),
+            'timestamp': rollup.bucket.isoformat(),
+            'temperature': rollup.temperature_avg,
+            'humidity': rollup.humidity_avg,
+            'temperature_min': rollup.temperature_min,
+            'temperature_max': rollup.temperature_max,
+            'humidity_min': rollup.humidity_min,
+            'humidity_max': rollup.humidity_max,
+        }
+        for rollup in rollups
+    ]
+
+
+def history_series(sensor_name, start, end, resolution='auto', max_points=DEFAULT_MAX_POINTS):
+    """
+    Liefert (Stufe, Punkte) für ein Diagramm; höchstens max_points Punkte.
+    """
+    max_points = max(3, min(int(max_points), MAX_POINTS_LIMIT))
+    if resolution not in TIER_SECONDS:
+        resolution = choose_resolution(start, end, max_points)
+
+    if resolution == 'raw':
+        points = _raw_points(sensor_name, start, end)
+    else:
+        points = _rollup_points(sensor_name, resolution, start, end)
+
+    points = lttb(points, max_points, value=lambda point: point['temperature'] if point['temperature'] is not None else point['humidity'])
+    for point in points:
+        point.pop('_x', None)
+    return resolution, points
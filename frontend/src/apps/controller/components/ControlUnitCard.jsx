@@ -315,6 +315,11 @@ const SimaticButton = styled(Box)(({ theme }) => ({
   }
 }))
 
+// Abfrage des Befehlsstatus (/controller/commands/<id>/)
+const COMMAND_POLL_MS = 1000
+const COMMAND_TIMEOUT_MS = 60000
+const COMMAND_DONE_STATES = ['confirmed', 'failed', 'superseded']
+
 export default function ControlUnitCard({ unit, onStatusChange }) {
   const navigate = useNavigate()
   const [sending, setSending] = useState(false)
@@ -397,37 +402,50 @@ export default function ControlUnitCard({ unit, onStatusChange }) {
     return ports
   }
 
+  // Befehle werden vom Befehls-Worker zugestellt: Status abfragen, bis er feststeht
+  const waitForCommand = async (commandId) => {
+    const deadline = Date.now() + COMMAND_TIMEOUT_MS
+    while (Date.now() < deadline) {
+      const response = await api.get(`/controller/commands/${commandId}/`)
+      if (COMMAND_DONE_STATES.includes(response.data.status)) {
+        return response.data
+      }
+      await new Promise(resolve => setTimeout(resolve, COMMAND_POLL_MS))
+    }
+    throw new Error('Befehl wurde nicht zugestellt (läuft der Befehls-Worker?)')
+  }
+
   const handleLEDToggle = async () => {
     setSending(true)
+    const requested = !ledStatus
     try {
       const response = await api.post(`/controller/units/${currentUnit.id}/toggle_led/`, {
-        status: !ledStatus
+        status: requested
       })
+      const command = await waitForCommand(response.data.command_id)
       
-      if (response.data.success) {
-        // LED-Status aus Response setzen
-        setLedStatus(response.data.led_status)
-        
-        // Unit-Daten aktualisieren wenn vorhanden
-        if (response.data.unit) {
-          setCurrentUnit(response.data.unit)
-          // Auch den LED-Status aus den aktualisierten Unit-Daten setzen
-          if (response.data.unit.current_status?.led_status !== undefined) {
-            setLedStatus(response.data.unit.current_status.led_status)
-          }
-        }
-        
+      if (command.status === 'failed') {
+        throw new Error(command.error_message || 'SPS hat den Befehl nicht akzeptiert')
+      }
+      
+      if (command.status === 'confirmed') {
+        setLedStatus(requested)
         setNotification({
           open: true,
-          message: `LED ${response.data.led_status ? 'eingeschaltet' : 'ausgeschaltet'}`,
+          message: `LED ${requested ? 'eingeschaltet' : 'ausgeschaltet'}`,
           severity: 'success'
         })
-        
-        // Parent-Komponente informieren
-        onStatusChange?.()
       } else {
-        throw new Error(response.data.error || 'Unbekannter Fehler')
+        // superseded: ein neuerer Befehl bestimmt den Zustand
+        setNotification({
+          open: true,
+          message: 'Befehl durch einen neueren ersetzt',
+          severity: 'info'
+        })
       }
+      
+      // Parent-Komponente informieren (lädt die Unit-Daten neu)
+      onStatusChange?.()
     } catch (error) {
       console.error('Fehler beim LED-Toggle:', error)
       setNotification({
@@ -453,17 +471,20 @@ export default function ControlUnitCard({ unit, onStatusChange }) {
     setSaving(true)
     try {
       const response = await api.post(`/controller/units/${currentUnit.id}/save_to_plc/`)
+      const command = await waitForCommand(response.data.command_id)
       
-      if (response.data.success) {
-        setNotification({
-          open: true,
-          message: 'Konfiguration erfolgreich gespeichert',
-          severity: 'success'
-        })
-        onStatusChange?.()
-      } else {
-        throw new Error(response.data.error || 'Speichern fehlgeschlagen')
+      if (command.status === 'failed') {
+        throw new Error(command.error_message || 'Speichern fehlgeschlagen')
       }
+      
+      setNotification({
+        open: true,
+        message: command.status === 'confirmed'
+          ? 'Konfiguration erfolgreich gespeichert'
+          : 'Durch eine neuere Konfiguration ersetzt',
+        severity: command.status === 'confirmed' ? 'success' : 'info'
+      })
+      onStatusChange?.()
     } catch (error) {
       console.error('Fehler beim Speichern:', error)
       setNotification({
@@ -6,6 +6,7 @@ import {
 import { Add, Delete } from '@mui/icons-material'
 import { useNavigate } from 'react-router-dom'
 import api from '@/utils/api'
+import useLiveEvents from '@/hooks/useLiveEvents'
 import ControlUnitCard from '../components/ControlUnitCard'
 
 export default function ControllerDashboard() {
@@ -49,6 +50,17 @@ export default function ControllerDashboard() {
     loadStatusOverview()
   }, [])
 
+  // Statusänderungen kommen über den Live-Kanal, ohne die Einheiten erneut abzufragen
+  useLiveEvents({
+    control_status: (status) => {
+      setUnits(prev => prev.map(unit => unit.id === status.control_unit
+        ? { ...unit, current_status: { ...unit.current_status, ...status } }
+        : unit
+      ))
+    },
+    open: () => loadStatusOverview()
+  })
+
   useEffect(() => {
     // Initiale Reihenfolge setzen
     if (units.length > 0 && moduleOrder.length === 0) {
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react'
+import { useCallback, useEffect, useRef, useState } from 'react'
 import {
   Typography,
   Box,
@@ -11,6 +11,7 @@ import {
 } from '@mui/material'
 import { AssignmentInd, DoorFront, AccessTime } from '@mui/icons-material'
 import api from '@/utils/api'
+import useLiveEvents from '@/hooks/useLiveEvents'
 import EventTable from '../components/EventTable'
 
 const getCurrentYear = () => new Date().getFullYear()
@@ -29,22 +30,32 @@ export default function Dashboard() {
   const theme = useTheme()
 
   // 📡 Events laden
-  useEffect(() => {
-    const fetchEvents = async () => {
-      try {
-        const res = await api.get('/unifi_access/api/events/?limit=100')
-        const all = res.data.events || []
-        setEvents(all)
-        if (all.length > 0) setLastEvent(all[0])
-      } catch (e) {
-        console.error('Fehler beim Laden der Events:', e)
-      }
+  const fetchEvents = useCallback(async () => {
+    try {
+      const res = await api.get('/unifi_access/api/events/?limit=100')
+      const all = res.data.events || []
+      setEvents(all)
+      if (all.length > 0) setLastEvent(all[0])
+    } catch (e) {
+      console.error('Fehler beim Laden der Events:', e)
     }
+  }, [])
 
+  useEffect(() => {
     fetchEvents()
-    const interval = setInterval(fetchEvents, 5000)
-    return () => clearInterval(interval)
-  }, [])
+  }, [fetchEvents])
+
+  // Neu laden nur bei neuen Zugriffsereignissen (Live-Kanal) statt alle 5 Sekunden
+  const refreshTimer = useRef(null)
+  const scheduleRefresh = useCallback(() => {
+    // Mehrere Ereignisse kurz hintereinander mit einer Anfrage nachladen
+    clearTimeout(refreshTimer.current)
+    refreshTimer.current = setTimeout(fetchEvents, 500)
+  }, [fetchEvents])
+
+  useEffect(() => () => clearTimeout(refreshTimer.current), [])
+
+  useLiveEvents({ access_event: scheduleRefresh, open: scheduleRefresh })
 
   const parseDate = (ts) => {
     if (!ts) return 'Ungültiges Datum'
@@ -16,6 +16,7 @@ import { AdapterDayjs } from '@mui/x-date-pickers/AdapterDayjs';
 import Popover from '@mui/material/Popover';
 
 import SensorItem from '../components/SensorItem';
+import useLiveEvents from '@/hooks/useLiveEvents';
 
 const QUICK_RANGES = [
   { label: '1 Tag', value: 1 },
@@ -119,6 +120,23 @@ const ProtectSensorPage = () => {
     fetchSensors();
   }, [fetchSensors]);
 
+  // Neue Messwerte über den Live-Kanal übernehmen (kein erneutes Abfragen aller Sensoren)
+  useLiveEvents({
+    sensor: (update) => {
+      setSensors(prev => prev.map(sensor => sensor.name === update.name
+        ? {
+            ...sensor,
+            temperature: update.temperature,
+            humidity: update.humidity,
+            last_seen: update.last_seen,
+          }
+        : sensor
+      ));
+      setLastUpdated(new Date());
+      setLastHeartbeat(new Date());
+    },
+  });
+
   useEffect(() => {
     if (expanded) fetchHistory(expanded);
   }, [timeRange, startDate, endDate]);
@@ -0,0 +1,44 @@
+// src/hooks/useLiveEvents.js
+import { useEffect, useRef } from 'react';
+
+const LIVE_EVENTS = ['sensor', 'control_status', 'access_event'];
+
+/**
+ * Abonniert den Live-Kanal des Backends (/api/live/events/, Server-Sent Events)
+ * statt Sensoren, Steuerungsstatus und Zugriffsereignisse regelmäßig abzufragen.
+ *
+ * @param {Object} handlers - { sensor, control_status, access_event } erhalten die Daten
+ *   des Ereignisses; open wird nach jedem (Wieder-)Verbinden aufgerufen, z. B. um
+ *   während einer Unterbrechung verpasste Daten nachzuladen
+ * @param {string|number|null} room - Optional nur Ereignisse dieses Raums
+ */
+const useLiveEvents = (handlers, room = null) => {
+  // Aktuelle Handler merken, ohne bei jedem Rendern neu zu verbinden
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    const params = new URLSearchParams();
+    // EventSource kann keinen Authorization-Header setzen
+    const token = localStorage.getItem('authToken');
+    if (token) params.set('token', token);
+    if (room) params.set('room', room);
+
+    const source = new EventSource(`/api/live/events/?${params}`);
+    LIVE_EVENTS.forEach(event => {
+      source.addEventListener(event, (e) => {
+        try {
+          handlersRef.current[event]?.(JSON.parse(e.data));
+        } catch (error) {
+          console.error(`Fehler im Live-Kanal (${event}):`, error);
+        }
+      });
+    });
+    source.onopen = () => handlersRef.current.open?.();
+
+    // Bei Verbindungsabbruch verbindet EventSource selbst neu (retry vom Server)
+    return () => source.close();
+  }, [room]);
+};
+
+export default useLiveEvents;